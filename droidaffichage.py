@@ -0,0 +1,163 @@
+import threading
+
+from droidinstruments import instruments
+
+# Une image à 60 Hz : les demandes reçues pendant ce délai partent ensemble
+DELAI_IMAGE_MS = 16
+
+# Au-delà, une comparaison de toute la page coûte moins que les sous-arbres
+MAX_CONTROLES_PARTIELS = 20
+
+
+def programmer(delai, fonction, boucle=None):
+    """
+    Appelle fonction() dans delai secondes, retourne un objet à .cancel()
+    Avec une boucle asyncio (mode async) : asyncio.sleep dans la boucle,
+    sinon un threading.Timer
+    """
+    if boucle is None:
+        minuteur = threading.Timer(delai, fonction)
+        minuteur.daemon = True
+        minuteur.start()
+        return minuteur
+
+    # Mode async seulement : asyncio n'est pas chargé au lancement
+    import asyncio
+    async def attendre():
+        await asyncio.sleep(delai)
+        fonction()
+
+    return asyncio.run_coroutine_threadsafe(attendre(), boucle)
+
+
+class PlanificateurMaj:
+    """
+    Regroupe les page.update() des gestionnaires (frappe, sliders...) :
+    les contrôles modifiés sont notés puis envoyés en un seul lot par image,
+    en ne comparant que leurs sous-arbres au lieu de toute la page
+    """
+
+    def __init__(self, page, delai_ms=DELAI_IMAGE_MS, boucle=None):
+        self.page = page
+        self.delai = delai_ms / 1000
+        self.boucle = boucle
+        self.sales = {}
+        self.page_entiere = False
+        self.minuteur = None
+        self.verrou = threading.Lock()
+        self.remise_a_zero()
+
+    def remise_a_zero(self):
+        self.compteurs = {
+            "demandes": 0, "envois": 0, "pleins": 0, "partiels": 0, "controles": 0
+        }
+
+    def releve(self):
+        with self.verrou:
+            return dict(self.compteurs)
+
+    def demander(self, *controles):
+        """
+        Note les contrôles à renvoyer au client (sans argument : toute la page)
+        L'envoi a lieu à la prochaine image, ou tout de suite si delai_ms == 0
+        """
+        with self.verrou:
+            self.compteurs["demandes"] += 1
+            if not controles:
+                self.page_entiere = True
+            for controle in controles:
+                self.sales.setdefault(id(controle), controle)
+
+            immediat = self.delai <= 0
+            if not immediat and self.minuteur is None:
+                self.minuteur = programmer(self.delai, self.vider, self.boucle)
+
+        if immediat:
+            self.vider()
+
+    def vider(self):
+        """Envoie maintenant les modifications en attente (un seul aller-retour)"""
+        with self.verrou:
+            if self.minuteur is not None:
+                self.minuteur.cancel()
+                self.minuteur = None
+            controles = list(self.sales.values())
+            self.sales.clear()
+            entiere = self.page_entiere
+            self.page_entiere = False
+
+        if not entiere and not controles:
+            return
+
+        # Un contrôle pas encore (ou plus) affiché ne peut pas être comparé seul
+        if (len(controles) > MAX_CONTROLES_PARTIELS
+                or any(getattr(c, "page", None) is None for c in controles)):
+            entiere = True
+
+        try:
+            with instruments.mesure("page.update" if entiere else "page.update_partiel"):
+                if entiere:
+                    self.page.update()
+                else:
+                    self.page.update(*controles)
+        except Exception as e:
+            print(f"⚠️ Mise à jour de l'écran : {e}")
+            return
+
+        with self.verrou:
+            self.compteurs["envois"] += 1
+            if entiere:
+                self.compteurs["pleins"] += 1
+            else:
+                self.compteurs["partiels"] += 1
+                self.compteurs["controles"] += len(controles)
+
+
+def mesurer_frappe(texte="125.5", rapide=False):
+    """
+    Saisie caractère par caractère dans le champ de la première huile
+    (on_change à chaque touche). rapide=True : toutes les touches dans la
+    même image, sinon l'écran est mis à jour après chaque touche
+    Retourne (relevé connexion + ms, compteurs du planificateur)
+    """
+    import time
+    from droidtrafic import lancer_application
+
+    app, connexion = lancer_application()
+    nom = next(iter(app.recette["corps_gras"]))
+    app.maj.remise_a_zero()
+    connexion.remise_a_zero()
+
+    debut = time.perf_counter()
+    for i in range(1, len(texte) + 1):
+        app.maj_valeur_huile(nom, texte[:i])
+        if not rapide:
+            app.maj.vider()
+    app.maj.vider()
+    releve = connexion.releve()
+    releve["ms"] = (time.perf_counter() - debut) * 1000
+    return releve, app.maj.releve()
+
+
+if __name__ == "__main__":
+    # python droidaffichage.py  -> échoue (code 1) si la frappe n'est pas regroupée
+    import sys
+
+    echecs = []
+    texte = "125.5"
+    for rapide in (False, True):
+        r, compteurs = mesurer_frappe(texte, rapide=rapide)
+        print(f"Saisie {texte!r} ({'rapide' if rapide else 'touche par touche'}) : "
+              f"{r['envois']} envois, {r['octets']} octets, {r['ms']:.1f} ms")
+        print(f"  planificateur : {compteurs}")
+        # Une frappe ne touche que sa ligne et les totaux : jamais toute la page
+        if compteurs["pleins"]:
+            echecs.append(f"{compteurs['pleins']} page.update() complet(s) pendant la frappe")
+        if rapide and r["envois"] != 1:
+            echecs.append(f"frappe rapide en {r['envois']} envois au lieu d'un seul")
+        if not rapide and r["envois"] > len(texte):
+            echecs.append(f"{r['envois']} envois pour {len(texte)} touches")
+    if echecs:
+        print(f"❌ {' ; '.join(echecs)}")
+        sys.exit(1)
+    print("✅ Frappe regroupée par image, mises à jour partielles seulement")
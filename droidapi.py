@@ -0,0 +1,330 @@
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from droidchimie import calculer_chimie_recette
+from droidmemory import DroidMemory
+from droidrecherche import replier
+from droidregistre import registre_catalogues
+
+PORT_API = 8766
+
+# Recettes par requête /calculs au plus
+MAX_LOT = 1000
+
+LISTES_INGREDIENTS = ("corps_gras", "additifs", "he")
+
+
+class ErreurRequete(Exception):
+    """Requête refusée : statut HTTP et message renvoyé au client"""
+
+    def __init__(self, statut, message):
+        super().__init__(message)
+        self.statut = statut
+
+
+class Archive:
+    """Recettes archivées, relues seulement quand leur fichier change"""
+
+    def __init__(self, memory):
+        self.memory = memory
+        self.cache = {}
+        self.verrou = threading.Lock()
+
+    def lire(self, fichier):
+        if not fichier.endswith(".json") or fichier.startswith(".") or "/" in fichier or "\\" in fichier:
+            raise ErreurRequete(400, f"Nom de recette refusé : {fichier}")
+        try:
+            mtime = os.stat(self.memory.recipes_dir / fichier).st_mtime_ns
+        except OSError:
+            raise ErreurRequete(404, f"Recette inconnue : {fichier}")
+
+        with self.verrou:
+            entree = self.cache.get(fichier)
+        if entree and entree[0] == mtime:
+            return entree[1]
+        try:
+            recette = self.memory.charger_json(fichier)
+        except FileNotFoundError:
+            # Supprimée entre stat et lecture
+            raise ErreurRequete(404, f"Recette inconnue : {fichier}")
+        except (ValueError, OSError) as e:
+            raise ErreurRequete(422, f"Recette illisible : {fichier} ({e})")
+        if not isinstance(recette, dict):
+            raise ErreurRequete(422, f"Recette invalide : {fichier} (objet JSON attendu)")
+        with self.verrou:
+            self.cache[fichier] = (mtime, recette)
+        return recette
+
+    def chercher(self, requete="", ingredient="", limite=None):
+        """Résumés des recettes dont le nom contient tous les termes et qui utilisent l'ingrédient"""
+        termes = replier(requete).split()
+        ingredient = replier(ingredient)
+        fichiers = self.memory.lister_recettes()
+
+        with self.verrou:
+            for fichier in set(self.cache) - set(fichiers):
+                del self.cache[fichier]
+
+        resultats = []
+        for fichier in fichiers:
+            try:
+                recette = self.lire(fichier)
+            except ErreurRequete:
+                # Fichier illisible ou invalide : ignoré, le reste de l'archive répond
+                continue
+            nom = str(recette.get("nom_recette") or fichier)
+            if termes and not all(t in replier(nom) for t in termes):
+                continue
+            ingredients = [n for cle in LISTES_INGREDIENTS for n in recette.get(cle, {})]
+            if ingredient and not any(ingredient in replier(n) for n in ingredients):
+                continue
+            resultats.append({
+                "fichier": fichier,
+                "nom": nom,
+                "date": recette.get("date_creation"),
+                "ingredients": ingredients
+            })
+            if limite and len(resultats) >= limite:
+                break
+        return resultats
+
+
+class ApiSoapMaker:
+    """Moteur chimique et archive, sans interface (utilisé par ServeurApi)"""
+
+    def __init__(self, memory):
+        self.memory = memory
+        self.registre = registre_catalogues(memory)
+        self.archive = Archive(memory)
+
+    def calculer(self, recette, sap_values=None):
+        """Résultats d'une recette (None sans huiles)"""
+        if not isinstance(recette, dict):
+            raise ErreurRequete(400, "Une recette est un objet JSON")
+        try:
+            return calculer_chimie_recette(recette, sap_values or self.registre.courant().sap)
+        except (TypeError, ValueError, AttributeError) as e:
+            raise ErreurRequete(400, f"Recette invalide : {e}")
+
+    def calculer_lot(self, recettes):
+        """Un résultat ou une erreur par recette, dans l'ordre"""
+        if not isinstance(recettes, list):
+            raise ErreurRequete(400, "Attendu : une liste de recettes")
+        if len(recettes) > MAX_LOT:
+            raise ErreurRequete(413, f"{MAX_LOT} recettes par requête au plus")
+        sap_values = self.registre.courant().sap
+        reponses = []
+        for recette in recettes:
+            try:
+                reponses.append({"resultats": self.calculer(recette, sap_values)})
+            except ErreurRequete as e:
+                reponses.append({"erreur": str(e)})
+        return reponses
+
+    def pdf(self, fichier):
+        """Fiche PDF d'une recette archivée (générée dans exports/)"""
+        chemin = self.memory.generer_pdf_recette(self.archive.lire(fichier))
+        with open(chemin, "rb") as f:
+            return f.read()
+
+
+# --- SERVEUR HTTP ---
+
+class _GestionnaireApi(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # En-têtes et corps partent en deux écritures : sans ça, 40 ms par requête
+    disable_nagle_algorithm = True
+    api = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _repondre(self, statut, corps=b"", type_contenu="application/json"):
+        self.send_response(statut)
+        self.send_header("Content-Type", type_contenu)
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _json(self, statut, data):
+        self._repondre(statut, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    def _traiter(self, methode):
+        # Corps toujours lu : la connexion keep-alive reste utilisable après une erreur
+        try:
+            taille = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            # Corps de taille inconnue : impossible de le sauter, connexion fermée
+            self.close_connection = True
+            return self._json(400, {"erreur": "Content-Length invalide"})
+        corps = self.rfile.read(taille) if taille > 0 else b""
+        parsed = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        try:
+            if methode == "POST":
+                try:
+                    data = json.loads(corps or b"null")
+                except ValueError:
+                    raise ErreurRequete(400, "JSON invalide")
+                if parsed.path == "/calcul":
+                    return self._json(200, {"resultats": self.api.calculer(data)})
+                if parsed.path == "/calculs":
+                    if isinstance(data, dict):
+                        data = data.get("recettes")
+                    return self._json(200, self.api.calculer_lot(data))
+            elif parsed.path == "/recettes":
+                limite = int(params["limite"]) if params.get("limite", "").isdigit() else None
+                return self._json(200, self.api.archive.chercher(
+                    params.get("q", ""), params.get("ingredient", ""), limite
+                ))
+            elif parsed.path == "/recette":
+                return self._json(200, self.api.archive.lire(params.get("fichier", "")))
+            elif parsed.path == "/pdf":
+                return self._repondre(200, self.api.pdf(params.get("fichier", "")), "application/pdf")
+            raise ErreurRequete(404, f"{methode} {parsed.path} inconnu")
+        except ErreurRequete as e:
+            self._json(e.statut, {"erreur": str(e)})
+        except Exception as e:
+            print(f"⚠️ API {methode} {parsed.path} : {e}")
+            self._json(500, {"erreur": str(e)})
+
+    def do_GET(self):
+        self._traiter("GET")
+
+    def do_POST(self):
+        self._traiter("POST")
+
+
+class ServeurApi:
+    """
+    API HTTP/JSON locale (ERP, imprimante d'étiquettes) :
+    POST /calcul, POST /calculs, GET /recettes?q=&ingredient=&limite=,
+    GET /recette?fichier=, GET /pdf?fichier=
+    """
+
+    def __init__(self, memory, hote="127.0.0.1", port=PORT_API):
+        gestionnaire = type("GestionnaireApi", (_GestionnaireApi,), {"api": ApiSoapMaker(memory)})
+        self.serveur = ThreadingHTTPServer((hote, port), gestionnaire)
+        self.serveur.daemon_threads = True
+        self.thread = None
+
+    @property
+    def adresse(self):
+        hote, port = self.serveur.server_address[:2]
+        return f"http://{hote}:{port}"
+
+    def demarrer(self):
+        self.thread = threading.Thread(target=self.serveur.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def arreter(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+
+
+# --- MESURES ---
+
+def _recettes_aleatoires(huiles, nombre, graine=42):
+    import random
+
+    aleatoire = random.Random(graine)
+    noms = [h["nom"] for h in huiles if h.get("nom")] or ["Huile d'olive"]
+    return [
+        {
+            "nom_recette": f"Lot {n}",
+            "mode": "Poids",
+            "corps_gras": {nom: float(aleatoire.randint(50, 500)) for nom in aleatoire.sample(noms, min(4, len(noms)))},
+            "surgras": aleatoire.choice([5, 6, 8]),
+            "proportion_eau": 30,
+            "substitut_liquide": "Aucun",
+            "pourcentage_substitut": 0,
+            "additifs": {},
+            "he": {}
+        }
+        for n in range(nombre)
+    ]
+
+
+def mesurer_debit(requetes=4000, clients=4, lot=1, keep_alive=True):
+    """
+    `clients` threads envoient `requetes` calculs au total sur localhost
+    lot > 1 : `lot` recettes par requête /calculs
+    Retourne {"req_s", "recettes_s", "p50_ms", "p99_ms"}
+    """
+    import http.client
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    memory = DroidMemory()
+    serveur = ServeurApi(memory, port=0).demarrer()
+    hote, port = serveur.serveur.server_address[:2]
+    recettes = _recettes_aleatoires(registre_catalogues(memory).courant().huiles, 64)
+    if lot > 1:
+        chemin, corps = "/calculs", json.dumps(recettes[:lot]).encode("utf-8")
+    else:
+        chemin, corps = "/calcul", json.dumps(recettes[0]).encode("utf-8")
+    en_tetes = {"Content-Type": "application/json"}
+    if not keep_alive:
+        en_tetes["Connection"] = "close"
+
+    def client(nombre):
+        latences = []
+        connexion = None
+        for _ in range(nombre):
+            debut = time.perf_counter()
+            if connexion is None:
+                connexion = http.client.HTTPConnection(hote, port)
+            connexion.request("POST", chemin, body=corps, headers=en_tetes)
+            reponse = connexion.getresponse()
+            reponse.read()
+            if reponse.status != 200:
+                raise RuntimeError(f"HTTP {reponse.status}")
+            if not keep_alive:
+                connexion.close()
+                connexion = None
+            latences.append(time.perf_counter() - debut)
+        if connexion:
+            connexion.close()
+        return latences
+
+    try:
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            latences = sorted(l for part in pool.map(client, [requetes // clients] * clients) for l in part)
+        duree = time.perf_counter() - debut
+    finally:
+        serveur.arreter()
+
+    return {
+        "req_s": len(latences) / duree,
+        "recettes_s": len(latences) * max(1, lot) / duree,
+        "p50_ms": latences[len(latences) // 2] * 1000,
+        "p99_ms": latences[int(len(latences) * 0.99)] * 1000,
+    }
+
+
+if __name__ == "__main__":
+    # python droidapi.py [port]   -> API locale sur 127.0.0.1
+    # python droidapi.py --mesure -> débit et latences sur localhost
+    if "--mesure" in sys.argv:
+        for libelle, options in (
+            ("1 recette, nouvelle connexion", {"keep_alive": False}),
+            ("1 recette, keep-alive", {}),
+            ("lots de 50, keep-alive", {"lot": 50, "requetes": 400}),
+        ):
+            m = mesurer_debit(**options)
+            print(f"{libelle:<32}{m['req_s']:>8.0f} req/s{m['recettes_s']:>9.0f} recettes/s"
+                  f"   p50 {m['p50_ms']:.2f} ms   p99 {m['p99_ms']:.2f} ms")
+    else:
+        port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT_API
+        serveur = ServeurApi(DroidMemory(), port=port)
+        print(f"🔌 API SoapMaker sur {serveur.adresse}")
+        try:
+            serveur.serveur.serve_forever()
+        except KeyboardInterrupt:
+            serveur.arreter()
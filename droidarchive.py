@@ -0,0 +1,356 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+from droidchimie import calculer_chimie_recette, sap_depuis_catalogue
+from droidmemory import RESSOURCES, _ecrire_json, verrou_fichier
+
+
+FORMAT_ARCHIVE = "soapmaker-archive"
+VERSION_ARCHIVE = 1
+
+# Politiques de conflit (même nom, contenu différent)
+POLITIQUE_IGNORER = "ignorer"
+POLITIQUE_RENOMMER = "renommer"
+POLITIQUE_ECRASER = "ecraser"
+POLITIQUES = (POLITIQUE_IGNORER, POLITIQUE_RENOMMER, POLITIQUE_ECRASER)
+
+
+def empreinte_contenu(data):
+    """Hash stable d'un contenu JSON (indépendant de l'indentation)"""
+    canonique = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(canonique.encode("utf-8")).hexdigest()
+
+
+def _nom_fichier_sur(nom):
+    """Neutralise les chemins et caractères interdits venant d'une archive"""
+    nom = re.sub(r'[\\/*?:"<>|]', "", Path(str(nom).replace("\\", "/")).name)
+    if not nom.endswith(".json"):
+        nom += ".json"
+    return nom
+
+
+# --- EXPORT ---
+
+def _parcourir_archive(memory):
+    """Génère (type, nom, chemin) pour chaque fichier de l'archive"""
+    for fichier in RESSOURCES:
+        chemin = memory.resources_dir / fichier
+        if chemin.exists():
+            yield "ressource", fichier, chemin
+
+    with os.scandir(memory.recipes_dir) as it:
+        for entree in it:
+            if entree.name.endswith(".json") and entree.is_file():
+                yield "recette", entree.name, Path(entree.path)
+
+
+def exporter_archive(memory, chemin_sortie=None, fmt="zip"):
+    """
+    Exporte catalogues + recettes dans un seul fichier (zip ou jsonl)
+    Les fichiers sont lus un par un : la mémoire reste constante
+    """
+    if fmt not in ("zip", "jsonl"):
+        raise ValueError(f"Format d'archive inconnu : {fmt}")
+
+    if not chemin_sortie:
+        date_str = datetime.now().strftime("%Y%m%d_%H%M")
+        chemin_sortie = memory.exports_dir / f"SoapMaker_archive_{date_str}.{fmt}"
+    chemin_sortie = Path(chemin_sortie)
+
+    compteurs = {"recettes": 0, "ressources": 0}
+    entete = {"type": "entete", "format": FORMAT_ARCHIVE, "version": VERSION_ARCHIVE,
+              "date": datetime.now().strftime("%Y-%m-%d %H:%M")}
+
+    if fmt == "zip":
+        with zipfile.ZipFile(chemin_sortie, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("entete.json", json.dumps(entete, ensure_ascii=False))
+            for type_, nom, chemin in _parcourir_archive(memory):
+                dossier = "resources" if type_ == "ressource" else "recettes"
+                zf.write(chemin, f"{dossier}/{nom}")
+                compteurs[f"{type_}s"] += 1
+    else:
+        with open(chemin_sortie, "w", encoding="utf-8") as f:
+            f.write(json.dumps(entete, ensure_ascii=False) + "\n")
+            for type_, nom, chemin in _parcourir_archive(memory):
+                with open(chemin, "r", encoding="utf-8") as src:
+                    data = json.load(src)
+                ligne = {"type": type_, "nom": nom, "data": data}
+                f.write(json.dumps(ligne, ensure_ascii=False, separators=(",", ":")) + "\n")
+                compteurs[f"{type_}s"] += 1
+
+    return str(chemin_sortie), compteurs
+
+
+# --- IMPORT ---
+
+def _lire_zip(chemin):
+    """
+    Génère (type, nom, octets JSON) depuis une archive zip
+    Le décodage a lieu dans importer : une entrée corrompue n'arrête pas l'import
+    """
+    with zipfile.ZipFile(chemin, "r") as zf:
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.endswith(".json"):
+                continue
+            dossier, _, nom = info.filename.rpartition("/")
+            if dossier.endswith("resources"):
+                type_ = "ressource"
+            elif dossier.endswith("recettes"):
+                type_ = "recette"
+            else:
+                continue
+            yield type_, nom, zf.read(info)
+
+
+def _lire_jsonl(chemin):
+    """
+    Génère (type, nom, data) depuis une archive jsonl, ligne par ligne
+    Une ligne illisible est transmise brute (type None) : importer la rejette seule
+    """
+    with open(chemin, "r", encoding="utf-8") as f:
+        for numero, ligne in enumerate(f, 1):
+            ligne = ligne.strip()
+            if not ligne:
+                continue
+            try:
+                objet = json.loads(ligne)
+            except json.JSONDecodeError:
+                yield None, f"Ligne {numero}", ligne
+                continue
+            if not isinstance(objet, dict):
+                continue
+            if objet.get("type") in ("recette", "ressource"):
+                yield objet["type"], objet.get("nom", ""), objet.get("data", {})
+
+
+class ImportArchive:
+    """Import en flux d'une archive avec détection des doublons"""
+
+    def __init__(self, memory, politique=POLITIQUE_RENOMMER):
+        if politique not in POLITIQUES:
+            raise ValueError(f"Politique inconnue : {politique}")
+        self.memory = memory
+        self.politique = politique
+        self.rapport = {
+            "importees": 0, "doublons": 0, "ignorees": 0,
+            "renommees": 0, "ecrasees": 0, "ressources": 0, "erreurs": []
+        }
+        # Un seul listage du dossier, ensuite tout est en O(1) (plus un stat
+        # pour les noms absents : une autre session a pu les sauver depuis)
+        with os.scandir(memory.recipes_dir) as it:
+            self.noms_existants = {e.name for e in it if e.name.endswith(".json")}
+
+    def importer(self, chemin):
+        """Importe un fichier .zip ou .jsonl, retourne le rapport"""
+        chemin = Path(chemin)
+        lecteur = _lire_zip if chemin.suffix.lower() == ".zip" else _lire_jsonl
+
+        ressources = {}
+        for type_, nom, brut in lecteur(chemin):
+            try:
+                # Octets (zip) ou ligne illisible (jsonl) : décodés ici, entrée par entrée
+                data = json.loads(brut) if isinstance(brut, (bytes, str)) else brut
+                if type_ == "recette":
+                    self._importer_recette(nom, data)
+                elif nom in RESSOURCES:
+                    ressources[nom] = data
+            except Exception as e:
+                self.rapport["erreurs"].append(f"{nom} : {e}")
+
+        for nom, data in ressources.items():
+            self._fusionner_ressource(nom, data)
+
+        return self.rapport
+
+    def _existe(self, nom):
+        if nom in self.noms_existants:
+            return True
+        if (self.memory.recipes_dir / nom).exists():
+            self.noms_existants.add(nom)
+            return True
+        return False
+
+    def _ecrire(self, nom, data):
+        # Appelé sous le verrou du dossier : écriture atomique comme sauvegarder_recette
+        _ecrire_json(self.memory.recipes_dir / nom, data)
+        self.noms_existants.add(nom)
+
+    def _empreinte_existante(self, nom):
+        try:
+            return empreinte_contenu(self.memory.charger_json(nom))
+        except (OSError, ValueError):
+            return None
+
+    def _nom_libre(self, nom, empreinte):
+        """Premier X_n libre, ou None si une copie X_n a déjà ce contenu"""
+        base = nom[:-len(".json")]
+        compteur = 1
+        while self._existe(f"{base}_{compteur}.json"):
+            if self._empreinte_existante(f"{base}_{compteur}.json") == empreinte:
+                return None
+            compteur += 1
+        return f"{base}_{compteur}.json"
+
+    def _importer_recette(self, nom, data):
+        nom = _nom_fichier_sur(nom)
+
+        # Choix du nom et écriture sous le verrou de sauvegarder_recette : une
+        # sauvegarde concurrente (autre session ou processus) n'est pas écrasée
+        with verrou_fichier(self.memory.recipes_dir):
+            if not self._existe(nom):
+                self._ecrire(nom, data)
+                self.rapport["importees"] += 1
+                return
+
+            # Collision de nom : contenu identique = simple doublon
+            empreinte = empreinte_contenu(data)
+            if self._empreinte_existante(nom) == empreinte:
+                self.rapport["doublons"] += 1
+                return
+
+            if self.politique == POLITIQUE_IGNORER:
+                self.rapport["ignorees"] += 1
+            elif self.politique == POLITIQUE_ECRASER:
+                self._ecrire(nom, data)
+                self.rapport["ecrasees"] += 1
+            else:
+                # Réimporter la même archive ne recrée pas de copie X_n
+                libre = self._nom_libre(nom, empreinte)
+                if libre is None:
+                    self.rapport["doublons"] += 1
+                    return
+                self._ecrire(libre, data)
+                self.rapport["renommees"] += 1
+
+    def _fusionner_ressource(self, fichier, data):
+        """Fusionne un catalogue entrée par entrée, une seule écriture (sous verrou)"""
+        racine, cle = RESSOURCES[fichier]
+        entrants = data.get(racine, []) if isinstance(data, dict) else []
+
+        def fusionner(items):
+            index = {item.get(cle): i for i, item in enumerate(items)}
+            modifie = False
+            for item in entrants:
+                nom = item.get(cle)
+                if not nom:
+                    continue
+                if nom not in index:
+                    index[nom] = len(items)
+                    items.append(item)
+                elif empreinte_contenu(items[index[nom]]) == empreinte_contenu(item):
+                    continue
+                elif self.politique == POLITIQUE_ECRASER:
+                    items[index[nom]] = item
+                elif self.politique == POLITIQUE_RENOMMER:
+                    compteur = 2
+                    while f"{nom} ({compteur})" in index:
+                        compteur += 1
+                    renomme = dict(item, **{cle: f"{nom} ({compteur})"})
+                    index[renomme[cle]] = len(items)
+                    items.append(renomme)
+                else:
+                    continue
+                modifie = True
+                self.rapport["ressources"] += 1
+            return items if modifie else None
+
+        self.memory.mettre_a_jour_ressource(fichier, fusionner)
+
+
+def importer_archive(memory, chemin, politique=POLITIQUE_RENOMMER):
+    """Raccourci : importe une archive et retourne le rapport"""
+    return ImportArchive(memory, politique).importer(chemin)
+
+
+# --- EXPORT ANALYTIQUE (CSV) ---
+
+COLONNES_RECETTES = [
+    "fichier", "nom_recette", "date_creation", "mode", "surgras", "proportion_eau",
+    "substitut_liquide", "pourcentage_substitut", "poids_huiles", "poids_soude",
+    "poids_eau", "poids_substitut", "poids_liquide_total", "total_additifs", "total_he",
+    "total_frais", "total_cure", "volume", "recalcule"
+]
+
+COLONNES_INGREDIENTS = ["fichier", "nom_recette", "phase", "ingredient", "grammes"]
+
+
+def _arrondi(valeur, decimales=2):
+    try:
+        return round(float(valeur), decimales)
+    except (TypeError, ValueError):
+        return ""
+
+
+def exporter_csv_analyse(memory, dossier_sortie=None, sap_values=None, delimiteur=","):
+    """
+    Exporte deux tables CSV de toute l'archive :
+    - recettes : une ligne par recette (paramètres et totaux)
+    - ingrédients : format long recette x ingrédient x grammes
+    Les recettes sont lues une par une ; les résultats absents sont recalculés
+    """
+    dossier_sortie = Path(dossier_sortie) if dossier_sortie else memory.exports_dir
+    if sap_values is None:
+        data_huiles = memory.charger_json("huiles.json")
+        sap_values = sap_depuis_catalogue(data_huiles.get("huiles", []) if isinstance(data_huiles, dict) else [])
+
+    date_str = datetime.now().strftime("%Y%m%d_%H%M")
+    chemin_recettes = dossier_sortie / f"analyse_recettes_{date_str}.csv"
+    chemin_ingredients = dossier_sortie / f"analyse_ingredients_{date_str}.csv"
+    compteurs = {"recettes": 0, "lignes_ingredients": 0, "recalculees": 0, "erreurs": []}
+
+    # utf-8-sig : accents lisibles directement dans Excel
+    with open(chemin_recettes, "w", encoding="utf-8-sig", newline="") as f_rec, \
+            open(chemin_ingredients, "w", encoding="utf-8-sig", newline="") as f_ing:
+        w_rec = csv.writer(f_rec, delimiter=delimiteur)
+        w_ing = csv.writer(f_ing, delimiter=delimiteur)
+        w_rec.writerow(COLONNES_RECETTES)
+        w_ing.writerow(COLONNES_INGREDIENTS)
+
+        for fichier in memory.lister_recettes():
+            try:
+                recette = memory.charger_json(fichier)
+                res = recette.get("resultats")
+                recalcule = not res
+                if recalcule:
+                    res = calculer_chimie_recette(recette, sap_values) or {}
+                    compteurs["recalculees"] += 1
+            except Exception as e:
+                compteurs["erreurs"].append(f"{fichier} : {e}")
+                continue
+
+            nom = recette.get("nom_recette", "")
+            additifs = recette.get("additifs", {})
+            he = recette.get("he", {})
+
+            w_rec.writerow([
+                fichier, nom, recette.get("date_creation", ""), recette.get("mode", ""),
+                recette.get("surgras", ""), recette.get("proportion_eau", ""),
+                recette.get("substitut_liquide", "Aucun"), recette.get("pourcentage_substitut", 0),
+                _arrondi(res.get("poids_huiles")), _arrondi(res.get("poids_soude")),
+                _arrondi(res.get("poids_eau")), _arrondi(res.get("poids_substitut")),
+                _arrondi(res.get("poids_liquide_total")),
+                _arrondi(sum(additifs.values())), _arrondi(sum(he.values())),
+                _arrondi(res.get("total_frais")), _arrondi(res.get("total_cure")),
+                _arrondi(res.get("volume"), 0), int(recalcule)
+            ])
+            compteurs["recettes"] += 1
+
+            phases = [("corps_gras", res.get("detail_huiles_g", recette.get("corps_gras", {}))),
+                      ("additifs", additifs), ("he", he)]
+            for phase, items in phases:
+                for ingredient, grammes in items.items():
+                    w_ing.writerow([fichier, nom, phase, ingredient, _arrondi(grammes)])
+                    compteurs["lignes_ingredients"] += 1
+
+            sub = recette.get("substitut_liquide", "Aucun")
+            if sub != "Aucun" and res.get("poids_substitut"):
+                w_ing.writerow([fichier, nom, "substitut", sub, _arrondi(res["poids_substitut"])])
+                compteurs["lignes_ingredients"] += 1
+
+    return str(chemin_recettes), str(chemin_ingredients), compteurs
@@ -0,0 +1,338 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from functools import partial
+
+from droidchimie import calculer_chimie_recette, sap_depuis_catalogue
+from droidmemory import DroidMemory, RESSOURCES
+from droidrecherche import IndexRecherche
+
+# Tailles prédéfinies : (huiles, HE, recettes archivées)
+TAILLES = {
+    "petit": (100, 100, 100),
+    "moyen": (5000, 5000, 10000),
+    "grand": (50000, 50000, 100000),
+}
+
+# Opérations distinctes par scénario au plus (un PDF prend ~200 ms)
+ECHANTILLONS = {"calcul": 20000, "lister": 20, "charger": 2000, "sauvegarder": 500, "recherche": 500, "pdf": 10}
+
+# Chaque tour rejoue l'échantillon pendant au moins DUREE_TOUR s ; le meilleur
+# des TOURS est retenu (le bruit de la machine ne fait que ralentir)
+TOURS = 3
+DUREE_TOUR = 0.3
+
+# Pic mémoire : opérations rejouées sous tracemalloc (au plus 50 ou 1 s)
+OPERATIONS_MEMOIRE = 50
+DUREE_MEMOIRE = 1.0
+
+# Baisse de débit tolérée avant de signaler une régression (le p99, trop
+# sensible aux autres processus de la machine, est affiché sans être jugé)
+SEUIL_REGRESSION = 0.15
+
+# Paramètres du SaveData : à valeurs différentes, les débits ne se comparent pas
+SCENARIO_META = ("graine", "huiles", "he", "recettes")
+
+SCENARIOS = ("calcul", "lister", "charger", "sauvegarder", "index", "recherche", "pdf", "csv")
+
+_TYPES = ["Huile", "Beurre", "Macérat", "Cire", "Extrait"]
+_PLANTES = ["karité", "coco", "olive", "ricin", "argan", "jojoba", "lavande", "romarin", "amande",
+            "avocat", "cacao", "cupuaçu", "tournesol", "chanvre", "sésame", "néroli", "cèdre", "ylang"]
+_QUALITES = ["douceur", "dureté élevée", "mousse crémeuse", "nourrissant", "astringent", "apaisant", "longévité"]
+_PARFUMS = ["boisé", "floral", "hespéridé", "herbacé", "épicé"]
+
+
+# --- GÉNÉRATEUR ---
+
+def generer_catalogues(huiles=100, he=100, additifs=30, graine=42):
+    """Catalogues {fichier: données} au format de SaveData/resources (noms uniques)"""
+    alea = random.Random(graine)
+    return {
+        "huiles.json": {"huiles": [
+            {
+                "nom": f"{alea.choice(_TYPES)} de {alea.choice(_PLANTES)} {n}",
+                "sap_naoh": round(alea.uniform(0.120, 0.250), 3),
+                "recommande": f"{alea.randint(1, 20)}–{alea.randint(21, 60)} %",
+                "qualite": ", ".join(alea.sample(_QUALITES, 2)),
+                "mousse": alea.choice(["Crémeuse", "Abondante", "Faible"]),
+            }
+            for n in range(huiles)
+        ]},
+        "additifs.json": {"additifs": [
+            {
+                "Cat": "Liquide" if n % 5 == 0 else alea.choice(["Trace", "Poudre", "Argile"]),
+                "Additif": f"Additif {alea.choice(_PLANTES)} {n}",
+                "Propriété": ", ".join(alea.sample(_QUALITES, 2)),
+                "% conseillé": f"{alea.randint(1, 5)}%",
+            }
+            for n in range(additifs)
+        ]},
+        "addons_he.json": {"addons_he": [
+            {
+                "Nom": f"HE {alea.choice(_PLANTES)} {n}",
+                "Propriétés": ", ".join(alea.sample(_QUALITES, 2)),
+                "Toxicité": alea.choice("0123"),
+                "Parfum": alea.choice(_PARFUMS),
+            }
+            for n in range(he)
+        ]},
+    }
+
+
+def generer_recettes(catalogues, nombre, graine=42):
+    """Recettes façon SaveData/recettes/*.json (résultats et date compris), une à une"""
+    alea = random.Random(graine)
+    huiles = [h["nom"] for h in catalogues["huiles.json"]["huiles"]]
+    additifs = [a["Additif"] for a in catalogues["additifs.json"]["additifs"]]
+    liquides = [a["Additif"] for a in catalogues["additifs.json"]["additifs"] if a["Cat"] == "Liquide"]
+    he = [h["Nom"] for h in catalogues["addons_he.json"]["addons_he"]]
+    sap_values = sap_depuis_catalogue(catalogues["huiles.json"]["huiles"])
+    debut = datetime(2024, 1, 1)
+
+    for n in range(nombre):
+        mode = "Poids" if alea.random() < 0.8 else "%"
+        choisies = alea.sample(huiles, min(len(huiles), alea.randint(2, 6)))
+        if mode == "Poids":
+            corps_gras = {nom: float(alea.randint(5, 60) * 10) for nom in choisies}
+        else:
+            parts = [alea.randint(1, 10) for _ in choisies]
+            corps_gras = {nom: round(100 * p / sum(parts), 2) for nom, p in zip(choisies, parts)}
+        substitut = alea.choice(liquides) if liquides and alea.random() < 0.3 else "Aucun"
+        recette = {
+            "nom_recette": f"Recette {alea.choice(_PLANTES)} {n}",
+            "mode": mode,
+            "poids_total_desire": float(alea.choice([500, 1000, 1500])) if mode == "%" else 0.0,
+            "corps_gras": corps_gras,
+            "surgras": alea.choice([3, 5, 6, 8]),
+            "proportion_eau": alea.choice([28, 30, 33]),
+            "substitut_liquide": substitut,
+            "pourcentage_substitut": alea.choice([10, 20, 50]) if substitut != "Aucun" else 0,
+            "additifs": {nom: float(alea.randint(1, 30)) for nom in alea.sample(additifs, min(len(additifs), alea.randint(0, 2)))},
+            "he": {nom: float(alea.randint(1, 15)) for nom in alea.sample(he, min(len(he), alea.randint(0, 3)))},
+        }
+        recette["resultats"] = calculer_chimie_recette(recette, sap_values)
+        recette["date_creation"] = (debut + timedelta(minutes=37 * n)).strftime("%Y-%m-%d %H:%M")
+        yield recette
+
+
+def generer_savedata(base_dir, huiles=100, he=100, recettes=100, graine=42):
+    """Remplit un dossier SaveData : catalogues et archive (écriture directe, noms uniques)"""
+    memory = DroidMemory(differer_init=True, base_dir=base_dir)
+    memory.preparer_dossiers()
+    catalogues = generer_catalogues(huiles, he, graine=graine)
+    for fichier, data in catalogues.items():
+        memory.sauvegarder_ressource(fichier, data)
+    for n, recette in enumerate(generer_recettes(catalogues, recettes, graine)):
+        with open(memory.recipes_dir / f"Recette_{n:06d}.json", "w", encoding="utf-8") as f:
+            json.dump(recette, f, indent=4, ensure_ascii=False)
+    return memory, catalogues
+
+
+# --- MESURE ---
+
+def _centile(triees, fraction):
+    return triees[min(len(triees) - 1, int(len(triees) * fraction))]
+
+
+def mesurer(operations, elements=1):
+    """
+    operations : liste de fonctions sans argument (une opération chacune)
+    elements : éléments traités par opération (fichiers listés, recettes exportées...)
+    Retourne débit et centiles de latence (ms) du meilleur tour, et le pic
+    mémoire d'une opération (Kio)
+    """
+    tours = []
+    for _ in range(TOURS):
+        latences = []
+        debut = time.perf_counter()
+        while not latences or time.perf_counter() - debut < DUREE_TOUR:
+            for operation in operations:
+                t0 = time.perf_counter()
+                operation()
+                latences.append(time.perf_counter() - t0)
+        duree = time.perf_counter() - debut
+        tours.append((len(latences) / duree, sorted(latences)))
+    debit, triees = max(tours, key=lambda tour: tour[0])
+
+    pic = 0
+    tracemalloc.start()
+    try:
+        debut = time.perf_counter()
+        for operation in operations[:OPERATIONS_MEMOIRE]:
+            tracemalloc.reset_peak()
+            depart = tracemalloc.get_traced_memory()[0]
+            operation()
+            pic = max(pic, tracemalloc.get_traced_memory()[1] - depart)
+            if time.perf_counter() - debut > DUREE_MEMOIRE:
+                break
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "operations": len(triees),
+        "ops_s": debit,
+        "elements_s": debit * elements,
+        "p50_ms": _centile(triees, 0.50) * 1000,
+        "p90_ms": _centile(triees, 0.90) * 1000,
+        "p99_ms": _centile(triees, 0.99) * 1000,
+        "max_ms": triees[-1] * 1000,
+        "pic_kio": pic / 1024,
+    }
+
+
+def executer(huiles=100, he=100, recettes=100, graine=42, scenarios=SCENARIOS, journal=print):
+    """Génère un SaveData temporaire et mesure chaque scénario ; retourne le rapport complet"""
+    rapport = {
+        "meta": {
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "python": platform.python_version(),
+            "plateforme": platform.platform(),
+            "processeurs": os.cpu_count(),
+            "graine": graine,
+            "huiles": huiles, "he": he, "recettes": recettes,
+        },
+        "scenarios": {},
+    }
+    alea = random.Random(graine)
+
+    with tempfile.TemporaryDirectory() as dossier:
+        debut = time.perf_counter()
+        memory, catalogues = generer_savedata(dossier, huiles, he, recettes, graine)
+        journal(f"📦 SaveData généré en {time.perf_counter() - debut:.1f} s ({recettes} recettes)")
+        sap_values = sap_depuis_catalogue(catalogues["huiles.json"]["huiles"])
+        fichiers = memory.lister_recettes()
+        items_he = catalogues["addons_he.json"]["addons_he"]
+        index = IndexRecherche.depuis_catalogue("addons_he.json", items_he)
+
+        def echantillon(liste, cle):
+            return alea.sample(liste, min(len(liste), ECHANTILLONS[cle]))
+
+        def requetes(nombre):
+            noms = [item["Nom"] for item in alea.sample(items_he, min(len(items_he), nombre))]
+            # Préfixes, mots entiers et fautes de frappe, comme au clavier
+            return [nom.split()[1][:3] if i % 3 == 0 else nom.split()[1] if i % 3 == 1
+                    else nom.split()[1][:-2] + "x" for i, nom in enumerate(noms)]
+
+        preparations = {
+            "calcul": lambda: ([partial(calculer_chimie_recette, r, sap_values)
+                                for r in generer_recettes(catalogues, min(recettes, ECHANTILLONS["calcul"]), graine + 1)], 1),
+            "lister": lambda: ([memory.lister_recettes] * ECHANTILLONS["lister"], len(fichiers)),
+            "charger": lambda: ([partial(memory.charger_json, f) for f in echantillon(fichiers, "charger")], 1),
+            "sauvegarder": lambda: ([partial(sauvegarder_puis_supprimer, memory, r)
+                                     for r in generer_recettes(catalogues, ECHANTILLONS["sauvegarder"], graine + 2)], 1),
+            "index": lambda: ([partial(IndexRecherche.depuis_catalogue, "addons_he.json", items_he)] * 3, len(items_he)),
+            "recherche": lambda: ([partial(index.chercher, q) for q in requetes(ECHANTILLONS["recherche"])], 1),
+            "pdf": lambda: ([partial(memory.generer_pdf_recette, memory.charger_json(f), f[:-5])
+                             for f in echantillon(fichiers, "pdf")], 1),
+            "csv": lambda: ([partial(exporter_csv, memory, sap_values)], len(fichiers)),
+        }
+
+        for nom in scenarios:
+            operations, elements = preparations[nom]()
+            resultat = mesurer(operations, elements)
+            rapport["scenarios"][nom] = resultat
+            journal(f"  {nom:<12}{resultat['ops_s']:>10.0f} op/s{resultat['elements_s']:>11.0f} élém/s"
+                    f"   p50 {resultat['p50_ms']:8.3f}   p99 {resultat['p99_ms']:8.3f} ms"
+                    f"   pic {resultat['pic_kio']:8.0f} Kio")
+    return rapport
+
+
+def sauvegarder_puis_supprimer(memory, recette):
+    # L'archive ne grossit pas d'un tour à l'autre (sinon la recherche de nom libre s'allonge)
+    memory.supprimer_recette(memory.sauvegarder_recette(recette["nom_recette"], recette))
+
+
+def exporter_csv(memory, sap_values):
+    from droidarchive import exporter_csv_analyse
+
+    return exporter_csv_analyse(memory, sap_values=sap_values)
+
+
+# --- COMPARAISON ---
+
+def scenario_different(actuel, reference):
+    """Paramètres du SaveData qui diffèrent de la référence"""
+    return [cle for cle in SCENARIO_META
+            if actuel["meta"].get(cle) != reference.get("meta", {}).get(cle)]
+
+
+def comparer(actuel, reference, seuil=SEUIL_REGRESSION):
+    """
+    Compare deux rapports scénario par scénario
+    Retourne (lignes lisibles, scénarios dont le débit baisse de plus de `seuil`)
+    Sur un SaveData différent de la référence, les écarts sont affichés sans verdict
+    """
+    lignes = []
+    regressions = []
+    differents = scenario_different(actuel, reference)
+    if differents:
+        lignes.append(f"  ⚠️ Scénario différent de la référence : {', '.join(differents)} (pas de verdict)")
+    for nom, mesure in actuel["scenarios"].items():
+        base = reference.get("scenarios", {}).get(nom)
+        if not base:
+            lignes.append(f"  {nom:<12}(absent de la référence)")
+            continue
+        debit = mesure["elements_s"] / base["elements_s"] - 1 if base["elements_s"] else 0.0
+        p99 = mesure["p99_ms"] / base["p99_ms"] - 1 if base["p99_ms"] else 0.0
+        regression = debit < -seuil and not differents
+        if regression:
+            regressions.append(nom)
+        lignes.append(f"  {nom:<12}débit {debit:+7.1%}   p99 {p99:+7.1%}   pic "
+                      f"{mesure['pic_kio'] - base['pic_kio']:+8.0f} Kio{'   ⚠️ RÉGRESSION' if regression else ''}")
+    return lignes, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="droidbench.py",
+        description="Bancs de mesure SoapMaker sur un SaveData synthétique (graine fixe)"
+    )
+    parser.add_argument("--taille", choices=sorted(TAILLES), default="petit")
+    parser.add_argument("--huiles", type=int, help="huiles au catalogue (remplace --taille)")
+    parser.add_argument("--he", type=int, help="huiles essentielles au catalogue")
+    parser.add_argument("--recettes", type=int, help="recettes archivées")
+    parser.add_argument("--graine", type=int, default=42)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="liste séparée par des virgules")
+    parser.add_argument("--sortie", help="rapport JSON à écrire")
+    parser.add_argument("--reference", help="rapport JSON à comparer (code de sortie 1 si régression, 2 si SaveData différent)")
+    parser.add_argument("--seuil", type=float, default=SEUIL_REGRESSION)
+    args = parser.parse_args(argv)
+
+    huiles, he, recettes = TAILLES[args.taille]
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    inconnus = set(scenarios) - set(SCENARIOS)
+    if inconnus:
+        parser.error(f"scénarios inconnus : {', '.join(sorted(inconnus))}")
+
+    rapport = executer(
+        args.huiles or huiles, args.he or he, args.recettes or recettes,
+        args.graine, scenarios, journal=lambda texte: print(texte, file=sys.stderr)
+    )
+    texte = json.dumps(rapport, indent=2, ensure_ascii=False)
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            f.write(texte)
+    else:
+        print(texte)
+
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as f:
+            reference = json.load(f)
+        lignes, regressions = comparer(rapport, reference, args.seuil)
+        print("\n".join(lignes), file=sys.stderr)
+        # Référence inutilisable (autre taille ou graine) : code 2, pas un succès muet
+        if scenario_different(rapport, reference):
+            return 2
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
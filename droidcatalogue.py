@@ -0,0 +1,294 @@
+import csv
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+from droidmemory import RESSOURCES
+
+
+# Plage plausible d'un indice SAP NaOH (g de soude par g d'huile)
+SAP_MIN = 0.05
+SAP_MAX = 0.35
+
+# Rapport des masses molaires NaOH / KOH
+RATIO_NAOH_KOH = 40.0 / 56.1
+
+# Nombre de motifs de rejet conservés dans le rapport
+MAX_MOTIFS = 50
+
+# Type de ressource (formulaire de l'assistant) -> fichier catalogue
+TYPES_RESSOURCE = {
+    "Huile": "huiles.json",
+    "Additif": "additifs.json",
+    "HE": "addons_he.json",
+}
+
+
+def normaliser(texte):
+    """Minuscules, sans accents ni séparateurs : 'Dureté' -> 'durete'"""
+    texte = unicodedata.normalize("NFKD", str(texte))
+    texte = "".join(c for c in texte if not unicodedata.combining(c))
+    return re.sub(r"[\s_\-]+", "", texte.casefold())
+
+
+def cle_doublon(nom):
+    """Clé de dédoublonnage d'un nom d'ingrédient (casse, accents, espaces)"""
+    texte = unicodedata.normalize("NFKD", str(nom).replace("’", "'"))
+    texte = "".join(c for c in texte if not unicodedata.combining(c))
+    return " ".join(texte.casefold().split())
+
+
+# Colonnes acceptées (normalisées) -> clé du catalogue
+ALIAS_COLONNES = {
+    "huiles.json": {
+        "nom": ["nom", "name", "huile", "oil", "corpsgras"],
+        "sap_naoh": ["sapnaoh", "sap", "naoh"],
+        # L'indice de saponification est par définition en KOH
+        "sap_koh": ["sapkoh", "koh", "indicesap", "indicesaponification"],
+        "recommande": ["recommande", "%", "%recommande", "usage", "dosage"],
+        "qualite": ["qualite", "proprietes", "propriete", "notes", "description"],
+        "durete": ["durete", "hardness"],
+        "mousse": ["mousse", "lather", "qualitemousse"],
+    },
+    "additifs.json": {
+        "Additif": ["additif", "nom", "name"],
+        "Propriété": ["propriete", "proprietes", "notes", "description"],
+        "% conseillé": ["%conseille", "conseille", "recommande", "%", "dosage"],
+        "Cat": ["cat", "categorie", "type"],
+    },
+    "addons_he.json": {
+        "Nom": ["nom", "name", "he", "huileessentielle"],
+        "Propriétés": ["proprietes", "propriete", "notes", "description"],
+        "Toxicité": ["toxicite", "tox"],
+        "Parfum": ["parfum", "odeur", "scent"],
+    },
+}
+
+
+class ImportCatalogueInvalide(ValueError):
+    """Fichier fournisseur inexploitable (colonne du nom introuvable...)"""
+
+
+# Unité entre parenthèses ou crochets en fin d'en-tête : "SAP NaOH (mg/g)"
+MOTIF_UNITE = re.compile(r"\s*[(\[]([^)\]]*)[)\]]\s*$")
+
+
+def _table_colonnes(fichier, entetes):
+    """Associe chaque en-tête du fichier à une clé du catalogue"""
+    alias = {}
+    for cle, noms in ALIAS_COLONNES[fichier].items():
+        for nom in noms:
+            alias.setdefault(nom, cle)
+    table = {}
+    for entete in entetes:
+        cle = alias.get(normaliser(MOTIF_UNITE.sub("", str(entete))))
+        if cle and cle not in table.values():
+            table[entete] = cle
+    return table
+
+
+def unite_colonne(entete):
+    """'mg' (mg/g), 'g' (g/g) ou None si l'en-tête ne précise pas l'unité"""
+    m = MOTIF_UNITE.search(str(entete))
+    if not m:
+        return None
+    unite = normaliser(m.group(1))
+    if unite.startswith("mg"):
+        return "mg"
+    if unite.startswith("g"):
+        return "g"
+    return None
+
+
+# --- LECTURE EN FLUX ---
+
+def _lire_csv(chemin):
+    with open(chemin, "r", encoding="utf-8-sig", newline="") as f:
+        echantillon = f.read(4096)
+        f.seek(0)
+        try:
+            dialecte = csv.Sniffer().sniff(echantillon, delimiters=",;\t")
+        except csv.Error:
+            dialecte = csv.excel
+        lecteur = csv.DictReader(f, dialect=dialecte)
+        for ligne in lecteur:
+            # line_num : ligne du fichier (en-tête compris), comme dans le tableur
+            yield lecteur.line_num, ligne
+
+
+def _lire_jsonl(chemin):
+    with open(chemin, "r", encoding="utf-8") as f:
+        for numero, ligne in enumerate(f, 1):
+            ligne = ligne.strip()
+            if not ligne:
+                continue
+            try:
+                yield numero, json.loads(ligne)
+            except json.JSONDecodeError as e:
+                # Rejetée seule par importer_catalogue, comme une ligne non objet
+                yield numero, ValueError(f"JSON illisible ({e.msg}, colonne {e.colno})")
+
+
+def _lire_json(chemin, racine):
+    # Un tableau JSON ne se lit pas en flux avec la stdlib : préférer .jsonl
+    with open(chemin, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get(racine, next((v for v in data.values() if isinstance(v, list)), []))
+    if not isinstance(data, list):
+        raise ImportCatalogueInvalide(f"Liste d'ingrédients attendue, {type(data).__name__} trouvé")
+    yield from enumerate(data, 1)
+
+
+def lire_lignes(chemin, fichier):
+    """
+    Génère (numéro, ligne brute) d'un fichier CSV, JSONL ou JSON
+    Numéro : ligne du fichier (CSV, JSONL), rang de l'élément (JSON)
+    Ligne : dict attendu ; JSON peut donner autre chose (liste, nombre...),
+    et une ligne JSONL illisible arrive sous forme de ValueError
+    """
+    chemin = Path(chemin)
+    suffixe = chemin.suffix.lower()
+    if suffixe in (".csv", ".tsv", ".txt"):
+        return _lire_csv(chemin)
+    if suffixe == ".jsonl":
+        return _lire_jsonl(chemin)
+    return _lire_json(chemin, RESSOURCES[fichier][0])
+
+
+# --- VALIDATION ---
+
+def _convertir_sap(item, unites=None):
+    """
+    SAP NaOH (g/g) depuis sap_naoh ou sap_koh
+    unites : {clé: 'mg' | 'g' | None} lue dans les en-têtes (unite_colonne)
+    """
+    unites = unites or {}
+    brut = item.pop("sap_naoh", None)
+    koh = item.pop("sap_koh", None)
+    cle = "sap_naoh"
+    if brut in (None, "") and koh not in (None, ""):
+        brut, cle = koh, "sap_koh"
+
+    try:
+        sap = float(str(brut).replace(",", "."))
+    except (TypeError, ValueError):
+        raise ValueError(f"SAP illisible ({brut!r})")
+
+    unite = unites.get(cle)
+    if unite == "mg":
+        sap /= 1000
+    elif unite is None and sap > 1:
+        if cle == "sap_koh":
+            # Indice KOH sans unité : les fiches le donnent en mg KOH/g (ex : 190)
+            sap /= 1000
+        else:
+            # 135 ou 190 : mg NaOH/g ou indice KOH ? impossible à trancher
+            raise ValueError(f"SAP NaOH {brut} > 1 : préciser l'unité (ex : « SAP NaOH (mg/g) »)")
+    if cle == "sap_koh":
+        sap *= RATIO_NAOH_KOH
+
+    if not SAP_MIN <= sap <= SAP_MAX:
+        raise ValueError(f"SAP hors plage ({sap:.4f})")
+    return round(sap, 4)
+
+
+def valider_ligne(fichier, ligne, table, unites=None):
+    """Construit une entrée catalogue à partir d'une ligne brute"""
+    _, cle_nom = RESSOURCES[fichier]
+    item = {}
+    for entete, valeur in ligne.items():
+        cle = table.get(entete)
+        if cle is None or valeur is None:
+            continue
+        item[cle] = valeur.strip() if isinstance(valeur, str) else valeur
+
+    if not item.get(cle_nom):
+        raise ValueError("nom manquant")
+
+    if fichier == "huiles.json":
+        item["sap_naoh"] = _convertir_sap(item, unites)
+    elif fichier == "additifs.json":
+        item.setdefault("Cat", "Trace")
+    elif fichier == "addons_he.json":
+        item["Toxicité"] = str(item.get("Toxicité") or "0")
+    return item
+
+
+# --- IMPORT EN MASSE ---
+
+def importer_catalogue(memory, fichier, chemin_source, simulation=False):
+    """
+    Importe un catalogue fournisseur (CSV/JSONL/JSON) dans un catalogue local
+    - lecture en flux, dédoublonnage en O(1) par ligne (nom normalisé)
+    - une seule écriture du catalogue à la fin, fusionnée sous verrou avec
+      le fichier relu (ajouts concurrents d'autres sessions conservés)
+    Retourne le rapport d'import
+    """
+    if fichier not in RESSOURCES:
+        raise ImportCatalogueInvalide(f"Catalogue inconnu : {fichier}")
+    racine, cle_nom = RESSOURCES[fichier]
+
+    actuel = memory.charger_json(fichier)
+    existants = actuel.get(racine, []) if isinstance(actuel, dict) else []
+    vus = {cle_doublon(item.get(cle_nom, "")) for item in existants}
+    ajouts = []
+
+    rapport = {"lues": 0, "ajoutees": 0, "doublons": 0, "rejetees": 0, "motifs": []}
+    table = None
+    unites = {}
+    entetes_vues = set()
+
+    def rejeter(numero, motif):
+        rapport["rejetees"] += 1
+        if len(rapport["motifs"]) < MAX_MOTIFS:
+            rapport["motifs"].append(f"Ligne {numero} : {motif}")
+
+    for numero, ligne in lire_lignes(chemin_source, fichier):
+        rapport["lues"] += 1
+        if isinstance(ligne, ValueError):
+            rejeter(numero, ligne)
+            continue
+        if not isinstance(ligne, dict):
+            rejeter(numero, f"objet attendu, {type(ligne).__name__} reçu")
+            continue
+        if table is None:
+            table = _table_colonnes(fichier, ligne.keys())
+            entetes_vues.update(ligne.keys())
+            if cle_nom not in table.values():
+                raise ImportCatalogueInvalide(f"Aucune colonne de nom reconnue ({', '.join(ligne)})")
+            unites = {cle: unite_colonne(entete) for entete, cle in table.items()}
+        elif not entetes_vues.issuperset(ligne.keys()):
+            # JSON hétérogène : on complète la table au fil de l'eau
+            nouvelles = [e for e in ligne if e not in entetes_vues]
+            entetes_vues.update(nouvelles)
+            for entete, cle in _table_colonnes(fichier, nouvelles).items():
+                if cle not in table.values():
+                    table[entete] = cle
+                    unites[cle] = unite_colonne(entete)
+
+        try:
+            item = valider_ligne(fichier, ligne, table, unites)
+        except ValueError as e:
+            rejeter(numero, e)
+            continue
+
+        cle = cle_doublon(item[cle_nom])
+        if cle in vus:
+            rapport["doublons"] += 1
+            continue
+        vus.add(cle)
+        ajouts.append(item)
+        rapport["ajoutees"] += 1
+
+    def fusionner(items):
+        deja = {cle_doublon(item.get(cle_nom, "")) for item in items}
+        nouveaux = [item for item in ajouts if cle_doublon(item[cle_nom]) not in deja]
+        rapport["doublons"] += len(ajouts) - len(nouveaux)
+        rapport["ajoutees"] = len(nouveaux)
+        return items + nouveaux if nouveaux else None
+
+    if ajouts and not simulation:
+        memory.mettre_a_jour_ressource(fichier, fusionner)
+    return rapport
@@ -0,0 +1,452 @@
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+# Machine sans écran ni carte son : pygame joue dans le vide
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import flet as ft
+from flet_core.control_event import ControlEvent
+from flet_core.event_handler import EventHandler
+
+from droidtrafic import page_enregistreuse
+
+# Hausse tolérée avant de signaler une régression : latence médiane (bruitée)
+# et trafic par action (déterministe à graine égale)
+SEUIL_LATENCE = 0.30
+SEUIL_TRAFIC = 0.05
+SEUIL_MEMOIRE = 0.30
+# Hausse de médiane inférieure à ce plancher (ms) : bruit d'ordonnanceur
+PLANCHER_LATENCE_MS = 2.0
+# Médiane jugée seulement sur assez d'échantillons (frappes, glissements...)
+ECHANTILLONS_LATENCE = 20
+
+# Données d'un clic sur un Container, comme les envoie le client
+TOUCHER = json.dumps({"lx": 10, "ly": 10, "gx": 10, "gy": 10})
+
+
+def _ecoute(controle, nom):
+    """Vrai si un gestionnaire est branché (Container enveloppe toujours le sien)"""
+    enveloppe = getattr(controle, f"on_{nom}", None)
+    if isinstance(enveloppe, EventHandler):
+        return enveloppe.count() > 0
+    return bool(controle.event_handlers.get(nom))
+
+
+class _PageSynchrone:
+    """La page vue des gestionnaires : run_thread appelle dans le thread du pilote"""
+
+    def __init__(self, page):
+        self._page = page
+
+    def run_thread(self, gestionnaire, *args):
+        gestionnaire(*args)
+
+    def __getattr__(self, nom):
+        return getattr(self._page, nom)
+
+
+class Pilote:
+    """
+    Joue le client Flet sur une page enregistreuse : chaque saisie, clic ou
+    glissement arrive comme depuis le navigateur (valeur reçue, puis
+    gestionnaire du contrôle appelé) ; chaque action est chronométrée
+    jusqu'à l'envoi de ses mises à jour
+    """
+
+    def __init__(self, app, connexion):
+        self.app = app
+        self.page = app.page
+        self.connexion = connexion
+        self.vue = _PageSynchrone(self.page)
+        # action -> [(ms, envois, octets)]
+        self.mesures = {}
+
+    # --- CONTRÔLES ---
+
+    def _visibles(self, racine):
+        pile = [racine]
+        while pile:
+            controle = pile.pop()
+            if controle.visible is False or getattr(controle, "open", True) is False:
+                continue
+            yield controle
+            pile.extend(reversed(controle._get_children()))
+
+    def _racines(self):
+        return list(self.page.overlay) + list(self.page.controls)
+
+    def trouver(self, texte=None, icone=None, dans=None):
+        """
+        Premier contrôle cliquable affiché dont le libellé (ou celui d'un
+        descendant) contient `texte`, ou qui porte l'icône `icone`
+        """
+        for racine in ([dans] if dans is not None else self._racines()):
+            for controle in self._visibles(racine):
+                if not _ecoute(controle, "click"):
+                    continue
+                if icone is not None and getattr(controle, "icon", None) == icone:
+                    return controle
+                if texte is not None and any(texte in libelle for libelle in self._libelles(controle)):
+                    return controle
+        raise LookupError(f"Aucun contrôle cliquable affiché : {texte or icone}")
+
+    def _libelles(self, controle):
+        for c in self._visibles(controle):
+            for attribut in ("text", "value"):
+                valeur = getattr(c, attribut, None)
+                if isinstance(valeur, str):
+                    yield valeur
+
+    def parent(self, enfant):
+        """Contrôle affiché qui contient directement `enfant`"""
+        for racine in self._racines():
+            for controle in self._visibles(racine):
+                if any(c is enfant for c in controle._get_children()):
+                    return controle
+        raise LookupError("Contrôle absent de la page")
+
+    def evenement(self, controle, nom, valeur=None, donnees=None):
+        """Événement client : nouvelle valeur (comme un 'page change') puis gestionnaire"""
+        if valeur is not None:
+            controle._set_attr("value", valeur, dirty=False)
+        gestionnaire = controle.event_handlers.get(nom)
+        if gestionnaire is None:
+            if nom == "change":
+                # Sans on_change (RadioGroup de la mémoire...) : la valeur seule change
+                return
+            raise LookupError(f"Pas de gestionnaire '{nom}' sur {controle._get_control_name()}")
+        if donnees is None:
+            donnees = "" if valeur is None else str(valeur)
+        resultat = gestionnaire(ControlEvent(controle.uid, nom, donnees, controle, self.vue))
+        if asyncio.iscoroutine(resultat):
+            # Enveloppe EventHandler de Flet : sans gestionnaire async, elle
+            # termine au premier pas (run_thread de la vue appelle tout de suite)
+            try:
+                resultat.send(None)
+            except StopIteration:
+                return
+            resultat.close()
+            raise RuntimeError(f"Gestionnaire '{nom}' asynchrone : non pris en charge")
+
+    # --- ACTIONS MESURÉES ---
+
+    def action(self, nom, fonction, *args):
+        envois, octets = self.connexion.envois, self.connexion.octets
+        debut = time.perf_counter()
+        fonction(*args)
+        self.app.maj.vider()
+        ms = (time.perf_counter() - debut) * 1000
+        self.mesures.setdefault(nom, []).append(
+            (ms, self.connexion.envois - envois, self.connexion.octets - octets)
+        )
+
+    def cliquer(self, nom, controle):
+        # Un Container reçoit la position du toucher, un bouton rien
+        donnees = TOUCHER if isinstance(controle, ft.Container) else ""
+        self.action(nom, self.evenement, controle, "click", None, donnees)
+
+    def saisir(self, nom, champ, texte, depuis=0):
+        """Frappe touche par touche (un on_change par caractère)"""
+        for i in range(depuis + 1, len(texte) + 1):
+            self.action(nom, self.evenement, champ, "change", texte[:i])
+
+    def glisser(self, nom, curseur, valeurs):
+        """Curseur déplacé : un on_change par position"""
+        for valeur in valeurs:
+            self.action(nom, self.evenement, curseur, "change", valeur)
+
+    def choisir(self, prefixe, selecteur, nom):
+        """
+        Tape le nom dans un SelecteurRecherche jusqu'à le voir parmi les
+        résultats, puis le clique (tapé en entier, il est sélectionné seul)
+        """
+        for i in range(1, len(nom) + 1):
+            self.saisir(f"frappe_{prefixe}", selecteur.champ, nom[:i], depuis=i - 1)
+            for bouton in selecteur.boutons:
+                if bouton.visible and bouton.text == nom:
+                    return self.cliquer(f"resultat_{prefixe}", bouton)
+
+
+def session_type(pilote, alea, huiles=20, he=3, pdf=True):
+    """
+    Session réaliste : 20 huiles cherchées et dosées, curseurs de la
+    fenêtre 2, huiles essentielles, archivage puis export PDF depuis l'assistant
+    """
+    app = pilote.app
+    nom_recette = f"Charge {alea.randrange(10 ** 9)}"
+    pilote.saisir("frappe_nom", app.entry_nom, nom_recette)
+
+    ajout = pilote.trouver(icone=ft.icons.ADD_CIRCLE)
+    for nom in alea.sample([h["nom"] for h in app.db_huiles], min(huiles, len(app.db_huiles))):
+        pilote.choisir("huile", app.choix_huile, nom)
+        pilote.cliquer("ajouter_huile", ajout)
+    for nom, ligne in list(app.lignes["corps_gras"].items()):
+        pilote.saisir("frappe_quantite", ligne["champ"], str(alea.randint(20, 300)))
+    pilote.cliquer("fenetre_2", pilote.trouver("SUIVANT"))
+
+    pilote.glisser("glisser_surgras", app.slider_surgras, [4, 5, 6, 7, 8])
+    pilote.glisser("glisser_eau", app.slider_eau, [29, 30, 31, 32, 33])
+    liquides = [o.key for o in app.combo_sub.options if o.key != "Aucun"]
+    if liquides:
+        pilote.action("substitut", pilote.evenement, app.combo_sub, "change", alea.choice(liquides))
+        pilote.glisser("glisser_substitut", app.slider_pct_sub, list(range(5, 55, 5)))
+    pilote.cliquer("fenetre_3", pilote.trouver("EPISODE 3"))
+
+    selecteur = app.cartouches["he"][0]
+    ajout_he = pilote.trouver(icone=ft.icons.ADD_CIRCLE, dans=pilote.parent(selecteur.controle))
+    for nom in alea.sample([h["Nom"] for h in app.db_he], min(he, len(app.db_he))):
+        pilote.choisir("he", selecteur, nom)
+        pilote.cliquer("ajouter_he", ajout_he)
+    for nom, ligne in list(app.lignes["he"].items()):
+        pilote.saisir("frappe_quantite_he", ligne["champ"], str(alea.randint(1, 9)))
+    pilote.cliquer("fenetre_4", pilote.trouver("CALCULER"))
+
+    pilote.cliquer("archiver", pilote.trouver("ARCHIVER"))
+    if pdf:
+        pilote.cliquer("assistant", pilote.trouver("DROID ASSISTANT"))
+        fichier = next(f for f in app.fichiers_memoire if f.startswith(nom_recette.replace(" ", "_")))
+        pilote.action("selection_recette", pilote.evenement, app.content_memoire, "change", fichier)
+        pilote.cliquer("ouvrir_export", pilote.trouver("EXPORTER"))
+        pilote.cliquer("export_pdf", pilote.trouver("PDF"))
+        pilote.cliquer("retour_laboratoire", pilote.trouver("RETOUR AU LABORATOIRE"))
+
+
+# --- EXÉCUTION ---
+
+def rss_kio():
+    """Mémoire résidente du processus (Kio) ; pic à défaut de /proc"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def executer_session(numero, dossier, graine, huiles, he, pdf):
+    """Une session complète sur sa propre page ; retourne (mesures, erreur)"""
+    from main import SoapMakerApp
+
+    boucle = asyncio.new_event_loop()
+    app = None
+    try:
+        page, connexion = page_enregistreuse(boucle)
+        app = SoapMakerApp(page, dossier=dossier)
+        pilote = Pilote(app, connexion)
+        session_type(pilote, random.Random(graine * 100003 + numero), huiles, he, pdf)
+        return pilote.mesures, None
+    except Exception as e:
+        if os.environ.get("DROIDCHARGE_TRACE"):
+            import traceback
+
+            traceback.print_exc()
+        return {}, f"session {numero} : {type(e).__name__}: {e}"
+    finally:
+        # Sans ça, le minuteur du dernier message garde la session ~3 s en
+        # mémoire : le RSS de fin de vague compterait des sessions finies
+        if app is not None:
+            app.terminer()
+        boucle.close()
+
+
+def _vague(numeros, threads, dossier, graine, huiles, he, pdf):
+    """Sessions d'une vague dans ce processus, `threads` à la fois"""
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        resultats = list(pool.map(
+            lambda n: executer_session(n, dossier, graine, huiles, he, pdf), numeros
+        ))
+    gc.collect()
+    return resultats, rss_kio()
+
+
+def _processus(numeros_par_vague, threads, dossier, graine, huiles, he, pdf):
+    """Un processus : ses sessions vague après vague ; RSS relevé après chacune"""
+    depart = rss_kio()
+    resultats, rss = [], []
+    for numeros in numeros_par_vague:
+        vague, apres = _vague(numeros, threads, dossier, graine, huiles, he, pdf)
+        resultats.extend(vague)
+        rss.append(apres - depart)
+    return resultats, rss
+
+
+def lancer_charge(sessions=8, threads=4, processus=1, vagues=2, huiles=20, he=3, pdf=True,
+                  graine=42, catalogue=(300, 100), journal=print):
+    """
+    `vagues` vagues de `sessions` sessions, réparties sur `processus`
+    processus de `threads` threads, sur un SaveData synthétique temporaire
+    Retourne le rapport (latence et trafic par action, mémoire par vague)
+    """
+    from droidbench import generer_savedata
+
+    with tempfile.TemporaryDirectory() as dossier:
+        generer_savedata(dossier, huiles=catalogue[0], he=catalogue[1], recettes=20, graine=graine)
+        processus = max(1, processus)
+        repartition = [
+            [[v * sessions + n for n in range(sessions) if n % processus == p] for v in range(vagues)]
+            for p in range(processus)
+        ]
+        arguments = (threads, dossier, graine, huiles, he, pdf)
+
+        debut = time.perf_counter()
+        if processus == 1:
+            parts = [_processus(repartition[0], *arguments)]
+        else:
+            with ProcessPoolExecutor(max_workers=processus) as pool:
+                parts = list(pool.map(_processus, repartition, *[[a] * processus for a in arguments]))
+        duree = time.perf_counter() - debut
+
+    mesures, erreurs = {}, []
+    for resultats, _ in parts:
+        for par_action, erreur in resultats:
+            if erreur:
+                erreurs.append(erreur)
+            for nom, valeurs in par_action.items():
+                mesures.setdefault(nom, []).extend(valeurs)
+    for erreur in erreurs:
+        journal(f"❌ {erreur}")
+
+    # RSS gagné après chaque vague, tous processus confondus
+    rss = [sum(part[1][v] for part in parts) for v in range(vagues)]
+    par_processus = max(1, -(-sessions // processus))
+    return {
+        "meta": {
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "python": platform.python_version(),
+            "plateforme": platform.platform(),
+            "processeurs": os.cpu_count(),
+            "graine": graine, "sessions": sessions, "vagues": vagues, "threads": threads,
+            "processus": processus, "huiles": huiles, "he": he, "pdf": pdf,
+        },
+        "sessions": {"total": sessions * vagues, "erreurs": len(erreurs), "s": duree},
+        "actions": {nom: resumer(valeurs) for nom, valeurs in sorted(mesures.items())},
+        "memoire": {
+            "rss_vagues_kio": rss,
+            # Après la première vague (imports, catalogues, polices) : ce qui reste par session
+            "croissance_kio_par_session": (rss[-1] - rss[0]) / (sessions * (vagues - 1)) if vagues > 1 else None,
+            "premiere_vague_kio_par_session": rss[0] / par_processus / processus if rss else None,
+        },
+    }
+
+
+def resumer(valeurs):
+    latences = sorted(v[0] for v in valeurs)
+    n = len(latences)
+    return {
+        "actions": n,
+        "p50_ms": latences[n // 2],
+        "p95_ms": latences[min(n - 1, int(n * 0.95))],
+        "p99_ms": latences[min(n - 1, int(n * 0.99))],
+        "max_ms": latences[-1],
+        "envois": sum(v[1] for v in valeurs) / n,
+        "octets": sum(v[2] for v in valeurs) / n,
+    }
+
+
+def comparer(actuel, reference, seuil_latence=SEUIL_LATENCE, seuil_trafic=SEUIL_TRAFIC):
+    """
+    Compare deux rapports action par action
+    Retourne (lignes lisibles, régressions : latence médiane, envois ou
+    octets par action en hausse au-delà des seuils, mémoire qui grossit)
+    """
+    lignes, regressions = [], []
+    # Le trafic moyen dépend du scénario : à paramètres différents, écarts attendus
+    scenario = ("graine", "sessions", "vagues", "huiles", "he", "pdf")
+    differents = [cle for cle in scenario
+                  if actuel["meta"].get(cle) != reference.get("meta", {}).get(cle)]
+    if differents:
+        lignes.append(f"  ⚠️ Scénario différent de la référence : {', '.join(differents)}")
+    for nom, mesure in actuel["actions"].items():
+        base = reference.get("actions", {}).get(nom)
+        if not base:
+            lignes.append(f"  {nom:<22}(absente de la référence)")
+            continue
+        ecarts = {
+            cle: (mesure[cle] / base[cle] - 1) if base[cle] else (1.0 if mesure[cle] else 0.0)
+            for cle in ("p50_ms", "envois", "octets")
+        }
+        motifs = [cle for cle, seuil in (("p50_ms", seuil_latence), ("envois", seuil_trafic), ("octets", seuil_trafic))
+                  if ecarts[cle] > seuil]
+        if "p50_ms" in motifs and (mesure["actions"] < ECHANTILLONS_LATENCE
+                                   or mesure["p50_ms"] - base["p50_ms"] < PLANCHER_LATENCE_MS):
+            motifs.remove("p50_ms")
+        if motifs:
+            regressions.append(f"{nom} ({', '.join(motifs)})")
+        lignes.append(f"  {nom:<22}p50 {ecarts['p50_ms']:+7.1%}   envois {ecarts['envois']:+7.1%}   "
+                      f"octets {ecarts['octets']:+7.1%}{'   ⚠️ RÉGRESSION' if motifs else ''}")
+
+    croissance = actuel["memoire"]["croissance_kio_par_session"]
+    base = reference.get("memoire", {}).get("croissance_kio_par_session")
+    if croissance is not None and base is not None:
+        # Quelques dizaines de Kio de bruit (allocateur) même sans fuite
+        if croissance > max(base * (1 + SEUIL_MEMOIRE), base + 64):
+            regressions.append("mémoire par session")
+        lignes.append(f"  {'mémoire/session':<22}{base:.0f} → {croissance:.0f} Kio")
+    return lignes, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="droidcharge.py",
+        description="Sessions SoapMaker scriptées sans écran (page Flet enregistreuse)"
+    )
+    parser.add_argument("--sessions", type=int, default=8, help="sessions par vague")
+    parser.add_argument("--vagues", type=int, default=2, help="vagues successives (la 2e révèle les fuites)")
+    parser.add_argument("--threads", type=int, default=4, help="sessions simultanées par processus")
+    parser.add_argument("-j", "--processus", type=int, default=1)
+    parser.add_argument("--huiles", type=int, default=20, help="huiles ajoutées par session")
+    parser.add_argument("--he", type=int, default=3, help="huiles essentielles ajoutées par session")
+    parser.add_argument("--sans-pdf", action="store_true", help="pas d'export PDF en fin de session")
+    parser.add_argument("--graine", type=int, default=42)
+    parser.add_argument("--sortie", help="rapport JSON à écrire")
+    parser.add_argument("--reference", help="rapport JSON à comparer (code de sortie 1 si régression)")
+    args = parser.parse_args(argv)
+
+    journal = lambda texte: print(texte, file=sys.stderr)
+    rapport = lancer_charge(
+        args.sessions, args.threads, args.processus, args.vagues, args.huiles, args.he,
+        not args.sans_pdf, args.graine, journal=journal
+    )
+
+    s = rapport["sessions"]
+    journal(f"{s['total']} sessions en {s['s']:.1f} s ({s['erreurs']} en erreur)")
+    journal(f"{'action':<22}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  ms{'envois':>8}{'octets':>9}")
+    for nom, r in rapport["actions"].items():
+        journal(f"{nom:<22}{r['actions']:>6}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}"
+                f"{r['max_ms']:>9.1f}    {r['envois']:>6.2f}{r['octets']:>9.0f}")
+    m = rapport["memoire"]
+    journal(f"RSS après chaque vague : {', '.join(f'+{k / 1024:.1f} Mio' for k in m['rss_vagues_kio'])}"
+            + (f" ; {m['croissance_kio_par_session']:.0f} Kio gardés par session ensuite"
+               if m["croissance_kio_par_session"] is not None else ""))
+
+    texte = json.dumps(rapport, indent=2, ensure_ascii=False)
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            f.write(texte)
+    else:
+        print(texte)
+
+    code = 1 if s["erreurs"] else 0
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as f:
+            lignes, regressions = comparer(rapport, json.load(f))
+        journal("\n".join(lignes))
+        if regressions:
+            journal(f"⚠️ Régressions : {', '.join(regressions)}")
+            code = 1
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+# SAP par défaut si une huile est absente du catalogue
+SAP_DEFAUT = 0.135
+
+
+def sap_depuis_catalogue(db_huiles):
+    """Table nom -> SAP NaOH à partir du catalogue des huiles"""
+    return {h["nom"]: h["sap_naoh"] for h in db_huiles}
+
+
+def obtenir_poids_huiles(recette):
+    """Retourne le poids total des huiles selon le mode"""
+    if recette.get("mode") == "Poids":
+        return float(sum(recette.get("corps_gras", {}).values()))
+
+    cible = float(recette.get("poids_total_desire", 0))
+    taux_eau = recette.get("proportion_eau", 30) / 100
+    return cible / (1 + taux_eau + 0.2)
+
+
+def poids_par_huile(recette, ph):
+    """Poids de chaque huile (g) pour un poids total d'huiles ph"""
+    cg = recette.get("corps_gras", {})
+    if recette.get("mode") == "Poids":
+        return dict(cg)
+    return {nom: (pct/100) * ph for nom, pct in cg.items()}
+
+
+def poids_soude(detail_g, surgras, sap_values):
+    """NaOH nécessaire, surgraissage déduit"""
+    naoh = 0
+    for nom, poids in detail_g.items():
+        sap = sap_values.get(nom, SAP_DEFAUT)
+        naoh += poids * sap
+    return naoh * (1 - float(surgras)/100)
+
+
+def phase_liquide(recette, ph):
+    """Liquide total, eau et substitut (g)"""
+    conc_eau = float(recette.get("proportion_eau", 30))
+    liq_total = ph * (conc_eau / 100)
+
+    sub_nom = recette.get("substitut_liquide", "Aucun")
+    pct_sub = float(recette.get("pourcentage_substitut", 0))
+    liq_sub = liq_total * (pct_sub / 100) if sub_nom != "Aucun" else 0
+    return {
+        "poids_liquide_total": liq_total,
+        "poids_eau": liq_total - liq_sub,
+        "poids_substitut": liq_sub
+    }
+
+
+def bilan_recette(ph, detail_g, naoh, liquides, total_add, total_he):
+    """Assemble le résultat complet à partir des grandeurs intermédiaires"""
+    liq_total = liquides["poids_liquide_total"]
+
+    # Totaux
+    pate_fraiche = ph + naoh + liq_total + total_add + total_he
+    apres_cure = pate_fraiche - (liq_total * 0.4)
+    volume = pate_fraiche * 0.95
+
+    return {
+        "poids_huiles": ph,
+        "detail_huiles_g": detail_g,
+        "poids_soude": naoh,
+        "poids_liquide_total": liq_total,
+        "poids_eau": liquides["poids_eau"],
+        "poids_substitut": liquides["poids_substitut"],
+        "total_frais": pate_fraiche,
+        "total_cure": apres_cure,
+        "volume": volume
+    }
+
+
+def calculer_chimie_recette(data, sap_values):
+    """Moteur de calcul chimique"""
+    ph = obtenir_poids_huiles(data)
+
+    if ph == 0:
+        return None
+
+    detail_g = poids_par_huile(data, ph)
+    naoh = poids_soude(detail_g, data.get("surgras", 5), sap_values)
+
+    # Ajouts
+    total_add = sum(data.get("additifs", {}).values())
+    total_he = sum(data.get("he", {}).values())
+
+    return bilan_recette(ph, detail_g, naoh, phase_liquide(data, ph), total_add, total_he)
@@ -0,0 +1,273 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from droidchimie import calculer_chimie_recette
+from droidinstruments import instruments
+from droidmemory import DroidMemory
+
+# Ligne de commande sans interface : ni flet ni pygame ne sont importés
+# (démarrage rapide sur un serveur sans écran, tâches planifiées)
+
+# Recettes confiées à un processus à la fois
+TAILLE_PAQUET = 500
+
+# Catalogue visé par `import --catalogue`
+CATALOGUES = {"huiles": "huiles.json", "additifs": "additifs.json", "he": "addons_he.json"}
+
+# État d'un processus de travail (posé par _initialiser)
+_contexte = {}
+
+
+def _initialiser(contexte):
+    _contexte.update(contexte)
+
+
+def traiter_en_parallele(fonction, paquets, processus, contexte):
+    """
+    fonction(paquet) -> (lignes, erreurs) sur `processus` cœurs ; résultats dans
+    l'ordre, au fil de l'eau (au plus deux paquets d'avance par processus)
+    """
+    if processus <= 1:
+        _initialiser(contexte)
+        for paquet in paquets:
+            yield fonction(paquet)
+        return
+
+    with ProcessPoolExecutor(processus, initializer=_initialiser, initargs=(contexte,)) as pool:
+        en_vol = deque()
+        for paquet in paquets:
+            en_vol.append(pool.submit(fonction, paquet))
+            if len(en_vol) >= 2 * processus:
+                yield en_vol.popleft().result()
+        while en_vol:
+            yield en_vol.popleft().result()
+
+
+def _paquets(entrees, taille=TAILLE_PAQUET):
+    paquet = []
+    for entree in entrees:
+        paquet.append(entree)
+        if len(paquet) >= taille:
+            yield paquet
+            paquet = []
+    if paquet:
+        yield paquet
+
+
+# --- CALCUL ---
+
+def calculer_ligne(source, texte, sap_values):
+    """Sortie JSONL d'une recette : résultats, ou l'erreur"""
+    try:
+        recette = json.loads(texte)
+        if not isinstance(recette, dict):
+            raise ValueError("une recette est un objet JSON")
+        return {
+            "source": source,
+            "nom": recette.get("nom_recette"),
+            "resultats": calculer_chimie_recette(recette, sap_values)
+        }
+    except (TypeError, ValueError, AttributeError) as e:
+        return {"source": source, "erreur": str(e)}
+
+
+def _calculer_paquet(paquet):
+    sorties = [calculer_ligne(source, texte, _contexte["sap"]) for source, texte in paquet]
+    return [json.dumps(s, ensure_ascii=False) for s in sorties], sum("erreur" in s for s in sorties)
+
+
+def _entrees(memory, fichiers, archive):
+    """(source, texte JSON) : archive, fichiers .json, fichiers .jsonl ou stdin ('-')"""
+    if archive:
+        for fichier in memory.lister_recettes():
+            yield fichier, (memory.recipes_dir / fichier).read_text(encoding="utf-8")
+
+    for nom in fichiers or ([] if archive else ["-"]):
+        if nom == "-":
+            for numero, ligne in enumerate(sys.stdin, 1):
+                if ligne.strip():
+                    yield f"stdin:{numero}", ligne
+        elif nom.endswith(".jsonl"):
+            with open(nom, encoding="utf-8") as f:
+                for numero, ligne in enumerate(f, 1):
+                    if ligne.strip():
+                        yield f"{nom}:{numero}", ligne
+        else:
+            yield nom, Path(nom).read_text(encoding="utf-8")
+
+
+def commande_calc(memory, args):
+    from droidregistre import registre_catalogues
+
+    sap_values = dict(registre_catalogues(memory).courant().sap)
+    debut = time.perf_counter()
+    total = erreurs = 0
+    paquets = _paquets(_entrees(memory, args.fichiers, args.archive))
+    for lignes, nb_erreurs in traiter_en_parallele(_calculer_paquet, paquets, args.processus, {"sap": sap_values}):
+        total += len(lignes)
+        erreurs += nb_erreurs
+        sys.stdout.write("\n".join(lignes) + "\n")
+        sys.stdout.flush()
+
+    duree = time.perf_counter() - debut
+    print(f"✅ {total} recettes calculées ({erreurs} erreurs) en {duree:.2f} s "
+          f"({total / duree if duree else 0:.0f}/s, {args.processus} processus)", file=sys.stderr)
+    return 1 if erreurs else 0
+
+
+# --- EXPORT ---
+
+def _exporter_pdf_paquet(paquet):
+    memory = _contexte.get("memory")
+    if memory is None:
+        memory = _contexte["memory"] = DroidMemory(differer_init=True, base_dir=_contexte["base_dir"])
+        memory.exports_dir = Path(_contexte["sortie"])
+    lignes = []
+    erreurs = 0
+    for fichier in paquet:
+        try:
+            # Nommé d'après le fichier : deux recettes homonymes ne s'écrasent pas
+            chemin = memory.generer_pdf_recette(memory.charger_json(fichier), Path(fichier).stem)
+            sortie = {"source": fichier, "pdf": str(chemin)}
+        except Exception as e:
+            sortie = {"source": fichier, "erreur": str(e)}
+            erreurs += 1
+        lignes.append(json.dumps(sortie, ensure_ascii=False))
+    return lignes, erreurs
+
+
+def commande_export(memory, args):
+    if args.format in ("zip", "jsonl"):
+        from droidarchive import exporter_archive
+
+        chemin, compteurs = exporter_archive(memory, args.sortie, args.format)
+        print(json.dumps({"archive": chemin, **compteurs}, ensure_ascii=False))
+        return 0
+
+    if args.format == "csv":
+        from droidarchive import exporter_csv_analyse
+        from droidregistre import registre_catalogues
+
+        sortie = Path(args.sortie) if args.sortie else memory.exports_dir
+        sortie.mkdir(parents=True, exist_ok=True)
+        recettes, ingredients, compteurs = exporter_csv_analyse(
+            memory, sortie, dict(registre_catalogues(memory).courant().sap)
+        )
+        print(json.dumps({"csv_recettes": recettes, "csv_ingredients": ingredients, **compteurs}, ensure_ascii=False))
+        return 1 if compteurs["erreurs"] else 0
+
+    # PDF : une fiche par recette, réparties sur les cœurs
+    sortie = Path(args.sortie) if args.sortie else memory.exports_dir
+    sortie.mkdir(parents=True, exist_ok=True)
+    fichiers = args.fichiers or memory.lister_recettes()
+    contexte = {"base_dir": str(memory.base_dir), "sortie": str(sortie)}
+    erreurs = 0
+    for lignes, nb_erreurs in traiter_en_parallele(_exporter_pdf_paquet, _paquets(fichiers, 20), args.processus, contexte):
+        erreurs += nb_erreurs
+        print("\n".join(lignes), flush=True)
+    return 1 if erreurs else 0
+
+
+# --- ARCHIVE ET CATALOGUES ---
+
+def commande_list(memory, args):
+    from droidapi import Archive
+
+    for resume in Archive(memory).chercher(" ".join(args.termes), args.ingredient, args.limite):
+        print(json.dumps(resume, ensure_ascii=False))
+    return 0
+
+
+def commande_import(memory, args):
+    memory.preparer_dossiers()
+    if args.catalogue:
+        from droidcatalogue import importer_catalogue
+
+        fichier = CATALOGUES[args.catalogue]
+        memory.verifier_ressource(fichier)
+        rapport = importer_catalogue(memory, fichier, args.source, simulation=args.simulation)
+    else:
+        from droidarchive import importer_archive
+
+        rapport = importer_archive(memory, args.source, args.politique)
+    print(json.dumps(rapport, ensure_ascii=False))
+    return 1 if rapport.get("erreurs") or rapport.get("rejetees") else 0
+
+
+def commande_reindex(memory, args):
+    """Reconstruit le cache du manifeste de synchro et vérifie les index de recherche"""
+    from droidregistre import CATALOGUE_DE_LISTE, registre_catalogues
+    from droidsync import Manifeste
+
+    debut = time.perf_counter()
+    fichiers = Manifeste(memory.base_dir).calculer()
+    print(json.dumps({"manifeste": len(fichiers), "ms": round((time.perf_counter() - debut) * 1000, 1)}))
+
+    catalogues = registre_catalogues(memory).courant()
+    for cle in CATALOGUE_DE_LISTE:
+        debut = time.perf_counter()
+        index = catalogues.index(cle)
+        print(json.dumps({"index": cle, "entrees": len(index),
+                          "ms": round((time.perf_counter() - debut) * 1000, 1)}))
+    return 0
+
+
+def analyseur():
+    parser = argparse.ArgumentParser(
+        prog="droidcli.py",
+        description="SoapMaker sans interface : calculs, exports, archive et catalogues"
+    )
+    parser.add_argument("--dossier", help="dossier SaveData (défaut : celui de l'application)")
+    parser.add_argument("-j", "--processus", type=int, default=os.cpu_count() or 1,
+                        help="processus pour les traitements en masse (défaut : nombre de cœurs)")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+
+    p = commandes.add_parser("calc", help="résultats chimiques en JSONL sur stdout")
+    p.add_argument("fichiers", nargs="*", help="recettes .json, lots .jsonl ou '-' (stdin, par défaut)")
+    p.add_argument("--archive", action="store_true", help="toutes les recettes archivées")
+    p.set_defaults(fonction=commande_calc)
+
+    p = commandes.add_parser("export", help="PDF, CSV d'analyse ou archive complète")
+    p.add_argument("fichiers", nargs="*", help="recettes archivées (PDF ; défaut : toutes)")
+    p.add_argument("--format", choices=("pdf", "csv", "zip", "jsonl"), default="pdf")
+    p.add_argument("--sortie", help="dossier (pdf, csv) ou fichier (zip, jsonl)")
+    p.set_defaults(fonction=commande_export)
+
+    p = commandes.add_parser("list", help="recettes archivées en JSONL")
+    p.add_argument("termes", nargs="*", help="mots du nom")
+    p.add_argument("--ingredient", default="")
+    p.add_argument("--limite", type=int)
+    p.set_defaults(fonction=commande_list)
+
+    p = commandes.add_parser("import", help="archive .zip/.jsonl ou catalogue fournisseur")
+    p.add_argument("source")
+    p.add_argument("--catalogue", choices=sorted(CATALOGUES), help="importer dans ce catalogue")
+    p.add_argument("--politique", choices=("renommer", "ignorer", "ecraser"), default="renommer")
+    p.add_argument("--simulation", action="store_true", help="catalogue : rapport sans écriture")
+    p.set_defaults(fonction=commande_import)
+
+    p = commandes.add_parser("reindex", help="manifeste de synchro et index de recherche")
+    p.set_defaults(fonction=commande_reindex)
+    return parser
+
+
+def main(argv=None):
+    args = analyseur().parse_args(argv)
+    # Pas de panneau de diagnostic ici : traitements en masse sans chronométrage
+    instruments.actif = False
+    memory = DroidMemory(differer_init=True, base_dir=args.dossier)
+    try:
+        return args.fonction(memory, args)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import importlib
+import importlib.util
+import sys
+import threading
+
+
+class ModuleDiffere:
+    """
+    Façade d'un module lourd : l'import réel a lieu au premier attribut lu
+    (ex : fpdf ~270 ms, pygame) au lieu de ralentir le lancement
+    """
+
+    def __init__(self, nom):
+        self._nom = nom
+        self._module = None
+        self._verrou = threading.Lock()
+
+    @property
+    def disponible(self):
+        """Module installé ? (sans l'importer)"""
+        if self._module is not None:
+            return True
+        try:
+            return importlib.util.find_spec(self._nom) is not None
+        except (ImportError, ValueError):
+            return False
+
+    @property
+    def charge(self):
+        return self._module is not None
+
+    def charger(self):
+        """Importe le module (une seule fois, thread-safe)"""
+        if self._module is None:
+            with self._verrou:
+                if self._module is None:
+                    self._module = importlib.import_module(self._nom)
+        return self._module
+
+    def __getattr__(self, attribut):
+        return getattr(self.charger(), attribut)
+
+    def __repr__(self):
+        etat = "chargé" if self.charge else "différé"
+        return f"<ModuleDiffere {self._nom} ({etat})>"
+
+
+def prechauffer(*modules):
+    """Importe les modules différés en arrière-plan (après le premier affichage)"""
+    def _travail():
+        for module in modules:
+            if module.disponible:
+                try:
+                    module.charger()
+                except Exception as e:
+                    print(f"⚠️ Préchauffage {module._nom} échoué : {e}")
+
+    thread = threading.Thread(target=_travail, name="prechauffage", daemon=True)
+    thread.start()
+    return thread
+
+
+# --- BUDGET D'IMPORT ---
+
+# Modules chargés au lancement, hors flet (qui est incompressible)
+MODULES_DEMARRAGE = ["droiddiffere", "droidmemory", "droidchimie", "droidpartage",
+                     "droidarchive", "droidcatalogue", "droidson", "droidaffichage",
+                     "droidrecherche", "droidetat", "droidregistre", "droidinstruments"]
+
+# Ne doivent jamais être importés au lancement
+MODULES_INTERDITS = ["fpdf", "pygame", "droidsync"]
+
+BUDGET_IMPORT_MS = 50
+
+
+def mesurer_imports(modules=None):
+    """
+    Mesure l'import des modules via `python -X importtime` (processus neuf)
+    Retourne (total ms, {module: ms cumulé}, modules importés)
+    """
+    import re
+    import subprocess
+
+    modules = modules or MODULES_DEMARRAGE
+    resultat = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        capture_output=True, text=True
+    )
+    if resultat.returncode != 0:
+        raise RuntimeError(resultat.stderr.strip().splitlines()[-1])
+
+    cumuls = {}
+    importes = set()
+    motif = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+    for ligne in resultat.stderr.splitlines():
+        m = motif.match(ligne)
+        if not m:
+            continue
+        nom = m.group(4)
+        importes.add(nom.split(".")[0])
+        # Seuls les imports de premier niveau : pas de double comptage
+        if nom in modules and len(m.group(3)) <= 1:
+            cumuls[nom] = int(m.group(2)) / 1000
+    return sum(cumuls.values()), cumuls, importes
+
+
+def verifier_budget_imports(budget_ms=BUDGET_IMPORT_MS, modules=None):
+    """Contrôle de régression : lève AssertionError si le budget est dépassé"""
+    total, cumuls, importes = mesurer_imports(modules)
+    interdits = sorted(set(MODULES_INTERDITS) & importes)
+    assert not interdits, f"Imports lourds au démarrage : {', '.join(interdits)}"
+    assert total <= budget_ms, (
+        f"Imports de démarrage : {total:.1f} ms > budget {budget_ms} ms "
+        f"({', '.join(f'{n} {ms:.1f}' for n, ms in sorted(cumuls.items(), key=lambda x: -x[1]))})"
+    )
+    return total, cumuls
+
+
+if __name__ == "__main__":
+    # python droiddiffere.py  -> échoue (code 1) si le budget est dépassé
+    try:
+        total, cumuls = verifier_budget_imports()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for nom, ms in sorted(cumuls.items(), key=lambda x: -x[1]):
+        print(f"  {nom:<16}{ms:8.1f} ms")
+    print(f"✅ Imports de démarrage : {total:.1f} ms (budget {BUDGET_IMPORT_MS} ms)")
@@ -0,0 +1,396 @@
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+from droidchimie import (
+    bilan_recette, obtenir_poids_huiles, phase_liquide, poids_par_huile, poids_soude
+)
+from droidinstruments import instrumenter
+
+# Maximum conseillé des ajouts, en % du poids d'huiles
+LIMITES_AJOUTS = {"additifs": 10, "he": 3}
+
+
+class Fige(dict):
+    """
+    Dictionnaire figé : toute modification lève TypeError. avec()/sans()
+    retournent une nouvelle version qui partage le reste (sous-dictionnaires
+    compris) ; json.dump et les lectures fonctionnent comme sur un dict
+    """
+
+    __slots__ = ()
+
+    def _interdit(self, *args, **kwargs):
+        raise TypeError("Recette figée : passer par EtatRecette")
+
+    __setitem__ = __delitem__ = __ior__ = _interdit
+    clear = pop = popitem = setdefault = update = _interdit
+
+    def __reduce__(self):
+        return Fige, (dict(self),)
+
+    def avec(self, cle, valeur):
+        nouveau = dict(self)
+        nouveau[cle] = valeur
+        return Fige(nouveau)
+
+    def sans(self, cle):
+        nouveau = dict(self)
+        del nouveau[cle]
+        return Fige(nouveau)
+
+
+def figer(valeur):
+    """Fige une valeur en profondeur (ce qui est déjà figé est partagé tel quel)"""
+    if isinstance(valeur, Fige):
+        return valeur
+    if isinstance(valeur, dict):
+        return Fige({cle: figer(v) for cle, v in valeur.items()})
+    if isinstance(valeur, list):
+        return tuple(figer(v) for v in valeur)
+    return valeur
+
+
+class _Derivee:
+    __slots__ = ("nom", "fonction", "valeur", "valide", "dependances")
+
+    def __init__(self, nom, fonction):
+        self.nom = nom
+        self.fonction = fonction
+        self.valeur = None
+        self.valide = False
+        self.dependances = set()
+
+
+class Magasin:
+    """
+    Valeurs observables (sources) et valeurs dérivées mémoïsées
+    Une dérivée note les noms qu'elle lit pendant son calcul et n'est
+    recalculée que si l'un d'eux a changé ; les abonnés d'un nom ne sont
+    rappelés que si sa valeur a réellement changé
+    """
+
+    def __init__(self, valeurs=None):
+        self.valeurs = valeurs if valeurs is not None else {}
+        self.derivees = {}
+        self.dependants = {}
+        self.abonnes = {}
+        self.vues = {}
+        self.verrou = threading.RLock()
+        self._pile = []
+        self._lot = 0
+        self._a_notifier = {}
+        self.remise_a_zero()
+
+    def remise_a_zero(self):
+        self.compteurs = {"calculs": 0, "caches": 0, "invalidations": 0, "notifications": 0}
+
+    def releve(self):
+        with self.verrou:
+            return dict(self.compteurs)
+
+    # --- LECTURE ---
+
+    def deriver(self, nom, fonction):
+        """Déclare une valeur dérivée : fonction(magasin) -> valeur"""
+        self.derivees[nom] = _Derivee(nom, fonction)
+
+    def valeur_source(self, nom):
+        return self.valeurs.get(nom)
+
+    def lire(self, nom):
+        """Valeur d'une source ou d'une dérivée (recalculée seulement si périmée)"""
+        with self.verrou:
+            if self._pile:
+                appelant = self._pile[-1]
+                appelant.dependances.add(nom)
+                self.dependants.setdefault(nom, set()).add(appelant.nom)
+
+            derivee = self.derivees.get(nom)
+            if derivee is None:
+                return self.valeur_source(nom)
+            if derivee.valide:
+                self.compteurs["caches"] += 1
+                return derivee.valeur
+            return self._calculer(derivee)
+
+    def _calculer(self, derivee):
+        # Dépendances relevées à nouveau : elles peuvent changer d'un calcul à l'autre
+        for nom in derivee.dependances:
+            self.dependants.get(nom, set()).discard(derivee.nom)
+        derivee.dependances = set()
+
+        self._pile.append(derivee)
+        try:
+            derivee.valeur = derivee.fonction(self)
+        finally:
+            self._pile.pop()
+        derivee.valide = True
+        self.compteurs["calculs"] += 1
+        return derivee.valeur
+
+    # --- ÉCRITURE ---
+
+    def ecrire_source(self, nom, valeur):
+        self.valeurs[nom] = valeur
+
+    def definir(self, nom, valeur):
+        """Change une source (rien ne se passe si la valeur est identique)"""
+        with self.verrou:
+            if nom in self.valeurs and self.valeur_source(nom) == valeur:
+                return
+            self.ecrire_source(nom, valeur)
+            self.toucher(nom)
+
+    def toucher(self, *noms):
+        """Signale des sources modifiées sur place (ex. dictionnaire des huiles)"""
+        with self.verrou:
+            for nom in noms:
+                self._invalider(nom)
+            if not self._lot:
+                self._notifier()
+
+    def tout_invalider(self):
+        """Toutes les sources ont pu changer (recette remplacée)"""
+        with self.verrou:
+            for derivee in self.derivees.values():
+                derivee.valide = False
+            for nom in self.abonnes:
+                self._a_notifier[nom] = None
+            if not self._lot:
+                self._notifier()
+
+    def _invalider(self, nom):
+        if nom in self.abonnes:
+            self._a_notifier[nom] = None
+        for dependant in self.dependants.get(nom, ()):
+            derivee = self.derivees[dependant]
+            if derivee.valide:
+                derivee.valide = False
+                self.compteurs["invalidations"] += 1
+                self._invalider(dependant)
+
+    @contextmanager
+    def lot(self):
+        """Plusieurs modifications, une seule vague de notifications à la fin"""
+        with self.verrou:
+            self._lot += 1
+            try:
+                yield self
+            finally:
+                self._lot -= 1
+                if not self._lot:
+                    self._notifier()
+
+    # --- ABONNEMENTS ---
+
+    def abonner(self, noms, rappel):
+        """
+        rappel() est appelé quand l'une des valeurs nommées change
+        (une seule fois par vague, même si plusieurs ont changé)
+        """
+        with self.verrou:
+            for nom in noms:
+                self.abonnes.setdefault(nom, []).append(rappel)
+                # Premier calcul : relève les dépendances à surveiller
+                if nom in self.derivees:
+                    self.vues[nom] = self.lire(nom)
+
+    def _notifier(self):
+        rappels = {}
+        while self._a_notifier:
+            nom = next(iter(self._a_notifier))
+            del self._a_notifier[nom]
+            if nom in self.derivees:
+                valeur = self.lire(nom)
+                if nom in self.vues and self.vues[nom] == valeur:
+                    continue
+                self.vues[nom] = valeur
+            for rappel in self.abonnes.get(nom, ()):
+                rappels[id(rappel)] = rappel
+
+        for rappel in rappels.values():
+            self.compteurs["notifications"] += 1
+            try:
+                rappel()
+            except Exception as e:
+                print(f"⚠️ Abonné de l'état : {e}")
+
+
+class VueRecette(Mapping):
+    """La recette vue à travers le magasin : chaque clé lue devient une dépendance"""
+
+    def __init__(self, magasin):
+        self.magasin = magasin
+
+    def __getitem__(self, cle):
+        # Lue même absente : la dérivée sera invalidée si la clé apparaît
+        valeur = self.magasin.lire(cle)
+        if cle not in self.magasin.valeurs:
+            raise KeyError(cle)
+        return valeur
+
+    def __iter__(self):
+        return iter(self.magasin.valeurs)
+
+    def __len__(self):
+        return len(self.magasin.valeurs)
+
+
+def _total(cle):
+    return lambda m: float(sum(m.lire(cle).values()))
+
+
+def _maximum(cle):
+    return lambda m: m.lire("poids_huiles") * LIMITES_AJOUTS[cle] / 100
+
+
+@instrumenter("chimie.bilan")
+def _chimie(m):
+    ph = m.lire("poids_huiles")
+    if ph == 0:
+        return None
+    return bilan_recette(
+        ph,
+        m.lire("detail_huiles_g"),
+        m.lire("poids_soude"),
+        m.lire("phase_liquide"),
+        m.lire("total_additifs"),
+        m.lire("total_he")
+    )
+
+
+# Valeurs dérivées de la recette (voir droidchimie pour les formules)
+DERIVEES_RECETTE = {
+    "poids_huiles": lambda m: obtenir_poids_huiles(m.vue),
+    "total_huiles": _total("corps_gras"),
+    "detail_huiles_g": lambda m: poids_par_huile(m.vue, m.lire("poids_huiles")),
+    "poids_soude": lambda m: poids_soude(m.lire("detail_huiles_g"), m.vue.get("surgras", 5), m.lire("sap")),
+    "phase_liquide": lambda m: phase_liquide(m.vue, m.lire("poids_huiles")),
+    "total_additifs": _total("additifs"),
+    "total_he": _total("he"),
+    "max_additifs": _maximum("additifs"),
+    "max_he": _maximum("he"),
+    "chimie": _chimie,
+}
+
+
+class EtatRecette(Magasin):
+    """
+    Recette courante : ses clés sont les sources, les grandeurs calculées
+    (poids d'huiles, soude, liquides, totaux, maximums) sont des dérivées
+    La recette est figée : chaque modification installe une nouvelle version
+    d'un seul coup, une version obtenue par instantane() ne bouge plus
+    """
+
+    def __init__(self, recette=None, sap_values=None):
+        super().__init__(figer(recette if recette is not None else {}))
+        self.version = 0
+        self.sap_values = sap_values or {}
+        self.vue = VueRecette(self)
+        for nom, fonction in DERIVEES_RECETTE.items():
+            self.deriver(nom, fonction)
+
+    @property
+    def recette(self):
+        return self.valeurs
+
+    def instantane(self):
+        """Version courante, lisible sans verrou depuis n'importe quel thread (sauvegarde, export)"""
+        return self.valeurs
+
+    def valeur_source(self, nom):
+        if nom == "sap":
+            return self.sap_values
+        return self.valeurs.get(nom)
+
+    def ecrire_source(self, nom, valeur):
+        if nom == "sap":
+            self.sap_values = valeur
+        else:
+            self.valeurs = self.valeurs.avec(nom, figer(valeur))
+            self.version += 1
+
+    def charger(self, recette):
+        """Remplace toute la recette (chargement, import, remise à zéro)"""
+        with self.verrou:
+            self.valeurs = figer(recette)
+            self.version += 1
+            self.tout_invalider()
+
+    def changer_sap(self, sap_values):
+        """Nouveau catalogue des huiles"""
+        with self.verrou:
+            self.sap_values = sap_values
+            self.toucher("sap")
+
+    def quantite(self, cle, nom, valeur):
+        """Quantité d'un ingrédient (huile, additif, HE)"""
+        with self.verrou:
+            dico = self.valeurs[cle]
+            if nom in dico and dico[nom] == valeur:
+                return
+            self.ecrire_source(cle, dico.avec(nom, valeur))
+            self.toucher(cle)
+
+    def retirer(self, cle, nom):
+        with self.verrou:
+            self.ecrire_source(cle, self.valeurs[cle].sans(nom))
+            self.toucher(cle)
+
+
+def mesurer_concurrence_recette(duree=1.0, huiles=40):
+    """
+    Un thread modifie sans cesse les huiles de la recette (comme les gestionnaires
+    Flet) pendant qu'un autre la sérialise comme une sauvegarde (json indenté)
+    et recalcule la chimie. Retourne (sauvegardes, erreurs, ms par sauvegarde)
+    """
+    import io
+    import json
+    import time
+    from droidchimie import calculer_chimie_recette
+
+    etat = EtatRecette({
+        "nom_recette": "Concurrence", "mode": "Poids", "poids_total_desire": 0.0,
+        "corps_gras": {}, "surgras": 5, "proportion_eau": 30,
+        "substitut_liquide": "Aucun", "pourcentage_substitut": 0, "additifs": {}, "he": {}
+    })
+    fin = time.perf_counter() + duree
+
+    def editer():
+        n = 0
+        while time.perf_counter() < fin:
+            nom = f"Huile {n % huiles}"
+            if nom in etat.recette["corps_gras"]:
+                etat.retirer("corps_gras", nom)
+            else:
+                etat.quantite("corps_gras", nom, float(n % 500))
+            n += 1
+
+    editeur = threading.Thread(target=editer)
+    editeur.start()
+    sauvegardes = erreurs = 0
+    debut = time.perf_counter()
+    while time.perf_counter() < fin:
+        recette = etat.instantane()
+        try:
+            json.dump(recette, io.StringIO(), indent=4, ensure_ascii=False)
+            calculer_chimie_recette(recette, {})
+            sauvegardes += 1
+        except RuntimeError:
+            erreurs += 1
+    ms = (time.perf_counter() - debut) * 1000 / max(1, sauvegardes + erreurs)
+    editeur.join()
+    return sauvegardes, erreurs, ms
+
+
+if __name__ == "__main__":
+    # python droidetat.py  -> échoue (code 1) si une sauvegarde voit la recette changer
+    import sys
+
+    sauvegardes, erreurs, ms = mesurer_concurrence_recette()
+    print(f"Recette modifiée pendant {sauvegardes + erreurs} sauvegardes : {erreurs} erreurs ({ms:.2f} ms chacune)")
+    if erreurs:
+        print("❌ Instantané modifié pendant sa sérialisation")
+        sys.exit(1)
+    print("✅ Instantanés stables")
@@ -0,0 +1,328 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Dernières opérations gardées pour la trace (anneau : les plus anciennes sortent)
+TAILLE_ANNEAU = 4096
+
+# Histogramme : case i = durées de [2^(i-1), 2^i[ µs (jusqu'à ~18 min)
+CASES_HISTOGRAMME = 41
+
+# Origine des horodatages de la trace
+T0 = time.perf_counter()
+
+
+class Statistique:
+    """Compteur et histogramme de latences d'une opération"""
+
+    __slots__ = ("appels", "total", "maximum", "cases")
+
+    def __init__(self):
+        self.appels = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.cases = [0] * CASES_HISTOGRAMME
+
+    def ajouter(self, duree):
+        self.appels += 1
+        self.total += duree
+        if duree > self.maximum:
+            self.maximum = duree
+        self.cases[min(CASES_HISTOGRAMME - 1, int(duree * 1e6).bit_length())] += 1
+
+    def centile(self, fraction):
+        """Borne haute (ms) de la case contenant le centile"""
+        seuil = self.appels * fraction
+        cumul = 0
+        for i, nombre in enumerate(self.cases):
+            cumul += nombre
+            if nombre and cumul >= seuil:
+                return min(2 ** i / 1000, self.maximum * 1000)
+        return self.maximum * 1000
+
+    def resume(self):
+        return {
+            "appels": self.appels,
+            "total_ms": self.total * 1000,
+            "moyenne_ms": self.total * 1000 / self.appels if self.appels else 0.0,
+            "p50_ms": self.centile(0.50),
+            "p90_ms": self.centile(0.90),
+            "p99_ms": self.centile(0.99),
+            "max_ms": self.maximum * 1000,
+        }
+
+
+class Instruments:
+    """
+    Chronométrage léger des chemins chauds (écrans, page.update, disque,
+    chimie, PDF) : statistiques par opération, anneau des dernières
+    opérations, et capture cProfile/tracemalloc à la demande
+    """
+
+    def __init__(self, taille_anneau=TAILLE_ANNEAU):
+        self.actif = True
+        self.verrou = threading.Lock()
+        self.statistiques = {}
+        self.anneau = deque(maxlen=taille_anneau)
+        self.threads = {}
+        self.capture = None
+        self.derniere_capture = None
+        self._local = threading.local()
+
+    def remise_a_zero(self):
+        with self.verrou:
+            self.statistiques.clear()
+            self.anneau.clear()
+
+    def enregistrer(self, nom, debut, duree):
+        """Note une opération terminée (debut : time.perf_counter())"""
+        tid = threading.get_ident()
+        with self.verrou:
+            statistique = self.statistiques.get(nom)
+            if statistique is None:
+                statistique = self.statistiques[nom] = Statistique()
+            statistique.ajouter(duree)
+            self.anneau.append((nom, debut, duree, tid))
+            if tid not in self.threads:
+                self.threads[tid] = threading.current_thread().name
+
+    @contextmanager
+    def mesure(self, nom):
+        """with instruments.mesure("disque.lecture"): ..."""
+        if not self.actif:
+            yield
+            return
+
+        capture = self.capture
+        profil = self._profiler(capture) if capture is not None else None
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            duree = time.perf_counter() - debut
+            if profil is not None:
+                self._fin_profil(profil)
+            self.enregistrer(nom, debut, duree)
+
+    def releve(self):
+        """{opération: appels, total, moyenne, centiles et max en ms}"""
+        with self.verrou:
+            return {nom: s.resume() for nom, s in sorted(self.statistiques.items())}
+
+    def tableau(self):
+        """Relevé en texte à colonnes (panneau de diagnostic)"""
+        lignes = [f"{'opération':<26}{'appels':>7}{'moy':>9}{'p50':>9}{'p99':>9}{'max':>9}  ms"]
+        for nom, r in self.releve().items():
+            lignes.append(
+                f"{nom:<26}{r['appels']:>7}{r['moyenne_ms']:>9.2f}{r['p50_ms']:>9.2f}"
+                f"{r['p99_ms']:>9.2f}{r['max_ms']:>9.2f}"
+            )
+        return "\n".join(lignes)
+
+    # --- CAPTURE (cProfile / tracemalloc) ---
+
+    def demarrer_capture(self, memoire=False):
+        """
+        Profile les opérations mesurées jusqu'à arreter_capture() : un profil
+        cProfile par thread (activé pendant les opérations seulement), et les
+        allocations si memoire (tracemalloc, nettement plus lent)
+        """
+        import tracemalloc
+
+        with self.verrou:
+            if self.capture is not None:
+                return
+            self.capture = {
+                "debut": time.perf_counter(),
+                "profils": [],
+                "tracemalloc": memoire and not tracemalloc.is_tracing(),
+            }
+        if self.capture["tracemalloc"]:
+            tracemalloc.start()
+        print("🔬 Capture de profil démarrée")
+
+    def _profiler(self, capture):
+        # Opération la plus extérieure du thread : elle seule active le profil
+        local = self._local
+        profondeur = getattr(local, "profondeur", 0)
+        local.profondeur = profondeur + 1
+        if profondeur:
+            return local.entree
+
+        entree = getattr(local, "entree", None)
+        if entree is None or entree["capture"] is not capture:
+            import cProfile
+
+            entree = local.entree = {"capture": capture, "profil": cProfile.Profile(), "occupe": False}
+            with self.verrou:
+                capture["profils"].append(entree)
+        try:
+            entree["occupe"] = True
+            entree["profil"].enable()
+        except ValueError:
+            # Un autre profileur (débogueur...) occupe déjà ce thread
+            entree["occupe"] = False
+        return entree
+
+    def _fin_profil(self, entree):
+        local = self._local
+        local.profondeur -= 1
+        if local.profondeur == 0 and entree["occupe"]:
+            entree["profil"].disable()
+            entree["occupe"] = False
+
+    def arreter_capture(self, lignes=25):
+        """
+        Termine la capture : fonctions les plus coûteuses (temps cumulé) et,
+        si demandé, lignes qui ont le plus alloué ; None sans capture en cours
+        Les opérations encore en cours dans d'autres threads sont ignorées
+        """
+        with self.verrou:
+            capture, self.capture = self.capture, None
+        if capture is None:
+            return None
+
+        resultat = {
+            "duree_s": time.perf_counter() - capture["debut"],
+            "fonctions": [],
+            "allocations": [],
+        }
+        profils = []
+        for entree in capture["profils"]:
+            if not entree["occupe"]:
+                entree["profil"].create_stats()
+                # pstats refuse un profil vide
+                if entree["profil"].stats:
+                    profils.append(entree["profil"])
+        if profils:
+            import pstats
+
+            stats = pstats.Stats(*profils).stats
+            for (fichier, ligne, fonction), (_, appels, propre, cumule, _) in sorted(
+                    stats.items(), key=lambda kv: kv[1][3], reverse=True)[:lignes]:
+                resultat["fonctions"].append({
+                    "fonction": f"{os.path.basename(fichier)}:{ligne}({fonction})",
+                    "appels": appels,
+                    "propre_ms": propre * 1000,
+                    "cumule_ms": cumule * 1000,
+                })
+
+        if capture["tracemalloc"]:
+            import tracemalloc
+
+            instantane = tracemalloc.take_snapshot()
+            resultat["pic_kio"] = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+            for stat in instantane.statistics("lineno")[:lignes]:
+                cadre = stat.traceback[0]
+                resultat["allocations"].append({
+                    "ligne": f"{os.path.basename(cadre.filename)}:{cadre.lineno}",
+                    "kio": stat.size / 1024,
+                    "blocs": stat.count,
+                })
+
+        self.derniere_capture = resultat
+        print(f"🔬 Capture terminée ({resultat['duree_s']:.1f} s, {len(resultat['fonctions'])} fonctions)")
+        return resultat
+
+    @staticmethod
+    def texte_capture(resultat, lignes=15):
+        """Résultat d'arreter_capture() en texte à colonnes"""
+        texte = [f"Capture de {resultat['duree_s']:.1f} s, temps cumulé :"]
+        for f in resultat["fonctions"][:lignes]:
+            texte.append(f"{f['cumule_ms']:10.1f} ms{f['appels']:>8}  {f['fonction']}")
+        if resultat["allocations"]:
+            texte.append(f"Allocations (pic {resultat['pic_kio']:.0f} Kio) :")
+            for a in resultat["allocations"][:lignes]:
+                texte.append(f"{a['kio']:10.1f} Kio{a['blocs']:>7}  {a['ligne']}")
+        return "\n".join(texte)
+
+    # --- EXPORT ---
+
+    def trace_chrome(self):
+        """
+        Relevé au format Chrome trace (chrome://tracing, ui.perfetto.dev) :
+        une tranche par opération de l'anneau ; le relevé et la dernière
+        capture sont rangés dans otherData
+        """
+        pid = os.getpid()
+        with self.verrou:
+            anneau = list(self.anneau)
+            threads = dict(self.threads)
+        evenements = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": nom}}
+            for tid, nom in threads.items()
+        ]
+        for nom, debut, duree, tid in anneau:
+            evenements.append({
+                "name": nom,
+                "cat": nom.split(".", 1)[0],
+                "ph": "X",
+                "ts": round((debut - T0) * 1e6, 1),
+                "dur": round(duree * 1e6, 1),
+                "pid": pid,
+                "tid": tid,
+            })
+        return {
+            "traceEvents": evenements,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "operations": self.releve(),
+                "capture": self.derniere_capture,
+            },
+        }
+
+    def exporter(self, chemin):
+        """Écrit la trace JSON (lisible telle quelle par chrome://tracing)"""
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump(self.trace_chrome(), f, ensure_ascii=False)
+        return chemin
+
+
+# Instruments du processus (toutes les sessions)
+instruments = Instruments()
+
+
+def instrumenter(nom):
+    """Décorateur : chaque appel est mesuré sous `nom`"""
+    def decorateur(fonction):
+        @functools.wraps(fonction)
+        def mesuree(*args, **kwargs):
+            if not instruments.actif:
+                return fonction(*args, **kwargs)
+            if instruments.capture is not None:
+                with instruments.mesure(nom):
+                    return fonction(*args, **kwargs)
+            # Chemin courant sans capture : pas de gestionnaire de contexte
+            debut = time.perf_counter()
+            try:
+                return fonction(*args, **kwargs)
+            finally:
+                instruments.enregistrer(nom, debut, time.perf_counter() - debut)
+        return mesuree
+    return decorateur
+
+
+def mesurer_surcout(appels=200000):
+    """Coût d'une opération mesurée vide, en µs (instruments actifs, sans capture)"""
+    @instrumenter("surcout")
+    def vide():
+        pass
+
+    debut = time.perf_counter()
+    for _ in range(appels):
+        vide()
+    duree = time.perf_counter() - debut
+    with instruments.verrou:
+        instruments.statistiques.pop("surcout", None)
+    return duree / appels * 1e6
+
+
+if __name__ == "__main__":
+    # python droidinstruments.py  -> surcoût par opération mesurée
+    print(f"Surcoût : {mesurer_surcout():.2f} µs par opération mesurée")
@@ -1,20 +1,109 @@
+import functools
 import os
 import shutil
 import json
 import platform
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from fpdf import FPDF
 from datetime import datetime
+from droiddiffere import ModuleDiffere
+from droidinstruments import instrumenter
+
+try:
+    import fcntl
+except ImportError:
+    # Windows : verrou d'octet via msvcrt
+    fcntl = None
+    import msvcrt
+
+# fpdf n'est importé qu'au premier export PDF (~270 ms épargnées au lancement)
+fpdf = ModuleDiffere("fpdf")
+
+
+# Catalogues d'ingrédients : fichier -> (clé racine, clé du nom)
+RESSOURCES = {
+    "huiles.json": ("huiles", "nom"),
+    "additifs.json": ("additifs", "Additif"),
+    "addons_he.json": ("addons_he", "Nom"),
+}
+
+# Verrous entre threads d'un même processus, par fichier verrouillé
+_verrous_locaux = {}
+_verrou_table = threading.Lock()
+
+
+@contextmanager
+def verrou_fichier(chemin):
+    """
+    Verrou exclusif sur un fichier, entre threads et entre processus
+    (verrou consultatif posé sur '.<nom>.lock' à côté du fichier)
+    """
+    chemin = Path(chemin)
+    with _verrou_table:
+        local = _verrous_locaux.setdefault(str(chemin), threading.Lock())
+    with local:
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        with open(chemin.with_name(f".{chemin.name}.lock"), "a+b") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK abandonne après 10 s : on attend encore
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _ecrire_json(chemin, data):
+    """Écriture atomique : un lecteur voit l'ancien fichier ou le nouveau, jamais un morceau"""
+    tmp = chemin.with_name(f".{chemin.name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp, chemin)
+
+
+def _ecrire_octets(chemin, contenu):
+    """Comme _ecrire_json, pour un contenu déjà encodé (copié tel quel, même hash)"""
+    tmp = chemin.with_name(f".{chemin.name}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(contenu)
+    os.replace(tmp, chemin)
+
+
+def _hors_boucle(methode):
+    """Variante async d'une méthode bloquante : exécutée dans un thread (asyncio.to_thread)"""
+    @functools.wraps(methode)
+    async def variante(self, *args, **kwargs):
+        # asyncio importé ici : ~35 ms épargnées au lancement (mode synchrone)
+        import asyncio
+        return await asyncio.to_thread(methode, self, *args, **kwargs)
+    variante.__name__ = f"{methode.__name__}_async"
+    return variante
 
 
 class DroidMemory:
     """Gestionnaire de fichiers et exports pour SoapMaker"""
     
-    def __init__(self):
+    def __init__(self, differer_init=False, base_dir=None):
         # Détection du territoire (PC vs Android)
         self.base_dir = Path.home() / ".SoapMakerDroid"
         
-        if platform.system() == "Windows":
+        if base_dir is not None:
+            # Dossier imposé (plusieurs processus sur le même SaveData, essais)
+            self.base_dir = Path(base_dir)
+        elif platform.system() == "Windows":
             self.base_dir = Path(os.getcwd()) / "SaveData"
         else:
             # Sur Android, Path.home() pointe vers le stockage interne accessible de l'app
@@ -24,38 +113,47 @@ class DroidMemory:
         self.recipes_dir = self.base_dir / "recettes"
         self.exports_dir = self.base_dir / "exports"
         
-        # Création des dossiers
+        # Au démarrage de l'app, ces étapes tournent en parallèle (voir main.py)
+        if not differer_init:
+            self.preparer_dossiers()
+            self.verifier_integrite_ressources()
+    
+    def preparer_dossiers(self):
+        """Crée l'arborescence SaveData"""
         self.resources_dir.mkdir(parents=True, exist_ok=True)
         self.recipes_dir.mkdir(parents=True, exist_ok=True)
         self.exports_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Initialisation des ressources
-        self.verifier_integrite_ressources()
     
     def verifier_integrite_ressources(self):
         """Vérifie et initialise les fichiers JSON de base"""
-        fichiers_base = ["huiles.json", "additifs.json", "addons_he.json"]
-        source_assets = Path(os.getcwd()) / "assets"
+        for fichier in RESSOURCES:
+            self.verifier_ressource(fichier)
+    
+    def verifier_ressource(self, fichier):
+        """Initialise un fichier JSON de base s'il manque"""
+        cible = self.resources_dir / fichier
+        if cible.exists():
+            return
         
-        for fichier in fichiers_base:
-            cible = self.resources_dir / fichier
-            if not cible.exists():
-                print(f"Initialisation de {fichier}...")
-                try:
-                    if (source_assets / fichier).exists():
-                        shutil.copy(source_assets / fichier, cible)
-                    else:
-                        default_data = {fichier.split('.')[0]: []}
-                        with open(cible, 'w', encoding='utf-8') as f:
-                            json.dump(default_data, f)
-                except Exception as e:
-                    print(f"Erreur init ressources: {e}")
+        print(f"Initialisation de {fichier}...")
+        source_assets = Path(os.getcwd()) / "assets"
+        try:
+            self.resources_dir.mkdir(parents=True, exist_ok=True)
+            if (source_assets / fichier).exists():
+                shutil.copy(source_assets / fichier, cible)
+            else:
+                default_data = {fichier.split('.')[0]: []}
+                with open(cible, 'w', encoding='utf-8') as f:
+                    json.dump(default_data, f)
+        except Exception as e:
+            print(f"Erreur init ressources: {e}")
     
     # --- LECTURE/ÉCRITURE ---
     
+    @instrumenter("disque.lecture")
     def charger_json(self, nom_fichier):
         """Charge un fichier JSON (ressource ou recette)"""
-        if nom_fichier in ["huiles.json", "additifs.json", "addons_he.json"]:
+        if nom_fichier in RESSOURCES:
             chemin = self.resources_dir / nom_fichier
         else:
             chemin = self.recipes_dir / nom_fichier
@@ -65,12 +163,41 @@ class DroidMemory:
                 return json.load(f)
         return {}
     
+    def signature_ressource(self, nom_fichier):
+        """Version d'un catalogue sur disque (change à chaque écriture), None s'il manque"""
+        try:
+            st = os.stat(self.resources_dir / nom_fichier)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+    
+    @instrumenter("disque.ecriture_catalogue")
     def sauvegarder_ressource(self, nom_fichier, data):
         """Sauvegarde les modifications d'ingrédients"""
         chemin = self.resources_dir / nom_fichier
-        with open(chemin, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        with verrou_fichier(chemin):
+            _ecrire_json(chemin, data)
     
+    @instrumenter("disque.maj_catalogue")
+    def mettre_a_jour_ressource(self, nom_fichier, modifier):
+        """
+        Lecture-modification-écriture d'un catalogue sous verrou : modifier(items)
+        reçoit la liste relue sur disque (ajouts des autres sessions et processus
+        compris) et retourne la nouvelle liste, ou None si rien ne change
+        Retourne (liste finale, signature du fichier)
+        """
+        racine = RESSOURCES[nom_fichier][0]
+        chemin = self.resources_dir / nom_fichier
+        with verrou_fichier(chemin):
+            actuel = self.charger_json(nom_fichier)
+            items = list(actuel.get(racine, [])) if isinstance(actuel, dict) else []
+            nouveaux = modifier(items)
+            if nouveaux is not None:
+                _ecrire_json(chemin, {racine: nouveaux})
+                items = nouveaux
+            return items, self.signature_ressource(nom_fichier)
+    
+    @instrumenter("disque.sauvegarde_recette")
     def sauvegarder_recette(self, nom_recette, data):
         """Sauvegarde une recette avec gestion des doublons"""
         try:
@@ -79,23 +206,25 @@ class DroidMemory:
             nom_clean = re.sub(r'[\\/*?:"<>|]', "", nom_recette)
             nom_base = nom_clean.replace(' ', '_')
             
-            # Gestion des doublons
-            compteur = 0
-            while True:
-                suffixe = f"_{compteur}" if compteur > 0 else ""
-                nom_final = f"{nom_base}{suffixe}.json"
-                chemin = self.recipes_dir / nom_final
-                
-                if not chemin.exists():
-                    break
-                compteur += 1
-            
             # Force la création du dossier
             self.recipes_dir.mkdir(parents=True, exist_ok=True)
             
-            # Écriture
-            with open(chemin, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+            # Choix du nom et écriture sous un même verrou : deux sessions (ou
+            # processus) qui sauvent le même nom obtiennent deux fichiers distincts
+            with verrou_fichier(self.recipes_dir):
+                # Gestion des doublons
+                compteur = 0
+                while True:
+                    suffixe = f"_{compteur}" if compteur > 0 else ""
+                    nom_final = f"{nom_base}{suffixe}.json"
+                    chemin = self.recipes_dir / nom_final
+                    
+                    if not chemin.exists():
+                        break
+                    compteur += 1
+                
+                # Écriture
+                _ecrire_json(chemin, data)
             
             return nom_final  # Retourne le nom réel sauvegardé
         
@@ -103,6 +232,7 @@ class DroidMemory:
             print(f"Erreur écriture DroidMemory: {e}")
             raise
     
+    @instrumenter("disque.liste_recettes")
     def lister_recettes(self):
         """Liste les fichiers recettes disponibles"""
         try:
@@ -128,6 +258,7 @@ class DroidMemory:
     
     # --- EXPORT PDF ---
     
+    @instrumenter("pdf.generation")
     def generer_pdf_recette(self, recette, nom_fichier=None):
         """
         Génère un PDF propre à partir d'une recette
@@ -149,7 +280,7 @@ class DroidMemory:
             chemin_sortie = self.exports_dir / nom_fichier
             
             # Création du PDF avec fpdf2 (support UTF-8 natif)
-            pdf = FPDF()
+            pdf = fpdf.FPDF()
             pdf.add_page()
             pdf.set_auto_page_break(auto=True, margin=15)
             
@@ -328,4 +459,17 @@ class DroidMemory:
         lignes.append("")
         lignes.append("Généré par SoapMaker Droid Edition")
         
-        return "\n".join(lignes)
\ No newline at end of file
+        return "\n".join(lignes)
+    
+    # --- VARIANTES ASYNC (mode asyncio, voir main_async) ---
+    
+    preparer_dossiers_async = _hors_boucle(preparer_dossiers)
+    verifier_ressource_async = _hors_boucle(verifier_ressource)
+    charger_json_async = _hors_boucle(charger_json)
+    sauvegarder_ressource_async = _hors_boucle(sauvegarder_ressource)
+    mettre_a_jour_ressource_async = _hors_boucle(mettre_a_jour_ressource)
+    sauvegarder_recette_async = _hors_boucle(sauvegarder_recette)
+    lister_recettes_async = _hors_boucle(lister_recettes)
+    supprimer_recette_async = _hors_boucle(supprimer_recette)
+    renommer_recette_async = _hors_boucle(renommer_recette)
+    generer_pdf_recette_async = _hors_boucle(generer_pdf_recette)
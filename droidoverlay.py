@@ -0,0 +1,264 @@
+import threading
+import time
+from collections import deque
+
+import flet as ft
+
+from droidaffichage import programmer
+from droidinstruments import instruments
+
+# Durée d'affichage d'un message (ms) ; le suivant part juste après
+DUREE_MESSAGE_MS = 3000
+MARGE_MESSAGE_MS = 300
+
+# Messages en attente au plus : un message répété est fusionné, une info
+# ancienne cède sa place ; une erreur n'est jamais abandonnée (regroupée au pire)
+MAX_MESSAGES_ATTENTE = 5
+
+# Boîtes de dialogue fermées gardées pour être réutilisées
+MAX_DIALOGUES_LIBRES = 3
+
+
+class GestionnaireOverlay:
+    """
+    Overlay borné : une seule SnackBar réutilisée avec une file de messages,
+    et un petit stock de boîtes de dialogue ; une boîte fermée est retirée
+    de page.overlay (rien ne s'y accumule au fil de la session)
+    """
+
+    def __init__(self, page, boucle=None):
+        self.page = page
+        self.boucle = boucle
+        self.verrou = threading.RLock()
+
+        self.texte = ft.Text("", size=18)
+        self.snack = ft.SnackBar(content=self.texte, duration=DUREE_MESSAGE_MS)
+        # Entrées : [message, bgcolor, gras, erreur, répétitions, autres erreurs]
+        self.file = deque()
+        self.fin_message = 0.0
+        self.minuteur = None
+
+        self.ouverts = []
+        self.libres = []
+        # Options posées par boîte, remises à leur valeur par défaut à la réutilisation
+        self.options = {}
+        self.defauts = ft.AlertDialog()
+        self.permanents = []
+        self.remise_a_zero()
+
+    def remise_a_zero(self):
+        self.compteurs = {
+            "messages": 0, "affiches": 0, "abandonnes": 0, "fusionnes": 0,
+            "dialogues": 0, "reutilises": 0
+        }
+
+    def releve(self):
+        with self.verrou:
+            return dict(self.compteurs, overlay=len(self.page.overlay), attente=len(self.file))
+
+    def _envoyer(self, *controles):
+        try:
+            with instruments.mesure("page.update_overlay"):
+                self.page.update(*controles)
+        except Exception as e:
+            print(f"⚠️ Overlay : {e}")
+
+    # --- CONTRÔLES PERMANENTS ---
+
+    def installer(self, controle):
+        """
+        Place un contrôle sans affichage propre (FilePicker...) dans l'overlay
+        pour toute la session ; un second appel ne l'ajoute pas deux fois
+        """
+        with self.verrou:
+            if controle not in self.permanents:
+                self.permanents.append(controle)
+            if controle not in self.page.overlay:
+                self.page.overlay.append(controle)
+        return controle
+
+    # --- MESSAGES ---
+
+    def notifier(self, message, bgcolor=None, gras=False, erreur=False):
+        """Affiche un message, ou le met en file si un autre est à l'écran"""
+        with self.verrou:
+            self.compteurs["messages"] += 1
+            if time.monotonic() < self.fin_message:
+                self._mettre_en_file(message, bgcolor, gras, erreur)
+                return
+            self._montrer([message, bgcolor, gras, erreur, 1, 0])
+
+    def _mettre_en_file(self, message, bgcolor, gras, erreur):
+        for entree in self.file:
+            if entree[0] == message and entree[3] == erreur:
+                entree[4] += 1
+                self.compteurs["fusionnes"] += 1
+                return
+
+        if len(self.file) >= MAX_MESSAGES_ATTENTE:
+            info = next((e for e in self.file if not e[3]), None)
+            if info is not None:
+                self.file.remove(info)
+                self.compteurs["abandonnes"] += 1
+            elif erreur:
+                # File pleine d'erreurs : celle-ci est comptée avec la dernière
+                self.file[-1][5] += 1
+                self.compteurs["fusionnes"] += 1
+                return
+            else:
+                self.compteurs["abandonnes"] += 1
+                return
+        self.file.append([message, bgcolor, gras, erreur, 1, 0])
+
+    def _montrer(self, entree):
+        message, bgcolor, gras, _, repetitions, autres = entree
+        if repetitions > 1:
+            message += f" (×{repetitions})"
+        if autres:
+            message += f" (+{autres} autre(s) erreur(s))"
+
+        if self.snack not in self.page.overlay:
+            self.page.overlay.append(self.snack)
+        elif self.snack.open:
+            # Encore ouverte côté serveur : la refermer pour qu'elle se rouvre
+            self.snack.open = False
+            self._envoyer(self.snack)
+
+        self.texte.value = message
+        self.texte.weight = ft.FontWeight.BOLD if gras else None
+        self.snack.bgcolor = bgcolor
+        self.snack.open = True
+        self.compteurs["affiches"] += 1
+        self.fin_message = time.monotonic() + (DUREE_MESSAGE_MS + MARGE_MESSAGE_MS) / 1000
+
+        if self.minuteur is not None:
+            self.minuteur.cancel()
+        self.minuteur = programmer((DUREE_MESSAGE_MS + MARGE_MESSAGE_MS) / 1000, self._suivant, self.boucle)
+        if self.snack.page:
+            self._envoyer(self.snack)
+        else:
+            # Premier affichage : la SnackBar vient d'entrer dans l'overlay
+            self._envoyer()
+
+    def _suivant(self):
+        with self.verrou:
+            self.minuteur = None
+            self.fin_message = 0.0
+            if self.file:
+                self._montrer(self.file.popleft())
+
+    def arreter(self):
+        """
+        Fin de session : annule le minuteur du message courant et vide la file
+        (un minuteur en attente garde la session en vie jusqu'à son terme)
+        """
+        with self.verrou:
+            minuteur, self.minuteur = self.minuteur, None
+            self.file.clear()
+            self.fin_message = 0.0
+        if minuteur is not None:
+            minuteur.cancel()
+            if hasattr(minuteur, "join"):
+                minuteur.join()
+
+    # --- BOÎTES DE DIALOGUE ---
+
+    def ouvrir_dialogue(self, titre, contenu, actions, **options):
+        """
+        Ouvre une boîte (réutilisée si possible)
+        options : propriétés supplémentaires d'AlertDialog (actions_alignment...)
+        """
+        with self.verrou:
+            self.compteurs["dialogues"] += 1
+            if self.libres:
+                dlg = self.libres.pop()
+                self.compteurs["reutilises"] += 1
+            else:
+                dlg = ft.AlertDialog()
+                dlg.on_dismiss = lambda e, d=dlg: self._retirer(d)
+
+            dlg.title = ft.Text(titre) if isinstance(titre, str) else titre
+            dlg.content = contenu
+            dlg.actions = actions
+            # Boîte réutilisée : rien ne reste de l'usage précédent (modal...)
+            for nom in self.options.get(dlg, ()):
+                if nom not in options:
+                    setattr(dlg, nom, getattr(self.defauts, nom))
+            for nom, valeur in options.items():
+                setattr(dlg, nom, valeur)
+            self.options[dlg] = set(options)
+
+            self.ouverts.append(dlg)
+            self.page.overlay.append(dlg)
+            dlg.open = True
+        self._envoyer()
+        return dlg
+
+    def dialogue_de(self, controle):
+        """Boîte ouverte qui contient ce contrôle (contenu ou bouton d'action)"""
+        for dlg in reversed(self.ouverts):
+            if controle is dlg.content or controle in (dlg.actions or []):
+                return dlg
+        return None
+
+    def fermer_dialogue(self, dlg):
+        """Ferme une boîte et la retire de l'overlay (None : déjà fermée, rien à faire)"""
+        if dlg is None:
+            return
+        dlg.open = False
+        self._envoyer(dlg)
+        self._retirer(dlg)
+
+    def _retirer(self, dlg):
+        # Le retrait part au client avec la prochaine mise à jour de la page
+        with self.verrou:
+            dlg.open = False
+            if dlg in self.ouverts:
+                self.ouverts.remove(dlg)
+            if dlg in self.page.overlay:
+                self.page.overlay.remove(dlg)
+            if dlg in self.libres:
+                return
+            if len(self.libres) < MAX_DIALOGUES_LIBRES:
+                self.libres.append(dlg)
+            else:
+                self.options.pop(dlg, None)
+
+
+# Au plus : deux FilePicker de l'assistant, la SnackBar et une boîte ouverte
+MAX_CONTROLES_OVERLAY = 4
+
+
+def mesurer_overlay(nombre=2000):
+    """
+    `nombre` messages et `nombre` ouvertures/fermetures de boîtes de dialogue
+    Retourne (relevé du gestionnaire, octets du dernier cycle)
+    """
+    from droidtrafic import lancer_application
+
+    app, connexion = lancer_application()
+    for i in range(nombre):
+        app.afficher_info("Test", f"message {i}")
+        app.afficher_erreur("Test", f"erreur {i}")
+        dlg = app.overlays.ouvrir_dialogue("Test", ft.Text(f"boîte {i}"), [ft.TextButton("OK")])
+        connexion.remise_a_zero()
+        app.overlays.fermer_dialogue(dlg)
+        app.maj.vider()
+    app.page.update()
+    releve = app.overlays.releve()
+    app.terminer()
+    return releve, connexion.octets
+
+
+if __name__ == "__main__":
+    # python droidoverlay.py  -> échoue (code 1) si page.overlay grandit avec les notifications
+    import sys
+
+    nombre = 2000
+    releve, octets = mesurer_overlay(nombre)
+    print(f"Overlay après {nombre} notifications et {nombre} boîtes : {releve}")
+    print(f"Fermeture d'une boîte : {octets} octets")
+    if releve["overlay"] > MAX_CONTROLES_OVERLAY:
+        print(f"❌ page.overlay : {releve['overlay']} contrôles (max {MAX_CONTROLES_OVERLAY})")
+        sys.exit(1)
+    print(f"✅ page.overlay borné ({releve['overlay']} contrôles)")
@@ -0,0 +1,268 @@
+import base64
+import json
+import zlib
+
+
+# Préfixe reconnu par l'assistant (version du format incluse)
+PREFIXE_CODE = "SM1:"
+
+# Virgule fixe : les poids et pourcentages sont stockés en centièmes
+ECHELLE = 100
+
+# Limite prudente d'une URL mailto (clients mail et intents Android)
+LIMITE_MAILTO = 1800
+
+DRAPEAU_MODE_POURCENT = 0x01
+
+
+class CodePartageInvalide(ValueError):
+    """Code de partage illisible ou incompatible avec le catalogue local"""
+
+
+# --- PRIMITIVES BINAIRES ---
+
+def _ecrire_varint(buffer, valeur):
+    """Encode un entier positif en varint (7 bits par octet)"""
+    valeur = max(0, int(valeur))
+    while True:
+        octet = valeur & 0x7F
+        valeur >>= 7
+        if valeur:
+            buffer.append(octet | 0x80)
+        else:
+            buffer.append(octet)
+            return
+
+
+def _lire_varint(data, pos):
+    """Décode un varint, retourne (valeur, nouvelle position)"""
+    valeur = 0
+    decalage = 0
+    while True:
+        if pos >= len(data):
+            raise CodePartageInvalide("Code tronqué")
+        octet = data[pos]
+        pos += 1
+        valeur |= (octet & 0x7F) << decalage
+        if not octet & 0x80:
+            return valeur, pos
+        decalage += 7
+
+
+def _ecrire_texte(buffer, texte):
+    brut = str(texte).encode("utf-8")
+    _ecrire_varint(buffer, len(brut))
+    buffer.extend(brut)
+
+
+def _lire_texte(data, pos):
+    taille, pos = _lire_varint(data, pos)
+    if pos + taille > len(data):
+        raise CodePartageInvalide("Code tronqué")
+    return data[pos:pos + taille].decode("utf-8"), pos + taille
+
+
+def _ecrire_nombre(buffer, valeur):
+    """Nombre positif en virgule fixe (centièmes)"""
+    try:
+        _ecrire_varint(buffer, round(float(valeur) * ECHELLE))
+    except (TypeError, ValueError):
+        _ecrire_varint(buffer, 0)
+
+
+def _lire_nombre(data, pos):
+    valeur, pos = _lire_varint(data, pos)
+    return valeur / ECHELLE, pos
+
+
+# --- INDEX DES CATALOGUES ---
+
+def _index_noms(catalogue, cle):
+    """Nom -> position dans le catalogue (premier rencontré)"""
+    index = {}
+    for i, item in enumerate(catalogue):
+        nom = item.get(cle)
+        if nom is not None and nom not in index:
+            index[nom] = i
+    return index
+
+
+class _Reference:
+    """Résolution nom <-> identifiant pour un catalogue"""
+
+    def __init__(self, catalogue, cle):
+        self.noms = [item.get(cle) for item in catalogue]
+        self.index = _index_noms(catalogue, cle)
+
+    def ecrire(self, buffer, nom, noms_references):
+        # Bit de poids faible : 0 = identifiant catalogue, 1 = nom en clair
+        ident = self.index.get(nom)
+        if ident is None:
+            _ecrire_varint(buffer, 1)
+            _ecrire_texte(buffer, nom)
+        else:
+            _ecrire_varint(buffer, (ident + 1) << 1)
+            noms_references.append(nom)
+
+    def lire(self, data, pos, noms_references):
+        ref, pos = _lire_varint(data, pos)
+        if ref & 1:
+            return _lire_texte(data, pos)
+        ident = (ref >> 1) - 1
+        if ident < 0 or ident >= len(self.noms):
+            raise CodePartageInvalide("Ingrédient inconnu dans ce catalogue")
+        nom = self.noms[ident]
+        noms_references.append(nom)
+        return nom, pos
+
+
+def _empreinte(noms_references):
+    """Empreinte des noms résolus par identifiant (détecte un catalogue divergent)"""
+    return zlib.crc32("\x1f".join(noms_references).encode("utf-8")) & 0xFFFFFFFF
+
+
+# --- ENCODAGE / DÉCODAGE ---
+
+def encoder_code_partage(recette, db_huiles, db_additifs, db_he):
+    """
+    Encode une recette en code compact (binaire + zlib + base64url)
+    Les ingrédients présents au catalogue sont référencés par leur position
+    """
+    ref_huiles = _Reference(db_huiles, "nom")
+    ref_additifs = _Reference(db_additifs, "Additif")
+    ref_he = _Reference(db_he, "Nom")
+    noms_references = []
+
+    buffer = bytearray()
+    drapeaux = DRAPEAU_MODE_POURCENT if recette.get("mode") == "%" else 0
+    buffer.append(drapeaux)
+    _ecrire_texte(buffer, recette.get("nom_recette", ""))
+    _ecrire_nombre(buffer, recette.get("poids_total_desire", 0))
+    _ecrire_nombre(buffer, recette.get("surgras", 5))
+    _ecrire_nombre(buffer, recette.get("proportion_eau", 30))
+    _ecrire_nombre(buffer, recette.get("pourcentage_substitut", 0))
+
+    substitut = recette.get("substitut_liquide", "Aucun") or "Aucun"
+    if substitut == "Aucun":
+        _ecrire_varint(buffer, 0)
+    else:
+        ref_additifs.ecrire(buffer, substitut, noms_references)
+
+    for dico, ref in (("corps_gras", ref_huiles), ("additifs", ref_additifs), ("he", ref_he)):
+        items = recette.get(dico, {})
+        _ecrire_varint(buffer, len(items))
+        for nom, poids in items.items():
+            ref.ecrire(buffer, nom, noms_references)
+            _ecrire_nombre(buffer, poids)
+
+    buffer.extend(_empreinte(noms_references).to_bytes(4, "big"))
+
+    compresse = zlib.compress(bytes(buffer), 9)
+    code = base64.urlsafe_b64encode(compresse).decode("ascii").rstrip("=")
+    return PREFIXE_CODE + code
+
+
+def decoder_code_partage(code, db_huiles, db_additifs, db_he):
+    """Reconstruit une recette complète à partir d'un code de partage"""
+    code = "".join(str(code).split())
+    if not code.startswith(PREFIXE_CODE):
+        raise CodePartageInvalide("Ce n'est pas un code SoapMaker")
+
+    corps = code[len(PREFIXE_CODE):]
+    try:
+        compresse = base64.urlsafe_b64decode(corps + "=" * (-len(corps) % 4))
+        data = zlib.decompress(compresse)
+    except (ValueError, zlib.error) as e:
+        raise CodePartageInvalide(f"Code corrompu ({e})")
+
+    if len(data) < 5:
+        raise CodePartageInvalide("Code tronqué")
+
+    ref_huiles = _Reference(db_huiles, "nom")
+    ref_additifs = _Reference(db_additifs, "Additif")
+    ref_he = _Reference(db_he, "Nom")
+    noms_references = []
+
+    empreinte_attendue = int.from_bytes(data[-4:], "big")
+    data = data[:-4]
+
+    try:
+        drapeaux = data[0]
+        pos = 1
+        nom_recette, pos = _lire_texte(data, pos)
+        poids_total, pos = _lire_nombre(data, pos)
+        surgras, pos = _lire_nombre(data, pos)
+        proportion_eau, pos = _lire_nombre(data, pos)
+        pct_sub, pos = _lire_nombre(data, pos)
+
+        if data[pos] == 0:
+            substitut = "Aucun"
+            pos += 1
+        else:
+            substitut, pos = ref_additifs.lire(data, pos, noms_references)
+
+        sections = {}
+        for dico, ref in (("corps_gras", ref_huiles), ("additifs", ref_additifs), ("he", ref_he)):
+            nb, pos = _lire_varint(data, pos)
+            items = {}
+            for _ in range(nb):
+                nom, pos = ref.lire(data, pos, noms_references)
+                items[nom], pos = _lire_nombre(data, pos)
+            sections[dico] = items
+    except (IndexError, UnicodeDecodeError):
+        raise CodePartageInvalide("Code tronqué")
+
+    if _empreinte(noms_references) != empreinte_attendue:
+        raise CodePartageInvalide("Catalogue d'ingrédients différent de celui de l'expéditeur")
+
+    return {
+        "nom_recette": nom_recette,
+        "mode": "%" if drapeaux & DRAPEAU_MODE_POURCENT else "Poids",
+        "poids_total_desire": poids_total,
+        "corps_gras": sections["corps_gras"],
+        "surgras": _entier_si_possible(surgras),
+        "proportion_eau": _entier_si_possible(proportion_eau),
+        "substitut_liquide": substitut,
+        "pourcentage_substitut": _entier_si_possible(pct_sub),
+        "additifs": sections["additifs"],
+        "he": sections["he"]
+    }
+
+
+def _entier_si_possible(valeur):
+    """Les sliders travaillent en entiers : on restitue le type d'origine"""
+    return int(valeur) if float(valeur).is_integer() else valeur
+
+
+# --- MESURES ---
+
+def mesurer_tailles(recette, texte_mail, db_huiles, db_additifs, db_he):
+    """Compare la taille du code à celle du JSON et du mailto classique"""
+    from urllib.parse import quote
+
+    code = encoder_code_partage(recette, db_huiles, db_additifs, db_he)
+    return {
+        "json": len(json.dumps(recette, indent=4, ensure_ascii=False).encode("utf-8")),
+        "json_compact": len(json.dumps(recette, separators=(",", ":"), ensure_ascii=False).encode("utf-8")),
+        "mail_texte": len(texte_mail.encode("utf-8")),
+        "mailto": len(quote(texte_mail)),
+        "code": len(code)
+    }
+
+
+if __name__ == "__main__":
+    # Banc de mesure : python droidpartage.py
+    from droidmemory import DroidMemory
+
+    memoire = DroidMemory()
+    bases = [memoire.charger_json(f).get(cle, []) for f, cle in
+             (("huiles.json", "huiles"), ("additifs.json", "additifs"), ("addons_he.json", "addons_he"))]
+
+    print(f"{'Recette':<32}{'JSON':>8}{'compact':>9}{'texte':>8}{'mailto':>8}{'code':>7}")
+    for fichier in memoire.lister_recettes():
+        recette = memoire.charger_json(fichier)
+        tailles = mesurer_tailles(recette, memoire.generer_texte_mail(recette), *bases)
+        assert decoder_code_partage(encoder_code_partage(recette, *bases), *bases)["corps_gras"] == \
+            {k: round(v, 2) for k, v in recette.get("corps_gras", {}).items()}
+        print(f"{fichier[:31]:<32}{tailles['json']:>8}{tailles['json_compact']:>9}"
+              f"{tailles['mail_texte']:>8}{tailles['mailto']:>8}{tailles['code']:>7}")
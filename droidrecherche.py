@@ -0,0 +1,182 @@
+import bisect
+import heapq
+import re
+from functools import lru_cache
+
+from droidcatalogue import cle_doublon
+
+# Nombre de résultats affichés par défaut
+TOP_K = 8
+
+# Similarité minimale (trigrammes) pour une faute de frappe : "lavnde" -> "lavande"
+SEUIL_FLOU = 0.4
+
+# Champs indexés par catalogue : (champ du nom, autres champs cherchables)
+CHAMPS_RECHERCHE = {
+    "huiles.json": ("nom", ["qualite", "mousse"]),
+    "additifs.json": ("Additif", ["Propriété"]),
+    "addons_he.json": ("Nom", ["Propriétés", "Parfum"]),
+}
+
+_MOT = re.compile(r"[^\W_]+")
+
+
+@lru_cache(maxsize=4096)
+def replier(texte):
+    """Forme de comparaison : minuscules, sans accents ('Karité' -> 'karite')"""
+    if texte.isascii():
+        return " ".join(texte.casefold().split())
+    return cle_doublon(texte).replace("œ", "oe").replace("æ", "ae")
+
+
+def mots(texte):
+    return _MOT.findall(replier(str(texte)))
+
+
+def trigrammes(mot):
+    mot = f" {mot} "
+    return {mot[i:i + 3] for i in range(len(mot) - 2)}
+
+
+class _IndexPrefixe:
+    """Mots triés : tous les mots commençant par un préfixe en O(log n + résultats)"""
+
+    def __init__(self, mots_docs):
+        self.docs = {}
+        for mot, doc in mots_docs:
+            self.docs.setdefault(mot, []).append(doc)
+        self.mots = sorted(self.docs)
+
+    def prefixe(self, debut):
+        i = bisect.bisect_left(self.mots, debut)
+        while i < len(self.mots) and self.mots[i].startswith(debut):
+            yield self.mots[i]
+            i += 1
+
+
+class IndexRecherche:
+    """
+    Index de recherche d'un catalogue, construit une fois :
+    - préfixes des mots du nom (score fort) et des autres champs (score faible)
+    - trigrammes des mots du nom pour tolérer les fautes de frappe
+    Tous les termes de la requête doivent correspondre
+    """
+
+    def __init__(self, items, champ_nom, autres_champs=()):
+        self.noms = []
+        self.noms_replies = []
+        self.premiers = []
+        mots_noms = []
+        mots_autres = []
+        for item in items:
+            nom = str(item.get(champ_nom) or "").strip()
+            if not nom:
+                continue
+            doc = len(self.noms)
+            self.noms.append(nom)
+            self.noms_replies.append(replier(nom))
+            liste = _MOT.findall(self.noms_replies[-1])
+            self.premiers.append(liste[0] if liste else "")
+            propres = set(liste)
+            mots_noms.extend((m, doc) for m in propres)
+            autres = set()
+            for champ in autres_champs:
+                autres.update(mots(item.get(champ) or ""))
+            mots_autres.extend((m, doc) for m in autres - propres)
+
+        self.index_noms = _IndexPrefixe(mots_noms)
+        self.index_autres = _IndexPrefixe(mots_autres)
+        self.ordre_alpha = sorted(range(len(self.noms)), key=lambda d: self.noms_replies[d])
+        # Départage : noms courts d'abord, puis ordre alphabétique
+        self.rang = [0] * len(self.noms)
+        for rang, doc in enumerate(sorted(self.ordre_alpha, key=lambda d: len(self.noms[d]))):
+            self.rang[doc] = rang
+
+        self.trigrammes = {}
+        for mot in self.index_noms.mots:
+            for tg in trigrammes(mot):
+                self.trigrammes.setdefault(tg, []).append(mot)
+
+    @classmethod
+    def depuis_catalogue(cls, fichier, items):
+        champ_nom, autres = CHAMPS_RECHERCHE[fichier]
+        return cls(items, champ_nom, autres)
+
+    def __len__(self):
+        return len(self.noms)
+
+    def _scores_terme(self, terme):
+        scores = {}
+        for mot in self.index_noms.prefixe(terme):
+            points = 3.0 if mot == terme else 2.0
+            for doc in self.index_noms.docs[mot]:
+                # Bonus si le nom commence par ce mot
+                p = points + 0.5 if self.premiers[doc] == mot else points
+                if p > scores.get(doc, 0):
+                    scores[doc] = p
+
+        if not scores and len(terme) >= 3:
+            # Aucun préfixe : mots du nom proches (faute de frappe, infixe)
+            tg_terme = trigrammes(terme)
+            communs = {}
+            for tg in tg_terme:
+                for mot in self.trigrammes.get(tg, ()):
+                    communs[mot] = communs.get(mot, 0) + 1
+            for mot, n in communs.items():
+                similarite = n / (len(tg_terme) + len(mot) - n)
+                if similarite >= SEUIL_FLOU:
+                    for doc in self.index_noms.docs[mot]:
+                        scores[doc] = max(scores.get(doc, 0), 1.0 + similarite)
+
+        for mot in self.index_autres.prefixe(terme):
+            for doc in self.index_autres.docs[mot]:
+                scores.setdefault(doc, 1.0)
+        return scores
+
+    def chercher(self, requete, k=TOP_K):
+        """Noms des k meilleures correspondances (ordre alphabétique si requête vide)"""
+        termes = mots(requete)
+        if not termes:
+            return [self.noms[d] for d in self.ordre_alpha[:k]]
+
+        scores = None
+        for terme in termes:
+            s = self._scores_terme(terme)
+            scores = s if scores is None else {d: v + s[d] for d, v in scores.items() if d in s}
+            if not scores:
+                return []
+
+        rang = self.rang
+        meilleurs = heapq.nsmallest(k, ((-v, rang[d], d) for d, v in scores.items()))
+        return [self.noms[d] for _, _, d in meilleurs]
+
+
+if __name__ == "__main__":
+    # python droidrecherche.py  -> temps de construction et de recherche
+    import random
+    import time
+
+    racines = ["Huile", "Beurre", "Macérat", "Extrait", "Absolue", "HE"]
+    plantes = ["karité", "coco", "olive", "ricin", "argan", "jojoba", "lavande", "romarin",
+               "menthe", "citron", "sauge", "cèdre", "ylang", "géranium", "néroli", "thym"]
+    qualites = ["douceur", "dureté", "mousse crémeuse", "nourrissant", "astringent", "apaisant"]
+    aleatoire = random.Random(42)
+    items = [
+        {
+            "Nom": f"{aleatoire.choice(racines)} de {aleatoire.choice(plantes)} {n}",
+            "Propriétés": ", ".join(aleatoire.sample(qualites, 2)),
+            "Parfum": aleatoire.choice(["boisé", "floral", "hespéridé", "herbacé"]),
+        }
+        for n in range(20000)
+    ]
+
+    debut = time.perf_counter()
+    index = IndexRecherche.depuis_catalogue("addons_he.json", items)
+    print(f"Construction : {len(index)} entrées en {(time.perf_counter() - debut) * 1000:.0f} ms")
+
+    for requete in ["karite", "kar", "beurre kari", "lavnde", "floral", "h", "néroli 1999"]:
+        debut = time.perf_counter()
+        for _ in range(20):
+            resultats = index.chercher(requete)
+        ms = (time.perf_counter() - debut) * 1000 / 20
+        print(f"  {requete!r:<16}{ms:7.2f} ms  {resultats[:3]}")
@@ -0,0 +1,340 @@
+import threading
+import weakref
+from types import MappingProxyType
+
+from droidchimie import sap_depuis_catalogue
+from droidmemory import RESSOURCES
+from droidrecherche import IndexRecherche
+
+# Liste d'ingrédients de la recette -> catalogue correspondant
+CATALOGUE_DE_LISTE = {
+    "corps_gras": "huiles.json",
+    "additifs": "additifs.json",
+    "he": "addons_he.json",
+}
+
+
+class Catalogues:
+    """
+    Instantané des trois catalogues, partagé tel quel par toutes les sessions
+    Jamais modifié : un ajout produit un nouvel instantané (version suivante)
+    """
+
+    def __init__(self, version, items):
+        self.version = version
+        self.items = MappingProxyType(dict(items))
+        self.huiles = self.items["huiles.json"]
+        self.additifs = self.items["additifs.json"]
+        self.he = self.items["addons_he.json"]
+        self.sap = MappingProxyType(sap_depuis_catalogue(self.huiles))
+
+        # Index de recherche construits une seule fois, par la première session qui tape
+        self._index = {}
+        self._verrous_index = {cle: threading.Lock() for cle in CATALOGUE_DE_LISTE}
+        # Nom -> fiche, par catalogue, construit au premier besoin
+        self._par_nom = {}
+        self._verrou_noms = threading.Lock()
+
+    def fiche(self, fichier, nom):
+        """Entrée du catalogue portant ce nom (la première en cas de doublon), ou None"""
+        par_nom = self._par_nom.get(fichier)
+        if par_nom is None:
+            with self._verrou_noms:
+                par_nom = self._par_nom.get(fichier)
+                if par_nom is None:
+                    cle_nom = RESSOURCES[fichier][1]
+                    par_nom = {}
+                    for item in self.items[fichier]:
+                        par_nom.setdefault(item.get(cle_nom), item)
+                    self._par_nom[fichier] = par_nom
+        return par_nom.get(nom)
+
+    def index(self, cle):
+        """Index de recherche d'une liste d'ingrédients"""
+        index = self._index.get(cle)
+        if index is not None:
+            return index
+        with self._verrous_index[cle]:
+            index = self._index.get(cle)
+            if index is None:
+                fichier = CATALOGUE_DE_LISTE[cle]
+                items = self.items[fichier]
+                if cle == "additifs":
+                    items = [a for a in items if "Cosmétiques" not in a.get("Additif", "")]
+                index = IndexRecherche.depuis_catalogue(fichier, items)
+                self._index[cle] = index
+            return index
+
+
+class RegistreCatalogues:
+    """
+    Catalogues d'un dossier SaveData, lus une fois par processus
+    Les sessions lisent l'instantané courant sans copie ; un ajout (copie sur
+    écriture) ou un rechargement publie un nouvel instantané et prévient
+    toutes les sessions abonnées
+    """
+
+    def __init__(self, memory):
+        self.memory = memory
+        self.verrou = threading.RLock()
+        self.verrous_fichiers = {fichier: threading.Lock() for fichier in RESSOURCES}
+        self.lus = {}
+        self.signatures = {}
+        self.instantane = None
+        self.version = 0
+        self.abonnes = []
+        self.compteurs = {
+            "lectures": 0, "publications": 0, "ajouts": 0,
+            "fusions": 0, "externes": 0, "notifications": 0
+        }
+
+    def _lire_disque(self, fichier):
+        # Signature prise avant la lecture : une écriture intercalée sera revue
+        self.signatures[fichier] = self.memory.signature_ressource(fichier)
+        data = self.memory.charger_json(fichier)
+        racine = RESSOURCES[fichier][0]
+        items = data.get(racine, []) if isinstance(data, dict) else []
+        self.compteurs["lectures"] += 1
+        return tuple(items)
+
+    def lire(self, fichier):
+        """Items d'un catalogue (le premier appel du processus lit le disque)"""
+        with self.verrous_fichiers[fichier]:
+            items = self.lus.get(fichier)
+            if items is None:
+                self.memory.verifier_ressource(fichier)
+                items = self.lus[fichier] = self._lire_disque(fichier)
+            return items
+
+    def _publier(self, items):
+        self.version += 1
+        self.instantane = Catalogues(self.version, items)
+        self.compteurs["publications"] += 1
+        return self.instantane
+
+    def _perimes(self):
+        """Catalogues réécrits par un autre processus depuis leur lecture"""
+        return [
+            fichier for fichier in RESSOURCES
+            if fichier in self.signatures
+            and self.memory.signature_ressource(fichier) != self.signatures[fichier]
+        ]
+
+    def courant(self):
+        """
+        Instantané courant des catalogues ; contrôle optimiste au passage :
+        un fichier modifié par un autre processus est relu (quelques stat)
+        """
+        with self.verrou:
+            if self.instantane is None:
+                return self._publier({fichier: self.lire(fichier) for fichier in RESSOURCES})
+            perimes = self._perimes()
+            if not perimes:
+                return self.instantane
+            for fichier in perimes:
+                with self.verrous_fichiers[fichier]:
+                    self.lus[fichier] = self._lire_disque(fichier)
+            self.compteurs["externes"] += 1
+            instantane = self._publier(self.lus)
+        self._notifier(instantane)
+        return instantane
+
+    def recharger(self):
+        """Relit les fichiers (import, synchro...) et prévient les sessions"""
+        with self.verrou:
+            for fichier in RESSOURCES:
+                with self.verrous_fichiers[fichier]:
+                    self.lus[fichier] = self._lire_disque(fichier)
+            instantane = self._publier(self.lus)
+        self._notifier(instantane)
+        return instantane
+
+    def ajouter(self, fichier, item):
+        """
+        Ajoute un ingrédient sans perdre d'écriture concurrente : le fichier est
+        relu sous verrou (fichier + processus), l'ingrédient ajouté à la fin,
+        puis un nouvel instantané est publié
+        """
+        def fusionner(items):
+            if tuple(items) != self.lus.get(fichier):
+                # Ajouts d'un autre processus depuis notre lecture : conservés
+                self.compteurs["fusions"] += 1
+            items.append(dict(item))
+            return items
+
+        with self.verrou:
+            if self.instantane is None:
+                self.courant()
+            items, signature = self.memory.mettre_a_jour_ressource(fichier, fusionner)
+            with self.verrous_fichiers[fichier]:
+                self.lus[fichier] = tuple(items)
+                self.signatures[fichier] = signature
+            self.compteurs["ajouts"] += 1
+            instantane = self._publier(self.lus)
+        self._notifier(instantane)
+        return instantane
+
+    # --- SESSIONS ---
+
+    def abonner(self, rappel):
+        """
+        rappel(instantane) à chaque nouvelle version ; une méthode est gardée
+        en référence faible (une session fermée n'est pas retenue)
+        """
+        ref = weakref.WeakMethod(rappel) if hasattr(rappel, "__self__") else (lambda: rappel)
+        with self.verrou:
+            self.abonnes.append(ref)
+
+    def desabonner(self, rappel):
+        with self.verrou:
+            self.abonnes = [ref for ref in self.abonnes if ref() not in (None, rappel)]
+
+    def _notifier(self, instantane):
+        with self.verrou:
+            self.abonnes = [ref for ref in self.abonnes if ref() is not None]
+            rappels = [ref() for ref in self.abonnes]
+        for rappel in rappels:
+            if rappel is None:
+                continue
+            self.compteurs["notifications"] += 1
+            try:
+                rappel(instantane)
+            except Exception as e:
+                print(f"⚠️ Session non prévenue du nouveau catalogue : {e}")
+
+
+# Un registre par dossier SaveData pour tout le processus (sessions web comprises)
+_registres = {}
+_verrou_registres = threading.Lock()
+
+
+def registre_catalogues(memory):
+    """Registre partagé du dossier de ressources de `memory` (créé au premier appel)"""
+    cle = str(memory.resources_dir)
+    with _verrou_registres:
+        registre = _registres.get(cle)
+        if registre is None:
+            registre = _registres[cle] = RegistreCatalogues(memory)
+        return registre
+
+
+# --- ESSAI DE CHARGE ---
+
+def _ecrivain(base_dir, processus, sessions, ajouts, naif):
+    """Un processus : `sessions` threads qui ajoutent des huiles et sauvent la même recette"""
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+    from droidmemory import DroidMemory
+
+    memory = DroidMemory(differer_init=True, base_dir=base_dir)
+    registre = registre_catalogues(memory)
+
+    def session(numero):
+        for n in range(ajouts):
+            item = {"nom": f"Huile p{processus} s{numero} n{n}", "sap_naoh": 0.135}
+            if naif:
+                # Ancien chemin : lecture, ajout, réécriture complète ; nom libre puis écriture
+                data = memory.charger_json("huiles.json")
+                memory.sauvegarder_ressource("huiles.json", {"huiles": data.get("huiles", []) + [item]})
+                compteur = 0
+                while (memory.recipes_dir / f"Essai_{compteur}.json").exists():
+                    compteur += 1
+                with open(memory.recipes_dir / f"Essai_{compteur}.json", "w", encoding="utf-8") as f:
+                    json.dump({"nom_recette": item["nom"]}, f)
+            else:
+                registre.ajouter("huiles.json", item)
+                memory.sauvegarder_recette("Essai", {"nom_recette": item["nom"]})
+
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(session, range(sessions)))
+    return registre.compteurs
+
+
+def stresser_ecritures(processus=4, sessions=4, ajouts=25, naif=False):
+    """
+    `processus` x `sessions` écrivains simultanés sur un même SaveData temporaire
+    Retourne (ajouts attendus, huiles perdues, recettes écrasées, secondes, fusions)
+    """
+    import tempfile
+    import time
+    from concurrent.futures import ProcessPoolExecutor
+    from droidmemory import DroidMemory
+
+    with tempfile.TemporaryDirectory() as dossier:
+        memory = DroidMemory(differer_init=True, base_dir=dossier)
+        memory.preparer_dossiers()
+        for fichier, (racine, _) in RESSOURCES.items():
+            memory.sauvegarder_ressource(fichier, {racine: []})
+
+        debut = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=processus) as pool:
+            futurs = [pool.submit(_ecrivain, dossier, p, sessions, ajouts, naif) for p in range(processus)]
+            compteurs = [futur.result() for futur in futurs]
+        secondes = time.perf_counter() - debut
+
+        attendues = processus * sessions * ajouts
+        noms = {item["nom"] for item in memory.charger_json("huiles.json").get("huiles", [])}
+        recettes = len(memory.lister_recettes())
+    fusions = sum(c["fusions"] for c in compteurs)
+    return attendues, attendues - len(noms), attendues - recettes, secondes, fusions
+
+
+def mesurer_memoire_sessions(nombre=10):
+    """
+    Mémoire Python allouée par session (tracemalloc) : fenêtre 1 affichée
+    et index de recherche prêts. La première session (catalogues lus,
+    modules importés) est mesurée à part
+    Retourne (octets de la première session, octets par session suivante)
+    """
+    import gc
+    import tracemalloc
+    from droidtrafic import lancer_application
+
+    apps = []
+    tracemalloc.start()
+    try:
+        avant = tracemalloc.get_traced_memory()[0]
+        apps.append(lancer_application()[0])
+        apps[0].preparer_index()
+        # Chargements de fond de la 1re session (fpdf, sons) : comptés avec elle
+        for thread in threading.enumerate():
+            if thread.name in ("prechauffage", "index"):
+                thread.join()
+        for futur in list(apps[0].sound_manager.en_cours.values()):
+            futur.result()
+        gc.collect()
+        premiere = tracemalloc.get_traced_memory()[0] - avant
+
+        avant = tracemalloc.get_traced_memory()[0]
+        for _ in range(nombre):
+            app = lancer_application()[0]
+            app.preparer_index()
+            apps.append(app)
+        gc.collect()
+        suivantes = (tracemalloc.get_traced_memory()[0] - avant) / nombre
+    finally:
+        tracemalloc.stop()
+        for app in apps:
+            app.terminer()
+    return premiere, suivantes
+
+
+if __name__ == "__main__":
+    # python droidregistre.py  -> écritures concurrentes (4 processus x 4 sessions)
+    # puis mémoire par session ; code 1 si le registre perd une écriture
+    import sys
+
+    pertes = 0
+    for naif in (True, False):
+        attendues, huiles, recettes, secondes, fusions = stresser_ecritures(naif=naif)
+        print(f"{'Sans verrou' if naif else 'Registre'} : {attendues} ajouts en {secondes:.2f} s, "
+              f"{huiles} huiles perdues, {recettes} recettes écrasées, {fusions} fusions")
+        if not naif:
+            pertes = huiles + recettes
+
+    premiere, par_session = mesurer_memoire_sessions()
+    print(f"Mémoire : 1re session {premiere / 1024:.0f} Ko, puis {par_session / 1024:.0f} Ko par session")
+    if pertes:
+        print(f"❌ Registre : {pertes} écritures perdues")
+        sys.exit(1)
+    print("✅ Registre : aucune écriture perdue")
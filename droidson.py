@@ -0,0 +1,261 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from droiddiffere import ModuleDiffere
+from droidinstruments import instrumenter
+
+# Pygame (optionnel pour PC) : présence vérifiée sans l'importer,
+# l'import réel a lieu dans le thread audio
+pygame = ModuleDiffere("pygame")
+PYGAME_AVAILABLE = pygame.disponible
+
+DOSSIER_SONS = Path("assets") / "sounds"
+
+# Pool de voix : nombre maximal de sons simultanés
+MAX_VOIX = 4
+
+# Priorité par son : un son prioritaire peut couper un son moins important
+PRIORITES = {
+    "ordre66": 3,
+    "error": 3,
+    "laught": 2,
+    "save": 2,
+    "old": 2,
+    "send": 2,
+    "beep": 1,
+    "beep2": 1,
+    "dial2": 1,
+}
+PRIORITE_DEFAUT = 1
+
+# Délai minimal entre deux lectures d'un même son (frappe rapide, clics)
+COOLDOWN_MS = 150
+
+# Une demande qui attend plus longtemps dans la file n'est plus jouée
+DELAI_PERIME_MS = 250
+
+# Sons utilisés par chaque écran (préchauffés à l'affichage)
+SONS_PAR_ECRAN = {
+    "fenetre_1": ["beep", "error", "laught"],
+    "fenetre_2": ["beep2", "error", "laught"],
+    "fenetre_3": ["dial2", "laught"],
+    "fenetre_4": ["save", "old", "ordre66", "send"],
+    "assistant": ["dial2", "send", "error", "save", "old"],
+}
+
+
+class SoundManager:
+    """
+    Gestionnaire audio multi-plateforme
+    Les sons sont décodés à la demande dans le thread audio ; le PCM décodé
+    est mis en cache disque pour éviter le décodage MP3 aux lancements suivants
+    """
+
+    def __init__(self, page, differer_chargement=False, dossier_cache=None):
+        self.page = page
+        self.mode = "SILENT"
+        self.library = {}
+        self.dossier_cache = Path(dossier_cache) if dossier_cache else None
+
+        # Mesures de chargement : {nom: {"source": "mp3"|"cache", "ms": float}}
+        self.stats = {}
+
+        # Liste des fichiers sons
+        self.fichiers = {
+            "beep": "droid_beep.mp3",
+            "save": "droid_save.mp3",
+            "beep2": "droid_beep2.mp3",
+            "ordre66": "droid_66.mp3",
+            "laught": "droid_laught.mp3",
+            "dial2": "droid_dial2.mp3",
+            "error": "error_sound.mp3",
+            "old": "old_droid.mp3",
+            "send": "droid_send.mp3",
+        }
+
+        # Un seul thread audio : init du mixer, chargements et lectures, dans l'ordre
+        self.executor = None
+        self.en_cours = {}
+        self.verrou = threading.Lock()
+
+        # Pool de canaux et limitation de débit
+        self.canaux = []
+        self.priorite_canal = {}
+        self.derniere_demande = {}
+        self.compteurs = {
+            "demandes": 0, "limitees": 0, "perimees": 0,
+            "abandonnees": 0, "preemptions": 0, "jouees": 0
+        }
+        if PYGAME_AVAILABLE:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio")
+            self._moteur = self.executor.submit(self._initialiser_moteur)
+
+        if not differer_chargement:
+            self.demarrer()
+
+    def demarrer(self):
+        """Attend que le moteur audio soit prêt (aucun son n'est décodé ici)"""
+        if self.executor:
+            self._moteur.result()
+
+    def _initialiser_moteur(self):
+        """Détection et initialisation du moteur audio"""
+        try:
+            pygame.mixer.init()
+            pygame.mixer.set_num_channels(MAX_VOIX)
+            self.canaux = [pygame.mixer.Channel(i) for i in range(MAX_VOIX)]
+            self.mode = "PYGAME"
+            print("🎵 Mode audio : Pygame (PC)")
+        except Exception as e:
+            print(f"⚠️ Pygame init échoué: {e}")
+
+    # --- CHARGEMENT ---
+
+    def _chemin_cache(self, nom):
+        freq, fmt, canaux = pygame.mixer.get_init()
+        return self.dossier_cache / f"{nom}_{freq}_{fmt}_{canaux}.pcm"
+
+    def _depuis_cache(self, nom, source):
+        if not self.dossier_cache:
+            return None
+        cache = self._chemin_cache(nom)
+        try:
+            if cache.stat().st_mtime < source.stat().st_mtime:
+                return None
+            return pygame.mixer.Sound(buffer=cache.read_bytes())
+        except (OSError, pygame.error):
+            return None
+
+    def _ecrire_cache(self, nom, son):
+        if not self.dossier_cache:
+            return
+        try:
+            self.dossier_cache.mkdir(parents=True, exist_ok=True)
+            cache = self._chemin_cache(nom)
+            tmp = cache.with_suffix(".tmp")
+            tmp.write_bytes(son.get_raw())
+            os.replace(tmp, cache)
+        except OSError as e:
+            print(f"⚠️ Cache son {nom} : {e}")
+
+    @instrumenter("son.chargement")
+    def _charger(self, nom):
+        """Charge un son (thread audio) : cache PCM sinon décodage MP3"""
+        if self.mode != "PYGAME" or nom in self.library or nom not in self.fichiers:
+            return
+        source = DOSSIER_SONS / self.fichiers[nom]
+        if not source.exists():
+            return
+
+        debut = time.perf_counter()
+        try:
+            son = self._depuis_cache(nom, source)
+            origine = "cache"
+            if son is None:
+                son = pygame.mixer.Sound(str(source))
+                origine = "mp3"
+                self._ecrire_cache(nom, son)
+            son.set_volume(0.7)
+            self.library[nom] = son
+        except Exception as e:
+            print(f"❌ Erreur chargement {nom}: {e}")
+            return
+
+        ms = (time.perf_counter() - debut) * 1000
+        self.stats[nom] = {"source": origine, "ms": ms}
+        print(f"🎵 {nom} : {ms:.1f} ms ({origine})")
+
+    def _demander(self, nom):
+        """Programme le chargement d'un son, retourne le Future"""
+        if not self.executor or nom in self.library:
+            return None
+        with self.verrou:
+            futur = self.en_cours.get(nom)
+            if futur is None:
+                futur = self.executor.submit(self._charger, nom)
+                self.en_cours[nom] = futur
+            return futur
+
+    def prechauffer(self, noms):
+        """Charge en fond les sons qu'un écran va utiliser"""
+        for nom in noms:
+            self._demander(nom)
+
+    # --- LECTURE ---
+
+    def _choisir_canal(self, priorite):
+        """Canal libre, sinon celui du son le moins prioritaire (s'il l'est moins)"""
+        victime = None
+        for index, canal in enumerate(self.canaux):
+            if not canal.get_busy():
+                return index, canal
+            if victime is None or self.priorite_canal.get(index, 0) < self.priorite_canal.get(victime, 0):
+                victime = index
+
+        if victime is not None and self.priorite_canal.get(victime, 0) < priorite:
+            self.canaux[victime].stop()
+            self.compteurs["preemptions"] += 1
+            return victime, self.canaux[victime]
+        return None, None
+
+    def _traiter_lecture(self, nom_cle, demande_a):
+        """Exécuté dans le thread audio"""
+        if (time.monotonic() - demande_a) * 1000 > DELAI_PERIME_MS:
+            self.compteurs["perimees"] += 1
+            return
+
+        if nom_cle not in self.library:
+            self._charger(nom_cle)
+        son = self.library.get(nom_cle)
+        if son is None:
+            return
+
+        priorite = PRIORITES.get(nom_cle, PRIORITE_DEFAUT)
+        index, canal = self._choisir_canal(priorite)
+        if canal is None:
+            self.compteurs["abandonnees"] += 1
+            return
+
+        try:
+            canal.play(son)
+            self.priorite_canal[index] = priorite
+            self.compteurs["jouees"] += 1
+        except Exception as e:
+            print(f"⚠️ Erreur lecture {nom_cle}: {e}")
+
+    def play(self, nom_cle):
+        """Joue un son (si disponible), sans jamais bloquer l'appelant"""
+        if "66" in nom_cle:
+            nom_cle = "ordre66"
+
+        if not self.executor or nom_cle not in self.fichiers:
+            return
+
+        maintenant = time.monotonic()
+        with self.verrou:
+            self.compteurs["demandes"] += 1
+            derniere = self.derniere_demande.get(nom_cle)
+            if derniere is not None and (maintenant - derniere) * 1000 < COOLDOWN_MS:
+                self.compteurs["limitees"] += 1
+                return
+            self.derniere_demande[nom_cle] = maintenant
+
+        # La lecture (et le décodage éventuel) se fait dans le thread audio
+        self.executor.submit(self._traiter_lecture, nom_cle, maintenant)
+
+
+# Un seul moteur audio par processus : toutes les sessions partagent les sons décodés
+_partage = None
+_verrou_partage = threading.Lock()
+
+
+def son_partage(dossier_cache=None):
+    """SoundManager du processus (créé au premier appel, chargement différé)"""
+    global _partage
+    with _verrou_partage:
+        if _partage is None:
+            _partage = SoundManager(None, differer_chargement=True, dossier_cache=dossier_cache)
+        return _partage
@@ -0,0 +1,526 @@
+import hashlib
+import hmac
+import http.client
+import json
+import os
+import platform
+import secrets
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import quote, unquote, urlparse, parse_qs
+
+from droidmemory import RESSOURCES, _ecrire_octets, verrou_fichier
+
+
+# Dossiers de SaveData échangés entre appareils
+DOSSIERS_SYNC = ("resources", "recettes", "exports")
+
+FICHIER_CACHE = ".sync_cache.json"
+PREFIXE_ETAT = ".sync_etat_"
+
+PORT_SYNC = 8765
+
+# Nom de l'appareil qui sert le SaveData (copies de conflit côté client)
+ENTETE_APPAREIL = "X-Sync-Appareil"
+
+
+class ErreurSync(Exception):
+    """Échec de synchronisation (transport ou chemin refusé)"""
+
+
+def _valider_chemin(rel):
+    """Refuse tout chemin sortant des dossiers synchronisés"""
+    dossier, _, nom = rel.partition("/")
+    if dossier not in DOSSIERS_SYNC or not nom or "/" in nom or "\\" in nom \
+            or nom.startswith(".") or ".." in nom:
+        raise ErreurSync(f"Chemin refusé : {rel}")
+    return rel
+
+
+def _hash_fichier(chemin):
+    h = hashlib.sha1()
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(65536), b""):
+            h.update(bloc)
+    return h.hexdigest()
+
+
+def empreinte_manifeste(fichiers):
+    """Empreinte globale : deux arbres identiques ont la même"""
+    h = hashlib.sha1()
+    for rel in sorted(fichiers):
+        h.update(f"{rel}\0{fichiers[rel][0]}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+# --- MANIFESTE LOCAL ---
+
+class Manifeste:
+    """
+    Manifeste {chemin relatif: (hash, mtime_ns)} d'un arbre SaveData
+    Le cache (taille, mtime) évite de re-hasher les fichiers inchangés
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = Path(base_dir)
+        self.chemin_cache = self.base_dir / FICHIER_CACHE
+        self.verrou = threading.Lock()
+
+    def _charger_cache(self):
+        try:
+            with open(self.chemin_cache, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def calculer(self):
+        """Parcourt l'arbre (stat seulement) et ne hash que le nouveau"""
+        with self.verrou:
+            cache = self._charger_cache()
+            fichiers = {}
+            nouveau_cache = {}
+            modifie = False
+
+            for dossier in DOSSIERS_SYNC:
+                chemin_dossier = self.base_dir / dossier
+                if not chemin_dossier.is_dir():
+                    continue
+                with os.scandir(chemin_dossier) as it:
+                    for entree in it:
+                        if entree.name.startswith(".") or not entree.is_file():
+                            continue
+                        st = entree.stat()
+                        rel = f"{dossier}/{entree.name}"
+                        connu = cache.get(rel)
+                        if connu and connu[1] == st.st_size and connu[2] == st.st_mtime_ns:
+                            h = connu[0]
+                        else:
+                            h = _hash_fichier(entree.path)
+                            modifie = True
+                        nouveau_cache[rel] = [h, st.st_size, st.st_mtime_ns]
+                        fichiers[rel] = (h, st.st_mtime_ns)
+
+            if modifie or len(nouveau_cache) != len(cache):
+                with open(self.chemin_cache, "w", encoding="utf-8") as f:
+                    json.dump(nouveau_cache, f)
+
+            return fichiers
+
+    # --- Accès fichiers (partagés par les transports) ---
+
+    def _verrou(self, rel):
+        """
+        Verrou de DroidMemory pour ce chemin : le dossier des recettes (où
+        sauvegarder_recette choisit ses noms), sinon le fichier lui-même
+        """
+        dossier = rel.partition("/")[0]
+        if dossier == "recettes":
+            return verrou_fichier(self.base_dir / dossier)
+        return verrou_fichier(self.base_dir / rel)
+
+    def lire(self, rel):
+        with open(self.base_dir / _valider_chemin(rel), "rb") as f:
+            return f.read()
+
+    def ecrire(self, rel, contenu, mtime_ns):
+        """Écriture atomique sous verrou, en conservant la date de l'appareil d'origine"""
+        cible = self.base_dir / _valider_chemin(rel)
+        cible.parent.mkdir(parents=True, exist_ok=True)
+        # Octets copiés tels quels : le fichier garde le même hash des deux côtés
+        with self._verrou(rel):
+            _ecrire_octets(cible, contenu)
+            os.utime(cible, ns=(mtime_ns, mtime_ns))
+
+    def supprimer(self, rel):
+        cible = self.base_dir / _valider_chemin(rel)
+        with self._verrou(rel):
+            if cible.exists():
+                os.remove(cible)
+
+
+# --- TRANSPORTS ---
+
+class TransportDossier:
+    """Pair = un autre arbre SaveData (clé USB, partage réseau...)"""
+
+    def __init__(self, chemin):
+        self.manifeste_distant = Manifeste(chemin)
+        self.identifiant = str(Path(chemin).resolve())
+        # Pas d'appareil derrière un dossier : son nom le désigne
+        self.appareil = Path(self.identifiant).name or "dossier"
+
+    def manifeste(self):
+        return self.manifeste_distant.calculer()
+
+    def lire(self, rel):
+        return self.manifeste_distant.lire(rel)
+
+    def ecrire(self, rel, contenu, mtime_ns):
+        self.manifeste_distant.ecrire(rel, contenu, mtime_ns)
+
+    def supprimer(self, rel):
+        self.manifeste_distant.supprimer(rel)
+
+
+class TransportHTTP:
+    """
+    Pair = un autre appareil exposant ServeurSync (connexion keep-alive)
+    Le jeton d'appairage est passé en argument ou dans l'URL (http://jeton@ip:port)
+    """
+
+    def __init__(self, url, jeton=None, timeout=10):
+        parsed = urlparse(url)
+        self.hote = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or PORT_SYNC
+        self.identifiant = f"http://{self.hote}:{self.port}"
+        self.jeton = jeton or unquote(parsed.username or "")
+        if not self.jeton:
+            raise ErreurSync("Jeton d'appairage manquant (http://jeton@ip:port)")
+        self.appareil = self.hote
+        self.timeout = timeout
+        self.connexion = None
+
+    def _requete(self, methode, chemin, corps=None):
+        for tentative in (1, 2):
+            if self.connexion is None:
+                self.connexion = http.client.HTTPConnection(self.hote, self.port, timeout=self.timeout)
+            try:
+                self.connexion.request(methode, chemin, body=corps,
+                                       headers={"Authorization": f"Bearer {self.jeton}"})
+                reponse = self.connexion.getresponse()
+                data = reponse.read()
+            except (OSError, http.client.HTTPException) as e:
+                # Connexion keep-alive fermée par le pair : on réessaie une fois
+                self.connexion.close()
+                self.connexion = None
+                if tentative == 2:
+                    raise ErreurSync(f"Pair injoignable : {e}")
+                continue
+            if reponse.status == 401:
+                raise ErreurSync("Jeton d'appairage refusé par le pair")
+            if reponse.status >= 400:
+                raise ErreurSync(f"{methode} {chemin} : HTTP {reponse.status}")
+            self.derniere_reponse = reponse
+            return data
+
+    def manifeste(self):
+        data = json.loads(self._requete("GET", "/manifeste"))
+        appareil = self.derniere_reponse.getheader(ENTETE_APPAREIL)
+        if appareil:
+            self.appareil = unquote(appareil)
+        return {rel: tuple(v) for rel, v in data.items()}
+
+    def lire(self, rel):
+        return self._requete("GET", f"/fichier?chemin={quote(rel)}")
+
+    def ecrire(self, rel, contenu, mtime_ns):
+        self._requete("PUT", f"/fichier?chemin={quote(rel)}&mtime={mtime_ns}", contenu)
+
+    def supprimer(self, rel):
+        self._requete("DELETE", f"/fichier?chemin={quote(rel)}")
+
+    def fermer(self):
+        if self.connexion:
+            self.connexion.close()
+            self.connexion = None
+
+
+def creer_transport(cible, jeton=None):
+    """Dossier local ou URL http:// selon la saisie"""
+    if str(cible).startswith("http://"):
+        return TransportHTTP(cible, jeton)
+    if not Path(cible).is_dir():
+        raise ErreurSync(f"Dossier introuvable : {cible}")
+    return TransportDossier(cible)
+
+
+# --- SERVEUR (appareil pair) ---
+
+class _GestionnaireSync(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # En-têtes et corps partent en deux écritures : sans ça, 40 ms par requête
+    disable_nagle_algorithm = True
+    manifeste = None
+    jeton = None
+    appareil = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _repondre(self, statut, corps=b"", type_contenu="application/octet-stream"):
+        self.send_response(statut)
+        self.send_header("Content-Type", type_contenu)
+        self.send_header("Content-Length", str(len(corps)))
+        self.send_header(ENTETE_APPAREIL, quote(self.appareil))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def _parametres(self):
+        parsed = urlparse(self.path)
+        params = {k: unquote(v[0]) for k, v in parse_qs(parsed.query).items()}
+        return parsed.path, params
+
+    def _autorise(self):
+        """Jeton d'appairage exigé pour toute méthode ; sinon 401 et connexion fermée"""
+        attendu = f"Bearer {self.jeton}".encode("utf-8")
+        recu = self.headers.get("Authorization", "").encode("utf-8")
+        if hmac.compare_digest(recu, attendu):
+            return True
+        # Corps éventuel non lu : la connexion ne peut pas resservir
+        self.close_connection = True
+        self._repondre(401)
+        return False
+
+    def do_GET(self):
+        if not self._autorise():
+            return
+        route, params = self._parametres()
+        try:
+            if route == "/manifeste":
+                corps = json.dumps(self.manifeste.calculer()).encode("utf-8")
+                return self._repondre(200, corps, "application/json")
+            if route == "/fichier":
+                return self._repondre(200, self.manifeste.lire(params.get("chemin", "")))
+        except ErreurSync:
+            return self._repondre(403)
+        except OSError:
+            return self._repondre(404)
+        self._repondre(404)
+
+    def do_PUT(self):
+        if not self._autorise():
+            return
+        route, params = self._parametres()
+        taille = int(self.headers.get("Content-Length", 0))
+        contenu = self.rfile.read(taille)
+        if route != "/fichier":
+            return self._repondre(404)
+        try:
+            self.manifeste.ecrire(params.get("chemin", ""), contenu, int(params.get("mtime", 0)))
+        except ErreurSync:
+            return self._repondre(403)
+        except OSError as e:
+            # Disque plein, droits... : le client doit le savoir
+            return self._repondre(500, str(e).encode("utf-8"), "text/plain; charset=utf-8")
+        self._repondre(204)
+
+    def do_DELETE(self):
+        if not self._autorise():
+            return
+        route, params = self._parametres()
+        if route != "/fichier":
+            return self._repondre(404)
+        try:
+            self.manifeste.supprimer(params.get("chemin", ""))
+        except ErreurSync:
+            return self._repondre(403)
+        except OSError as e:
+            return self._repondre(500, str(e).encode("utf-8"), "text/plain; charset=utf-8")
+        self._repondre(204)
+
+
+class ServeurSync:
+    """
+    Expose le SaveData local aux autres appareils (thread de fond)
+    Écoute 127.0.0.1 par défaut : hote="0.0.0.0" pour le réseau local
+    Chaque requête doit porter le jeton d'appairage (tiré au hasard si absent)
+    """
+
+    def __init__(self, base_dir, hote="127.0.0.1", port=PORT_SYNC, jeton=None, appareil=None):
+        self.jeton = jeton or secrets.token_urlsafe(12)
+        gestionnaire = type("GestionnaireSync", (_GestionnaireSync,), {
+            "manifeste": Manifeste(base_dir),
+            "jeton": self.jeton,
+            "appareil": appareil or platform.node() or "droid",
+        })
+        self.serveur = ThreadingHTTPServer((hote, port), gestionnaire)
+        self.serveur.daemon_threads = True
+        self.thread = None
+
+    @property
+    def adresse(self):
+        hote, port = self.serveur.server_address[:2]
+        return f"http://{hote}:{port}"
+
+    def demarrer(self):
+        self.thread = threading.Thread(target=self.serveur.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def arreter(self):
+        self.serveur.shutdown()
+        self.serveur.server_close()
+
+
+# --- SYNCHRONISATION ---
+
+def _nom_conflit(rel, appareil):
+    dossier, _, nom = rel.partition("/")
+    base, point, ext = nom.rpartition(".")
+    if not point:
+        base, ext = nom, ""
+    date_str = datetime.now().strftime("%Y%m%d_%H%M")
+    suffixe = f" (conflit {appareil} {date_str})"
+    return f"{dossier}/{base}{suffixe}{point}{ext}"
+
+
+class Synchroniseur:
+    """
+    Synchronisation bidirectionnelle par comparaison de manifestes
+    - seul ce qui a changé depuis la dernière synchro est transféré
+    - conflit (modifié des deux côtés) : le plus récent gagne,
+      l'autre version est conservée en copie de conflit ; les catalogues
+      sont fusionnés entrée par entrée (une copie ne serait jamais lue)
+    """
+
+    def __init__(self, memory, transport, appareil=None):
+        self.memory = memory
+        self.local = Manifeste(memory.base_dir)
+        self.transport = transport
+        self.appareil = appareil or platform.node() or "droid"
+        cle = hashlib.sha1(transport.identifiant.encode("utf-8")).hexdigest()[:12]
+        self.chemin_etat = Path(memory.base_dir) / f"{PREFIXE_ETAT}{cle}.json"
+
+    def _charger_etat(self):
+        try:
+            with open(self.chemin_etat, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"empreinte": None, "base": {}}
+
+    def _sauver_etat(self, fichiers):
+        etat = {
+            "empreinte": empreinte_manifeste(fichiers),
+            "base": {rel: v[0] for rel, v in fichiers.items()},
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M")
+        }
+        with open(self.chemin_etat, "w", encoding="utf-8") as f:
+            json.dump(etat, f)
+
+    def _pull(self, rel, mtime):
+        self.local.ecrire(rel, self.transport.lire(rel), mtime)
+
+    def _push(self, rel, mtime):
+        self.transport.ecrire(rel, self.local.lire(rel), mtime)
+
+    def synchroniser(self):
+        """Lance une synchro complète, retourne le rapport"""
+        rapport = {"envoyes": 0, "recus": 0, "supprimes_local": 0,
+                   "supprimes_distant": 0, "conflits": 0, "fusions": 0, "inchange": False}
+
+        local = self.local.calculer()
+        distant = self.transport.manifeste()
+        etat = self._charger_etat()
+
+        # Chemin rapide : arbres identiques, seule la comparaison a coûté
+        if empreinte_manifeste(local) == empreinte_manifeste(distant):
+            rapport["inchange"] = True
+            if etat.get("empreinte") != empreinte_manifeste(local):
+                self._sauver_etat(local)
+            return rapport
+
+        base = etat.get("base", {})
+
+        for rel in sorted(set(local) | set(distant)):
+            l = local.get(rel)
+            d = distant.get(rel)
+            b = base.get(rel)
+
+            if l and d and l[0] == d[0]:
+                continue
+
+            if l and not d:
+                if b == l[0]:
+                    self.local.supprimer(rel)
+                    rapport["supprimes_local"] += 1
+                else:
+                    self._push(rel, l[1])
+                    rapport["envoyes"] += 1
+                continue
+
+            if d and not l:
+                if b == d[0]:
+                    self.transport.supprimer(rel)
+                    rapport["supprimes_distant"] += 1
+                else:
+                    self._pull(rel, d[1])
+                    rapport["recus"] += 1
+                continue
+
+            if b == d[0]:
+                self._push(rel, l[1])
+                rapport["envoyes"] += 1
+            elif b == l[0]:
+                self._pull(rel, d[1])
+                rapport["recus"] += 1
+            elif rel.startswith("resources/") and rel.partition("/")[2] in RESSOURCES:
+                self._fusionner_catalogue(rel, l, d)
+                rapport["fusions"] += 1
+            else:
+                self._resoudre_conflit(rel, l, d)
+                rapport["conflits"] += 1
+
+        self._sauver_etat(self.local.calculer())
+        return rapport
+
+    def _fusionner_catalogue(self, rel, l, d):
+        """
+        Catalogue modifié des deux côtés : union par nom d'entrée (même nom :
+        la version du fichier le plus récent), écrite sous verrou par
+        mettre_a_jour_ressource puis renvoyée au pair
+        """
+        fichier = rel.partition("/")[2]
+        racine, cle = RESSOURCES[fichier]
+        try:
+            distant = json.loads(self.transport.lire(rel))
+        except ValueError:
+            # Catalogue distant illisible : la version locale le remplace
+            distant = {}
+        entrants = distant.get(racine, []) if isinstance(distant, dict) else []
+        local_gagne = l[1] >= d[1]
+
+        def fusionner(items):
+            index = {item.get(cle): i for i, item in enumerate(items)}
+            for item in entrants:
+                nom = item.get(cle) if isinstance(item, dict) else None
+                if not nom:
+                    continue
+                if nom not in index:
+                    index[nom] = len(items)
+                    items.append(item)
+                elif not local_gagne:
+                    items[index[nom]] = item
+            return items
+
+        self.memory.mettre_a_jour_ressource(fichier, fusionner)
+        self._push(rel, os.stat(self.local.base_dir / rel).st_mtime_ns)
+
+    def _resoudre_conflit(self, rel, l, d):
+        """
+        Dernier écrivain gagnant + copie de conflit des deux côtés,
+        nommée d'après l'appareil dont la version a perdu
+        """
+        if l[1] >= d[1]:
+            copie = _nom_conflit(rel, self.transport.appareil)
+            perdant = self.transport.lire(rel)
+            self.local.ecrire(copie, perdant, d[1])
+            self.transport.ecrire(copie, perdant, d[1])
+            self._push(rel, l[1])
+        else:
+            copie = _nom_conflit(rel, self.appareil)
+            perdant = self.local.lire(rel)
+            self.local.ecrire(copie, perdant, l[1])
+            self.transport.ecrire(copie, perdant, l[1])
+            self._pull(rel, d[1])
+
+
+def synchroniser(memory, cible, appareil=None, jeton=None):
+    """Raccourci : synchronise SaveData avec un dossier ou une URL"""
+    transport = creer_transport(cible, jeton)
+    try:
+        return Synchroniseur(memory, transport, appareil).synchroniser()
+    finally:
+        if isinstance(transport, TransportHTTP):
+            transport.fermer()
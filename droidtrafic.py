@@ -0,0 +1,229 @@
+import asyncio
+import json
+import time
+import types
+
+from flet_core.connection import Connection
+from flet_core.protocol import (
+    CommandEncoder,
+    PageCommandResponsePayload,
+    PageCommandsBatchResponsePayload,
+)
+
+
+class ConnexionEnregistreuse(Connection):
+    """
+    Connexion Flet sans client : compte ce que la page enverrait au client
+    (octets JSON, contrôles ajoutés, contrôles modifiés) sans rien afficher
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.prochain_id = 1
+        self.remise_a_zero()
+
+    def remise_a_zero(self):
+        self.octets = 0
+        self.envois = 0
+        self.ajoutes = 0
+        self.modifies = 0
+        self.retires = 0
+
+    def releve(self):
+        return {
+            "octets": self.octets, "envois": self.envois, "ajoutes": self.ajoutes,
+            "modifies": self.modifies, "retires": self.retires,
+        }
+
+    def _compter(self, commandes):
+        self.envois += 1
+        self.octets += len(json.dumps(commandes, cls=CommandEncoder, separators=(",", ":")))
+
+    def send_command(self, session_id, command):
+        self._compter([command])
+        return PageCommandResponsePayload(result="", error="")
+
+    def send_commands(self, session_id, commands):
+        if not commands:
+            return PageCommandsBatchResponsePayload(results=[], error="")
+        self._compter(commands)
+
+        resultats = []
+        for commande in commands:
+            if commande.name == "add":
+                # Un identifiant par contrôle ajouté (le contrôle et ses enfants)
+                ids = []
+                for _ in commande.commands:
+                    ids.append(f"_{self.prochain_id}")
+                    self.prochain_id += 1
+                self.ajoutes += len(ids)
+                resultats.append(" ".join(ids))
+            elif commande.name == "set":
+                self.modifies += 1
+            elif commande.name == "remove":
+                self.retires += len(commande.values)
+        return PageCommandsBatchResponsePayload(results=resultats, error="")
+
+
+def page_enregistreuse(boucle=None):
+    """Vraie ft.Page branchée sur une ConnexionEnregistreuse"""
+    import flet as ft
+
+    connexion = ConnexionEnregistreuse()
+    page = ft.Page(connexion, "mesure", boucle or asyncio.new_event_loop())
+    if not hasattr(page, "window"):
+        # Flet 0.21 : pas encore d'objet page.window
+        page.window = types.SimpleNamespace(maximized=False)
+    return page, connexion
+
+
+# Un ajout d'huile ne renvoie que sa ligne : son coût ne grandit pas avec la liste
+CROISSANCE_MAX_AJOUT = 1.5
+
+
+# Parcours type : (étape, action sur l'application)
+PARCOURS = [
+    ("Mode %", lambda app: app.changer_mode("%")),
+    ("Mode Poids", lambda app: app.changer_mode("Poids")),
+    ("Fenêtre 2", lambda app: app.afficher_fenetre_2()),
+    ("Fenêtre 3", lambda app: app.afficher_fenetre_3()),
+    ("Fenêtre 4", lambda app: app.afficher_fenetre_4()),
+    ("Assistant", lambda app: app.afficher_droid_assistant()),
+    ("Retour fenêtre 1", lambda app: app.afficher_fenetre_1()),
+    ("Fenêtre 2 (retour)", lambda app: app.afficher_fenetre_2()),
+    ("Fenêtre 3 (retour)", lambda app: app.afficher_fenetre_3()),
+    ("Fenêtre 4 (retour)", lambda app: app.afficher_fenetre_4()),
+]
+
+
+def _vider(app):
+    """Envoie les mises à jour regroupées en attente"""
+    planificateur = getattr(app, "maj", None)
+    if planificateur is not None:
+        planificateur.vider()
+
+
+def lancer_application(nb_huiles=2):
+    """Application sur page enregistreuse, avec une recette minimale valide"""
+    from main import SoapMakerApp
+
+    page, connexion = page_enregistreuse()
+    app = SoapMakerApp(page)
+    for huile in app.db_huiles[:nb_huiles]:
+        app.choix_huile.value = huile["nom"]
+        app.ajouter_huile()
+        app.maj_valeur_huile(huile["nom"], "500")
+    _vider(app)
+    return app, connexion
+
+
+def mesurer_navigation(parcours=PARCOURS):
+    """
+    Mesure le trafic de chaque étape du parcours
+    Retourne [(étape, relevé)]
+    """
+    app, connexion = lancer_application()
+
+    mesures = []
+    for etape, action in parcours:
+        connexion.remise_a_zero()
+        action(app)
+        _vider(app)
+        mesures.append((etape, connexion.releve()))
+    return mesures
+
+
+def mesurer_ajouts(nombre=30):
+    """
+    Ajoute une à une `nombre` huiles à la fenêtre 1
+    Retourne les octets envoyés pour chaque ajout
+    """
+    app, connexion = lancer_application(nb_huiles=0)
+    octets = []
+    for huile in app.db_huiles[:nombre]:
+        connexion.remise_a_zero()
+        app.choix_huile.value = huile["nom"]
+        app.ajouter_huile()
+        _vider(app)
+        octets.append(connexion.octets)
+    return octets
+
+
+def _threads_hors_audio():
+    import threading
+
+    return sum(1 for t in threading.enumerate() if not t.name.startswith("audio"))
+
+
+def mesurer_sessions(nombre=20, modes=("sync", "async")):
+    """
+    Démarre `nombre` sessions en même temps, comme le ferait Flet :
+    mode sync (un thread par session) et/ou mode async (une seule boucle)
+    Retourne {mode: (secondes, threads au pic hors thread audio)}
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from main import main, main_async
+
+    mesures = {}
+
+    if "sync" in modes:
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=nombre) as pool:
+            futurs = [pool.submit(main, page_enregistreuse()[0]) for _ in range(nombre)]
+            pic = _threads_hors_audio()
+            while not all(f.done() for f in futurs):
+                pic = max(pic, _threads_hors_audio())
+                time.sleep(0.001)
+            for futur in futurs:
+                futur.result()
+        mesures["sync"] = (time.perf_counter() - debut, pic)
+
+    async def lancer_async():
+        boucle = asyncio.get_running_loop()
+        taches = [asyncio.create_task(main_async(page_enregistreuse(boucle)[0])) for _ in range(nombre)]
+        pic = _threads_hors_audio()
+        while not all(t.done() for t in taches):
+            pic = max(pic, _threads_hors_audio())
+            await asyncio.sleep(0.001)
+        for tache in taches:
+            tache.result()
+        return pic
+
+    if "async" in modes:
+        debut = time.perf_counter()
+        pic = asyncio.run(lancer_async())
+        mesures["async"] = (time.perf_counter() - debut, pic)
+    return mesures
+
+
+if __name__ == "__main__":
+    # python droidtrafic.py  -> trafic Flet des écrans de main.py ; code 1 si :
+    # un écran déjà visité est reconstruit, un ajout d'huile renvoie toute la
+    # liste, ou le mode async démarre un thread par session
+    import sys
+
+    echecs = []
+    mesures = mesurer_navigation()
+    print(f"\n{'Étape':<22}{'octets':>10}{'envois':>8}{'ajoutés':>9}{'modifiés':>10}{'retirés':>9}")
+    for etape, r in mesures:
+        print(f"{etape:<22}{r['octets']:>10}{r['envois']:>8}{r['ajoutes']:>9}{r['modifies']:>10}{r['retires']:>9}")
+        if "retour" in etape.casefold() and r["ajoutes"]:
+            echecs.append(f"{etape} : {r['ajoutes']} contrôles recréés")
+    total = sum(r["octets"] for _, r in mesures)
+    print(f"{'TOTAL':<22}{total:>10}")
+
+    octets = mesurer_ajouts()
+    print(f"\nAjout d'huile : 2e {octets[1]} octets, {len(octets)}e {octets[-1]} octets")
+    if octets[-1] > octets[1] * CROISSANCE_MAX_AJOUT:
+        echecs.append(f"ajout d'huile : {octets[1]} -> {octets[-1]} octets avec la longueur de la liste")
+
+    nombre = 20
+    for mode, (secondes, threads) in mesurer_sessions(nombre).items():
+        print(f"{nombre} sessions ({mode}) : {secondes * 1000:.0f} ms, {threads} threads en plus au pic")
+        if mode == "async" and threads >= nombre:
+            echecs.append(f"mode async : {threads} threads pour {nombre} sessions")
+
+    if echecs:
+        print(f"❌ {' ; '.join(echecs)}")
+        sys.exit(1)
+    print("✅ Écrans gardés, ajouts ciblés, sessions async sur une seule boucle")
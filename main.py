@@ -1,80 +1,291 @@
+import time
+
+# Origine de la chronologie de démarrage (avant les imports lourds)
+T0_DEMARRAGE = time.perf_counter()
+
 import flet as ft
 import os
-import webbrowser
-import time
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from functools import partial
 from urllib.parse import quote
-from droidmemory import DroidMemory
+from droidmemory import DroidMemory, fpdf
+from droidarchive import exporter_archive, importer_archive, exporter_csv_analyse, POLITIQUES, POLITIQUE_RENOMMER
+from droidcatalogue import importer_catalogue, ImportCatalogueInvalide, TYPES_RESSOURCE
+from droidpartage import encoder_code_partage, decoder_code_partage, CodePartageInvalide, LIMITE_MAILTO
+
+from droiddiffere import ModuleDiffere, prechauffer
+from droidson import son_partage, SONS_PAR_ECRAN
+from droidaffichage import PlanificateurMaj
+from droidoverlay import GestionnaireOverlay
+from droidrecherche import replier, TOP_K
+from droidregistre import registre_catalogues
+from droidetat import EtatRecette, LIMITES_AJOUTS
+from droidinstruments import instruments, instrumenter
+
+# Synchro (http.server, http.client...) : rarement utilisée
+droidsync = ModuleDiffere("droidsync")
+
+# Préchauffage des modules différés une fois l'interface affichée
+PRECHAUFFER_MODULES = True
+
 
-# Tentative d'import pygame (optionnel pour PC)
-try:
-    import pygame
-    PYGAME_AVAILABLE = True
-except ImportError:
-    PYGAME_AVAILABLE = False
+def lire_quantite(texte):
+    """Quantité saisie ('', '-' ou '.' en cours de frappe = 0) ; ValueError si illisible"""
+    if texte in ["", "-", "."]:
+        return 0.0
+    return float(texte.replace(",", "."))
 
 
-class SoundManager:
-    """Gestionnaire audio multi-plateforme"""
+class ChronologieDemarrage:
+    """Journal horodaté des étapes de démarrage (time-to-interactive)"""
     
-    def __init__(self, page: ft.Page):
-        self.page = page
-        self.mode = "SILENT"
-        self.library = {}
-        
-        # Détection et initialisation du moteur audio
-        if PYGAME_AVAILABLE:
-            try:
-                pygame.mixer.init()
-                self.mode = "PYGAME"
-                print("🎵 Mode audio : Pygame (PC)")
-            except Exception as e:
-                print(f"⚠️ Pygame init échoué: {e}")
-        
-        # Liste des fichiers sons
-        self.fichiers = {
-            "beep": "droid_beep.mp3",
-            "save": "droid_save.mp3",
-            "beep2": "droid_beep2.mp3",
-            "ordre66": "droid_66.mp3",
-            "laught": "droid_laught.mp3",
-            "dial2": "droid_dial2.mp3",
-            "error": "error_sound.mp3",
-            "old": "old_droid.mp3",
-            "send": "droid_send.mp3",
-        }
-        
-        self._charger_sons()
+    def __init__(self, t0):
+        self.t0 = t0
+        self.evenements = []
+        self.verrou = threading.Lock()
     
-    def _charger_sons(self):
-        """Charge les sons selon le moteur disponible"""
-        if self.mode == "PYGAME":
-            for nom, fichier in self.fichiers.items():
-                chemin = f"assets/sounds/{fichier}"
-                if os.path.exists(chemin):
-                    try:
-                        sound = pygame.mixer.Sound(chemin)
-                        sound.set_volume(0.7)
-                        self.library[nom] = sound
-                    except Exception as e:
-                        print(f"❌ Erreur chargement {nom}: {e}")
-        
-        print(f"✅ Sons chargés : {len(self.library)}")
+    def marquer(self, etape):
+        """Enregistre une étape, en ms depuis le lancement du processus"""
+        ms = (time.perf_counter() - self.t0) * 1000
+        with self.verrou:
+            self.evenements.append((etape, ms))
+        print(f"⏱️ {ms:8.1f} ms  {etape}")
+        return ms
+
+
+class SelecteurRecherche:
+    """
+    Recherche à la frappe dans un catalogue (remplace les Dropdown) :
+    seuls les meilleurs résultats sont affichés, dans un jeu fixe de boutons
+    """
+    
+    def __init__(self, chercher, maj, label="Rechercher", couleur=None, bgcolor=None, k=TOP_K):
+        self.chercher = chercher
+        self.maj = maj
+        self.value = None
+        self.noms = []
+        
+        style = ft.TextStyle(color=couleur) if couleur else None
+        self.champ = ft.TextField(
+            label=label,
+            label_style=style,
+            text_style=style,
+            bgcolor=bgcolor,
+            prefix_icon=ft.icons.SEARCH,
+            on_change=lambda e: self.filtrer(e.control.value),
+            on_focus=lambda e: self.filtrer(e.control.value),
+            on_submit=lambda e: self.choisir(0)
+        )
+        self.boutons = [
+            ft.TextButton(
+                visible=False,
+                style=ft.ButtonStyle(color=couleur) if couleur else None,
+                on_click=lambda e, i=i: self.choisir(i)
+            )
+            for i in range(k)
+        ]
+        self.resultats = ft.Column(self.boutons, spacing=0, visible=False)
+        self.controle = ft.Column([self.champ, self.resultats], spacing=2, expand=True)
+    
+    def filtrer(self, texte):
+        """Affiche les meilleures correspondances (les boutons sont réutilisés)"""
+        texte = texte or ""
+        self.noms = self.chercher(texte)
+        for i, bouton in enumerate(self.boutons):
+            bouton.visible = i < len(self.noms)
+            if bouton.visible:
+                bouton.text = self.noms[i]
+        self.resultats.visible = bool(self.noms)
+        
+        # Nom tapé en entier : déjà sélectionné
+        exact = self.noms and replier(self.noms[0]) == replier(texte.strip())
+        self.value = self.noms[0] if exact else None
+        self.maj.demander(self.resultats)
     
-    def play(self, nom_cle):
-        """Joue un son (si disponible)"""
-        if "66" in nom_cle:
-            nom_cle = "ordre66"
+    def choisir(self, i):
+        """Sélectionne le i-ème résultat"""
+        if i >= len(self.noms):
+            return
+        self.value = self.noms[i]
+        self.champ.value = self.value
+        self.resultats.visible = False
+        self.maj.demander(self.champ, self.resultats)
+    
+    def vider(self):
+        self.value = None
+        self.noms = []
+        self.champ.value = ""
+        self.resultats.visible = False
+        self.maj.demander(self.champ, self.resultats)
+
+
+class PanneauResultats:
+    """
+    Résultats en direct à côté des écrans (soude, liquides, poids, volume,
+    ajouts / maximums) : abonné à l'état, seuls les textes changés partent
+    """
+    
+    def __init__(self, etat, maj):
+        self.etat = etat
+        self.maj = maj
+        
+        self.txt_soude = ft.Text("", weight=ft.FontWeight.BOLD)
+        self.txt_liquide = ft.Text("")
+        self.txt_frais = ft.Text("")
+        self.txt_cure = ft.Text("")
+        self.txt_volume = ft.Text("")
+        self.txt_ajouts = {dico: ft.Text("", size=12) for dico in LIMITES_AJOUTS}
+        
+        self.details = ft.Column([
+            self.txt_soude,
+            self.txt_liquide,
+            ft.Divider(height=8),
+            self.txt_frais,
+            self.txt_cure,
+            self.txt_volume,
+            ft.Divider(height=8),
+            *self.txt_ajouts.values()
+        ], spacing=4)
+        
+        self.bouton = ft.IconButton(
+            icon=ft.icons.EXPAND_LESS,
+            icon_size=18,
+            on_click=lambda e: self.basculer()
+        )
+        self.controle = ft.Container(
+            content=ft.Column([
+                ft.Row([
+                    ft.Text("Résultats", size=16, weight=ft.FontWeight.BOLD, font_family="staround"),
+                    self.bouton
+                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                self.details
+            ], spacing=6),
+            width=230,
+            padding=10,
+            bgcolor=ft.colors.BLUE_GREY_900,
+            border_radius=8
+        )
         
-        if self.mode == "PYGAME" and nom_cle in self.library:
-            try:
-                self.library[nom_cle].play()
-            except Exception as e:
-                print(f"⚠️ Erreur lecture {nom_cle}: {e}")
+        self.etat.abonner(
+            ["chimie"] + [f"{nom}_{dico}" for dico in LIMITES_AJOUTS for nom in ("total", "max")],
+            self.rafraichir
+        )
+        self.rafraichir()
+    
+    def basculer(self):
+        """Replie / déplie le détail"""
+        self.details.visible = not self.details.visible
+        self.bouton.icon = ft.icons.EXPAND_LESS if self.details.visible else ft.icons.EXPAND_MORE
+        self.maj.demander(self.controle)
+    
+    def rafraichir(self):
+        res = self.etat.lire("chimie")
+        if not res:
+            self.txt_soude.value = "NaOH : -"
+            self.txt_liquide.value = "Liquide : -"
+            self.txt_frais.value = "Pâte fraîche : -"
+            self.txt_cure.value = "Après cure : -"
+            self.txt_volume.value = "Moule : -"
+        else:
+            self.txt_soude.value = f"NaOH : {res['poids_soude']:.1f} g"
+            liquide = f"Liquide : {res['poids_liquide_total']:.1f} g"
+            if res["poids_substitut"] > 0:
+                liquide += f"\n  eau {res['poids_eau']:.1f} + substitut {res['poids_substitut']:.1f}"
+            self.txt_liquide.value = liquide
+            self.txt_frais.value = f"Pâte fraîche : {res['total_frais']:.1f} g"
+            self.txt_cure.value = f"Après cure : ~{res['total_cure']:.1f} g"
+            self.txt_volume.value = f"Moule : ~{res['volume']:.0f} ml"
+        
+        poids_huiles = self.etat.lire("poids_huiles")
+        for dico, texte in self.txt_ajouts.items():
+            total = self.etat.lire(f"total_{dico}")
+            pct = (total / poids_huiles * 100) if poids_huiles > 0 else 0
+            titre = "Additifs" if dico == "additifs" else "HE"
+            texte.value = f"{titre} : {total:.1f} g ({pct:.1f}% / {LIMITES_AJOUTS[dico]}%)"
+            texte.color = ft.colors.RED if pct > LIMITES_AJOUTS[dico] else None
+        
+        self.maj.demander(self.details)
+
+
+class PanneauDiagnostics:
+    """
+    Section diagnostics de l'assistant : relevé des opérations mesurées
+    (écrans, page.update, disque, chimie, PDF), capture de profil à la
+    demande et export de la trace (JSON lisible par chrome://tracing)
+    """
+    
+    def __init__(self, memory, maj, afficher_info, afficher_erreur):
+        self.memory = memory
+        self.maj = maj
+        self.afficher_info = afficher_info
+        self.afficher_erreur = afficher_erreur
+        
+        self.txt_releve = ft.Text("", size=11, font_family="consolas", selectable=True, no_wrap=True)
+        self.txt_capture = ft.Text("", size=11, font_family="consolas", selectable=True, no_wrap=True)
+        self.sw_memoire = ft.Switch(label="Allocations", value=False)
+        self.bouton_capture = ft.OutlinedButton(
+            "PROFILER",
+            icon=ft.icons.PLAY_ARROW,
+            on_click=lambda e: self.basculer_capture()
+        )
+        self.controle = ft.Column([
+            ft.Text("📈 DIAGNOSTICS", weight=ft.FontWeight.BOLD, color=ft.colors.GREEN),
+            ft.Container(
+                content=ft.Column([self.txt_releve, self.txt_capture], scroll=ft.ScrollMode.AUTO),
+                height=240,
+                padding=8,
+                border=ft.border.all(1, ft.colors.GREEN_900),
+                border_radius=10
+            ),
+            ft.Row([
+                ft.IconButton(icon=ft.icons.REFRESH, on_click=lambda e: self.rafraichir(), tooltip="Actualiser"),
+                self.bouton_capture,
+                self.sw_memoire
+            ]),
+            ft.OutlinedButton(
+                "EXPORTER LA TRACE (JSON / Chrome)",
+                icon=ft.icons.TIMELINE,
+                on_click=lambda e: self.exporter(),
+                expand=True
+            )
+        ])
+        self.rafraichir(envoyer=False)
+    
+    def rafraichir(self, envoyer=True):
+        self.txt_releve.value = instruments.tableau()
+        if envoyer:
+            self.maj.demander(self.controle)
+    
+    def basculer_capture(self):
+        """Démarre la capture cProfile (et tracemalloc si demandé) ou l'arrête et l'affiche"""
+        if instruments.capture is None:
+            instruments.demarrer_capture(memoire=self.sw_memoire.value)
+            self.bouton_capture.text = "ARRÊTER"
+            self.bouton_capture.icon = ft.icons.STOP
+            self.txt_capture.value = "Capture en cours : reproduis la lenteur puis ARRÊTER"
+        else:
+            resultat = instruments.arreter_capture()
+            self.bouton_capture.text = "PROFILER"
+            self.bouton_capture.icon = ft.icons.PLAY_ARROW
+            self.txt_capture.value = instruments.texte_capture(resultat) if resultat else ""
+        self.rafraichir()
+    
+    def exporter(self):
+        nom = f"diagnostic_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        try:
+            self.memory.exports_dir.mkdir(parents=True, exist_ok=True)
+            chemin = instruments.exporter(self.memory.exports_dir / nom)
+        except OSError as ex:
+            self.afficher_erreur("Diagnostics", str(ex))
+            return
+        self.afficher_info("Diagnostics", f"Trace écrite (chrome://tracing, ui.perfetto.dev) :\n{chemin}")
 
 
 class SoapMakerApp:
-    def __init__(self, page: ft.Page):
+    def __init__(self, page: ft.Page, boucle=None, dossier=None):
         self.page = page
         self.page.title = "SoapMaker - Droid Edition"
         self.page.window.maximized = True
@@ -90,19 +301,28 @@ class SoapMakerApp:
         }
         self.page.theme = ft.Theme(font_family="consolas")
         
+        # Mises à jour regroupées (une par image, sous-arbres modifiés seulement)
+        # boucle : boucle asyncio du mode async (minuteurs en asyncio.sleep)
+        self.maj = PlanificateurMaj(self.page, boucle=boucle)
+        
+        # Messages et boîtes de dialogue réutilisés (overlay borné)
+        self.overlays = GestionnaireOverlay(self.page, boucle=boucle)
+        
         # Initialisation des données
         self.db_huiles = []
         self.db_additifs = []
         self.db_he = []
         self.sap_values = {}
-        self.recette = {}
+        
+        # Recette courante et grandeurs qui en dérivent (voir droidetat)
+        self.etat = EtatRecette(sap_values=self.sap_values)
         
         # Éléments UI
         self.logo = None
         self.entry_nom = None
         self.radio_mode = None
         self.entry_poids_total = None
-        self.combo_huiles = None
+        self.choix_huile = None
         self.liste_huiles = None
         self.label_total = None
         
@@ -120,25 +340,97 @@ class SoapMakerApp:
         self.res_soude = None
         self.res_eau = None
         self.res_sub = None
-        self.poids_ref = 0.0
-        
-        # Services
-        self.sound_manager = SoundManager(self.page)
-        self.memory = DroidMemory()
         
-        # Chargement
-        self.charger_toutes_les_bases()
+        # Fenêtres 3, 4 et assistant
+        self.cartouches = {}
+        self.txt_episode_4 = None
+        self.txt_resume = None
+        self.zone_memoire = None
+        self.content_memoire = None
+        self.fichiers_memoire = None
+        
+        # Écrans construits une seule fois, puis simplement affichés/masqués
+        self.vues = {}
+        self.ecran_courant = None
+        self.zone_ecrans = None
+        self.panneau_resultats = None
+        self.panneau_diagnostics = None
+        self.catalogues = None
+        self.version_bases = 0
+        self.versions_vues = {}
+        
+        # Lignes d'ingrédients par liste, indexées par nom (voir reconcilier_lignes)
+        self.lignes = {"corps_gras": {}, "additifs": {}, "he": {}}
+        self.versions_lignes = {}
+        
+        # Synchro entre appareils
+        self.serveur_sync = None
+        
+        # Services (initialisés en parallèle pendant le splash)
+        self.chronologie = ChronologieDemarrage(T0_DEMARRAGE)
+        # dossier : SaveData à utiliser (défaut : celui de l'utilisateur)
+        self.memory = DroidMemory(differer_init=True, base_dir=dossier)
+        # Catalogues et sons partagés par toutes les sessions du processus
+        self.registre = registre_catalogues(self.memory)
+        self.registre.abonner(self.catalogues_changes)
+        self.sound_manager = son_partage(self.memory.base_dir / "cache" / "sons")
         self.reset_recette_courante()
         
-        # Démarrage
-        self.afficher_splashscreen()
+        self.demarrer()
     
     # ============ SPLASHSCREEN ===============================================
     
-    def afficher_splashscreen(self):
-        """Affiche le splash avec animation simple"""
-        self.page.controls.clear()
+    def demarrer(self):
+        """Splash puis services (voir SoapMakerAppAsync pour le mode asyncio)"""
+        self.afficher_splashscreen()
+        self.demarrer_services()
+    
+    def demarrer_services(self):
+        """
+        Lance dossiers, catalogues et sons en parallèle pendant le splash
+        Passe à la fenêtre 1 dès que le critique (dossiers + catalogues) est prêt,
+        les sons finissent de se charger en arrière-plan
+        """
+        executor = ThreadPoolExecutor(max_workers=5, thread_name_prefix="demarrage")
+        
+        def etape(nom, fonction, *args):
+            resultat = fonction(*args)
+            self.chronologie.marquer(nom)
+            return resultat
+        
+        # Catalogues : lus une seule fois par processus (instantanés aux sessions suivantes)
+        critiques = {
+            "dossiers": executor.submit(etape, "Dossiers SaveData prêts", self.memory.preparer_dossiers),
+            "huiles": executor.submit(etape, "Catalogue huiles chargé", self.registre.lire, "huiles.json"),
+            "additifs": executor.submit(etape, "Catalogue additifs chargé", self.registre.lire, "additifs.json"),
+            "he": executor.submit(etape, "Catalogue HE chargé", self.registre.lire, "addons_he.json"),
+        }
+        # Non critique : l'interface fonctionne en silence en attendant
+        executor.submit(etape, "Moteur audio prêt (arrière-plan)", self.sound_manager.demarrer)
+        executor.shutdown(wait=False)
+        
+        wait(critiques.values())
+        try:
+            for futur in critiques.values():
+                futur.result()
+            self.appliquer_catalogues(self.registre.courant())
+        except Exception as e:
+            print(f"⚠️ Démarrage dégradé : {e}")
+            self.charger_toutes_les_bases()
         
+        self.afficher_fenetre_1()
+        self.maj.vider()
+        self.chronologie.marquer("Fenêtre 1 interactive")
+        
+        # Index de recherche prêts avant la première frappe
+        threading.Thread(target=self.preparer_index, name="index", daemon=True).start()
+        
+        # Modules rares (export PDF) importés après le premier affichage
+        if PRECHAUFFER_MODULES:
+            prechauffer(fpdf)
+    
+    def afficher_splashscreen(self):
+        """Affiche le splash pendant le chargement des services"""
         self.logo = ft.Image(
             src="logo_titre.png",
             width=320,
@@ -159,36 +451,155 @@ class SoapMakerApp:
             expand=True
         )
         
-        self.page.add(
-            ft.Container(
-                content=splash,
-                expand=True,
-                alignment=ft.alignment.center
-            )
-        )
-        self.page.update()
-        
-        # Animation simple sans async
-        time.sleep(2)
-        self.afficher_fenetre_1()
+        self.afficher_vue("splash", lambda: ft.Container(
+            content=splash,
+            expand=True,
+            alignment=ft.alignment.center
+        ))
+        with instruments.mesure("page.update"):
+            self.page.update()
+        self.chronologie.marquer("Splash affiché")
     
     # ============ UTILITAIRES ============
     
+    def afficher_vue(self, ecran, construire):
+        """
+        Affiche un écran : construit au premier passage puis conservé,
+        la navigation ne fait que basculer la visibilité (pas de renvoi de l'arbre)
+        """
+        if ecran != "splash" and "splash" in self.vues:
+            self.page.controls.remove(self.vues.pop("splash"))
+        
+        vue = self.vues.get(ecran)
+        if vue is None:
+            vue = construire()
+            self.vues[ecran] = vue
+            self.conteneur_ecran(ecran).append(vue)
+        
+        for nom, autre in self.vues.items():
+            autre.visible = (nom == ecran)
+        self.ecran_courant = ecran
+        return vue
+    
+    def conteneur_ecran(self, ecran):
+        """
+        Où ranger un écran : la page pour le splash, sinon la zone des écrans,
+        créée au premier passage avec le panneau de résultats à côté
+        """
+        if ecran == "splash":
+            return self.page.controls
+        
+        if self.zone_ecrans is None:
+            self.zone_ecrans = ft.Column(spacing=0, expand=True)
+            self.panneau_resultats = PanneauResultats(self.etat, self.maj)
+            self.page.controls.append(ft.Row(
+                [self.zone_ecrans, self.panneau_resultats.controle],
+                vertical_alignment=ft.CrossAxisAlignment.START,
+                expand=True
+            ))
+        return self.zone_ecrans.controls
+    
+    def bases_changees(self, cle):
+        """Vrai si les catalogues ont changé depuis la dernière mise à jour de cet élément"""
+        if self.versions_vues.get(cle) == self.version_bases:
+            return False
+        self.versions_vues[cle] = self.version_bases
+        return True
+    
+    def reconcilier_lignes(self, cle, liste_widget, creer):
+        """
+        Aligne une liste affichée sur self.recette[cle], ligne par nom d'ingrédient :
+        une ligne existante est conservée (valeur corrigée sur place, focus intact),
+        seules les lignes ajoutées ou retirées sont envoyées au client
+        """
+        dico = self.recette[cle]
+        lignes = self.lignes[cle]
+        
+        # Catalogues modifiés : les infos affichées ont pu changer
+        if self.versions_lignes.get(cle) != self.version_bases:
+            lignes.clear()
+            self.versions_lignes[cle] = self.version_bases
+        
+        for nom in [n for n in lignes if n not in dico]:
+            del lignes[nom]
+        
+        for nom, val in dico.items():
+            ligne = lignes.get(nom)
+            if ligne is None:
+                lignes[nom] = creer(nom, val)
+                continue
+            try:
+                a_jour = lire_quantite(ligne["champ"].value) == val
+            except (ValueError, AttributeError):
+                a_jour = False
+            if not a_jour:
+                ligne["champ"].value = str(val)
+        
+        liste_widget.controls = [lignes[nom]["ligne"] for nom in dico]
+    
     def emettre_son(self, fichier):
         """Joue un son"""
         self.sound_manager.play(fichier)
     
+    def prechauffer_sons(self, ecran):
+        """Charge en fond les sons de l'écran affiché"""
+        self.sound_manager.prechauffer(SONS_PAR_ECRAN.get(ecran, []))
+    
     def charger_toutes_les_bases(self):
-        """Charge les bases de données JSON"""
-        data_huiles = self.memory.charger_json("huiles.json")
-        self.db_huiles = data_huiles.get("huiles", []) if isinstance(data_huiles, dict) else []
-        self.sap_values = {h["nom"]: h["sap_naoh"] for h in self.db_huiles}
-        
-        data_additifs = self.memory.charger_json("additifs.json")
-        self.db_additifs = data_additifs.get("additifs", []) if isinstance(data_additifs, dict) else []
-        
-        data_he = self.memory.charger_json("addons_he.json")
-        self.db_he = data_he.get("addons_he", []) if isinstance(data_he, dict) else []
+        """Relit les bases JSON pour tout le processus (chaque session est prévenue)"""
+        # Cette session est déjà dans son thread : catalogues installés tout de suite
+        self.resynchroniser_catalogues(self.registre.recharger())
+    
+    def appliquer_catalogues(self, catalogues):
+        """Installe un instantané des catalogues (partagé, jamais modifié sur place)"""
+        self.catalogues = catalogues
+        self.db_huiles = catalogues.huiles
+        self.db_additifs = catalogues.additifs
+        self.db_he = catalogues.he
+        self.sap_values = catalogues.sap
+        self.etat.changer_sap(self.sap_values)
+        self.version_bases = catalogues.version
+    
+    def catalogues_changes(self, catalogues):
+        """
+        Nouvelle version publiée (par cette session ou une autre) : appelé dans
+        le thread de l'écrivain, la resynchronisation est confiée à la session
+        """
+        self.page.run_thread(self.resynchroniser_catalogues, catalogues)
+    
+    def resynchroniser_catalogues(self, catalogues):
+        """Écran visible resynchronisé ; la recette ne change pas pendant la recopie"""
+        with self.etat.verrou:
+            # Deux versions rapprochées peuvent arriver dans le désordre
+            if catalogues.version <= self.version_bases:
+                return
+            self.appliquer_catalogues(catalogues)
+            synchroniser = {
+                "fenetre_1": self.synchroniser_fenetre_1,
+                "fenetre_2": self.synchroniser_fenetre_2,
+                "fenetre_3": self.synchroniser_fenetre_3,
+            }.get(self.ecran_courant)
+            if synchroniser:
+                synchroniser()
+                self.maj.demander(self.vues[self.ecran_courant])
+    
+    def index_catalogue(self, cle):
+        """Index de recherche d'une liste d'ingrédients (partagé par les sessions)"""
+        return self.catalogues.index(cle)
+    
+    def preparer_index(self):
+        """Construit les index de recherche en arrière-plan"""
+        for cle in ("corps_gras", "additifs", "he"):
+            self.index_catalogue(cle)
+    
+    @property
+    def recette(self):
+        """Recette courante : version figée (voir EtatRecette)"""
+        return self.etat.recette
+    
+    @recette.setter
+    def recette(self, recette):
+        self.etat.charger(recette)
     
     def reset_recette_courante(self):
         """Réinitialise la recette"""
@@ -208,46 +619,26 @@ class SoapMakerApp:
     
     def obtenir_poids_huiles(self):
         """Retourne le poids total des huiles selon le mode"""
-        if self.recette["mode"] == "Poids":
-            return float(sum(self.recette["corps_gras"].values()))
-        
-        cible = float(self.recette["poids_total_desire"])
-        taux_eau = self.recette["proportion_eau"] / 100
-        return cible / (1 + taux_eau + 0.2)
+        return self.etat.lire("poids_huiles")
     
     def afficher_erreur(self, titre, message):
         """Affiche un message d'erreur"""
-        snack = ft.SnackBar(
-            content=ft.Text(f"{titre}: {message}", size=18),
-            bgcolor=ft.colors.RED_700
-        )
-        self.page.overlay.append(snack)
-        snack.open = True
-        if not self.page.controls:
-            self.page.update()
-            return
-    
-        self.page.update()
+        self.overlays.notifier(f"{titre}: {message}", bgcolor=ft.colors.RED_700, erreur=True)
     
     def afficher_info(self, titre, message):
         """Affiche un message d'info"""
-        snack = ft.SnackBar(
-            content=ft.Text(f"{titre}: {message}", size=18, weight=ft.FontWeight.BOLD),
-            bgcolor=ft.colors.BLUE_GREY_800
-        )
-        self.page.overlay.append(snack)
-        snack.open = True
-        if not self.page.controls:
-            self.page.update()
-            return
+        self.overlays.notifier(f"{titre}: {message}", bgcolor=ft.colors.BLUE_GREY_800, gras=True)
     
-        self.page.update()
+    def terminer(self):
+        """Fin de session : plus aucun minuteur ne retient l'application"""
+        self.registre.desabonner(self.catalogues_changes)
+        self.overlays.arreter()
+        self.maj.vider()
     
     def fermer_dialog(self, dlg):
         """Ferme un dialogue"""
         self.emettre_son("send")
-        dlg.open = False
-        self.page.update()
+        self.overlays.fermer_dialogue(dlg)
     
     def action_ouvrir_dossier(self, e=None):
         """Ouvre le dossier SaveData"""
@@ -270,11 +661,18 @@ class SoapMakerApp:
         
     # ============ FENÊTRE 1 : CORPS GRAS ============
     
+    @instrumenter("ecran.afficher_fenetre_1")
     def afficher_fenetre_1(self):
         """Écran de sélection des huiles"""
-        self.page.controls.clear()
         self.emettre_son("beep")
-        
+        self.prechauffer_sons("fenetre_1")
+        self.afficher_vue("fenetre_1", self.construire_fenetre_1)
+        self.synchroniser_fenetre_1()
+        self.maj.demander()
+    
+    @instrumenter("ecran.construire_fenetre_1")
+    def construire_fenetre_1(self):
+        """Construit l'écran 1 (une seule fois, voir afficher_vue)"""
         header = ft.Container(
             content=ft.Column([
                 ft.Text("SoapMaker", size=30, weight=ft.FontWeight.BOLD, font_family="staround"),
@@ -287,12 +685,10 @@ class SoapMakerApp:
         
         self.entry_nom = ft.TextField(
             label="Nom de la recette",
-            value=self.recette["nom_recette"],
             on_change=lambda e: self.maj_nom_recette(e.control.value)
         )
         
         self.radio_mode = ft.RadioGroup(
-            value=self.recette["mode"],
             content=ft.Row([
                 ft.Text("Mode : ", size=16),
                 ft.Radio(value="Poids", label="Poids (g)"),
@@ -303,17 +699,15 @@ class SoapMakerApp:
         
         self.entry_poids_total = ft.TextField(
             label="Poids TOTAL désiré (g)",
-            value=str(self.recette["poids_total_desire"]),
             keyboard_type=ft.KeyboardType.NUMBER,
             width=200,
-            visible=(self.recette["mode"] == "%"),
             on_change=lambda e: self.sauver_poids_total(e.control.value)
         )
         
-        self.combo_huiles = ft.Dropdown(
-            label="Choisir une huile",
-            options=[ft.dropdown.Option(h["nom"]) for h in self.db_huiles],
-            expand=True
+        self.choix_huile = SelecteurRecherche(
+            lambda texte: self.index_catalogue("corps_gras").chercher(texte),
+            self.maj,
+            label="Chercher une huile (nom, propriété...)"
         )
         
         btn_add = ft.IconButton(
@@ -325,8 +719,7 @@ class SoapMakerApp:
         
         self.liste_huiles = ft.Column(spacing=5, scroll=ft.ScrollMode.AUTO, expand=True)
         self.label_total = ft.Text("Total : 0 g", size=18, weight=ft.FontWeight.BOLD)
-        
-        self.rafraichir_liste_huiles()
+        self.etat.abonner(["total_huiles", "mode"], self.maj_total)
         
         btn_droid = ft.Container(
             content=ft.Row([
@@ -352,50 +745,66 @@ class SoapMakerApp:
             style=ft.ButtonStyle(bgcolor=ft.colors.ORANGE)
         )
         
-        self.page.add(
-            ft.Column([
-                header,
-                ft.Container(
-                    content=ft.Column([
-                        self.entry_nom,
-                        self.radio_mode,
-                        self.entry_poids_total,
-                        ft.Divider(),
-                        ft.Row([self.combo_huiles, btn_add]),
-                        self.liste_huiles,
-                        self.label_total,
-                    ], spacing=10, scroll=ft.ScrollMode.AUTO),
-                    padding=15,
-                    expand=True
-                ),
-                ft.Container(
-                    content=ft.Row([btn_droid, btn_suivant], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                    padding=15
-                )
-            ], spacing=0, expand=True)
-        )
-        
-        self.page.update()
+        return ft.Column([
+            header,
+            ft.Container(
+                content=ft.Column([
+                    self.entry_nom,
+                    self.radio_mode,
+                    self.entry_poids_total,
+                    ft.Divider(),
+                    ft.Row([self.choix_huile.controle, btn_add], vertical_alignment=ft.CrossAxisAlignment.START),
+                    self.liste_huiles,
+                    self.label_total,
+                ], spacing=10, scroll=ft.ScrollMode.AUTO),
+                padding=15,
+                expand=True
+            ),
+            ft.Container(
+                content=ft.Row([btn_droid, btn_suivant], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                padding=15
+            )
+        ], spacing=0, expand=True)
+    
+    def synchroniser_fenetre_1(self):
+        """Recopie la recette dans l'écran 1 (seuls les contrôles modifiés partent au client)"""
+        self.entry_nom.value = self.recette["nom_recette"]
+        self.radio_mode.value = self.recette["mode"]
+        self.entry_poids_total.value = str(self.recette["poids_total_desire"])
+        self.entry_poids_total.visible = (self.recette["mode"] == "%")
+        
+        self.maj_unites_huiles()
+        self.rafraichir_liste_huiles()
+        self.maj_total()
     
     def changer_mode(self, mode):
-        """Change le mode de calcul"""
-        self.recette["mode"] = mode
-        self.afficher_fenetre_1()
+        """Change le mode de calcul (seuls les champs concernés sont modifiés)"""
+        self.etat.definir("mode", mode)
+        self.entry_poids_total.visible = (mode == "%")
+        self.maj_unites_huiles()
+        self.maj.demander(self.entry_poids_total, self.liste_huiles)
+    
+    def maj_unites_huiles(self):
+        """Unité affichée sur chaque ligne d'huile"""
+        unite = "g" if self.recette["mode"] == "Poids" else "%"
+        for ligne in self.lignes["corps_gras"].values():
+            ligne["unite"].value = unite
     
     def maj_nom_recette(self, val):
         """Met à jour le nom de la recette"""
-        self.recette["nom_recette"] = val.strip() if val.strip() else self.recette["nom_recette"]
+        if val.strip():
+            self.etat.definir("nom_recette", val.strip())
     
     def sauver_poids_total(self, val):
         """Sauvegarde le poids total"""
         try:
-            self.recette["poids_total_desire"] = float(val.replace(",", "."))
+            self.etat.definir("poids_total_desire", float(val.replace(",", ".")))
         except (ValueError, AttributeError):
             pass
     
     def ajouter_huile(self):
         """Ajoute une huile à la recette"""
-        nom = self.combo_huiles.value
+        nom = self.choix_huile.value
         if not nom:
             return
         
@@ -403,80 +812,82 @@ class SoapMakerApp:
             self.afficher_info("Déjà présent", f"'{nom}' est déjà dans la liste.")
             return
         
-        self.recette["corps_gras"][nom] = 0
+        self.etat.quantite("corps_gras", nom, 0)
+        self.choix_huile.vider()
         self.rafraichir_liste_huiles()
     
     def rafraichir_liste_huiles(self):
-        """Rafraîchit l'affichage des huiles"""
-        self.liste_huiles.controls.clear()
+        """Aligne les lignes d'huiles sur la recette (seules les lignes changées partent)"""
+        self.reconcilier_lignes("corps_gras", self.liste_huiles, self.creer_ligne_huile)
+        self.maj.demander(self.liste_huiles)
+    
+    def creer_ligne_huile(self, nom, val):
+        """Ligne d'une huile (créée une seule fois, voir reconcilier_lignes)"""
+        info = self.catalogues.fiche("huiles.json", nom) or {}
+        champ = ft.TextField(
+            value=str(val),
+            width=70,
+            keyboard_type=ft.KeyboardType.NUMBER,
+            text_align=ft.TextAlign.CENTER,
+            on_change=lambda e, n=nom: self.maj_valeur_huile(n, e.control.value)
+        )
+        unite = ft.Text("g" if self.recette["mode"] == "Poids" else "%", width=20)
         
-        for nom, val in self.recette["corps_gras"].items():
-            info = next((h for h in self.db_huiles if h["nom"] == nom), {})
-            
-            ligne = ft.Container(
-                content=ft.Row([
-                    ft.Column([
-                        ft.Text(nom, weight=ft.FontWeight.BOLD, size=14),
-                        ft.Text(info.get("qualite", "-"), size=12, color=ft.colors.GREY),
-                        ft.Text(
-                            f"Mousse: {info.get('mousse', '-')} | {info.get('recommande', 'N/A')}",
-                            size=11,
-                            italic=True
-                        )
-                    ], spacing=2, expand=True),
-                    ft.TextField(
-                        value=str(val),
-                        width=70,
-                        keyboard_type=ft.KeyboardType.NUMBER,
-                        text_align=ft.TextAlign.CENTER,
-                        on_change=lambda e, n=nom: self.maj_valeur_huile(n, e.control.value)
-                    ),
-                    ft.Text("g" if self.recette["mode"] == "Poids" else "%", width=20),
-                    ft.IconButton(
-                        icon=ft.icons.DELETE,
-                        icon_color=ft.colors.RED,
-                        icon_size=20,
-                        on_click=lambda e, n=nom: self.supprimer_huile(n)
+        ligne = ft.Container(
+            content=ft.Row([
+                ft.Column([
+                    ft.Text(nom, weight=ft.FontWeight.BOLD, size=14),
+                    ft.Text(info.get("qualite", "-"), size=12, color=ft.colors.GREY),
+                    ft.Text(
+                        f"Mousse: {info.get('mousse', '-')} | {info.get('recommande', 'N/A')}",
+                        size=11,
+                        italic=True
                     )
-                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                padding=8,
-                border=ft.border.all(1, ft.colors.GREY_700),
-                border_radius=5
-            )
-            
-            self.liste_huiles.controls.append(ligne)
-        
-        self.maj_total()
-        self.page.update()
+                ], spacing=2, expand=True),
+                champ,
+                unite,
+                ft.IconButton(
+                    icon=ft.icons.DELETE,
+                    icon_color=ft.colors.RED,
+                    icon_size=20,
+                    on_click=lambda e, n=nom: self.supprimer_huile(n)
+                )
+            ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+            padding=8,
+            border=ft.border.all(1, ft.colors.GREY_700),
+            border_radius=5
+        )
+        return {"ligne": ligne, "champ": champ, "unite": unite}
     
     def maj_valeur_huile(self, nom, val_str):
-        """Met à jour la valeur d'une huile"""
+        """Met à jour la valeur d'une huile (le total suit via l'état)"""
         try:
-            val = 0.0 if val_str in ["", "-", "."] else float(val_str.replace(",", "."))
-            self.recette["corps_gras"][nom] = val
-            self.maj_total()
+            self.etat.quantite("corps_gras", nom, lire_quantite(val_str))
         except (ValueError, AttributeError):
             pass
     
     def supprimer_huile(self, nom):
         """Supprime une huile"""
-        del self.recette["corps_gras"][nom]
+        self.etat.retirer("corps_gras", nom)
         self.rafraichir_liste_huiles()
     
     def maj_total(self):
-        """Met à jour le total"""
-        total = sum(self.recette["corps_gras"].values())
+        """Met à jour le total (abonné à total_huiles et mode)"""
+        total = self.etat.lire("total_huiles")
         unite = "g" if self.recette["mode"] == "Poids" else "%"
         self.label_total.value = f"Total : {round(total, 2)} {unite}"
         
         if self.recette["mode"] == "%":
             self.label_total.color = ft.colors.GREEN if abs(total - 100) < 0.01 else ft.colors.ORANGE
+        else:
+            self.label_total.color = None
         
-        self.page.update()
+        self.maj.demander(self.label_total)
     
     def valider_fenetre_1(self):
         """Valide la fenêtre 1"""
         cg = self.recette["corps_gras"]
+        total = self.etat.lire("total_huiles")
         
         if not cg:
             self.afficher_erreur("Erreur", "Sans huiles, un savon n'est pas.")
@@ -494,19 +905,18 @@ class SoapMakerApp:
                 poids = float(self.entry_poids_total.value.replace(",", "."))
                 if poids <= 10:
                     raise ValueError
-                self.recette["poids_total_desire"] = poids
+                self.etat.definir("poids_total_desire", poids)
             except (ValueError, AttributeError):
                 self.afficher_erreur("Erreur", "Un poids total valide il te manque.")
                 self.emettre_son("error")
                 return
             
-            total = sum(cg.values())
             if abs(total - 100) > 0.01:
                 self.afficher_erreur("Calcul incorrect", f"100% tu dois atteindre. Actuellement : {total}%")
                 self.emettre_son("laught")
                 return
         else:
-            if sum(cg.values()) <= 0:
+            if total <= 0:
                 self.afficher_erreur("Erreur", "Un poids total supérieur à zéro il faut.")
                 self.emettre_son("error")
                 return
@@ -515,11 +925,18 @@ class SoapMakerApp:
     
     # ============ FENÊTRE 2 : LESSIVE ============
     
+    @instrumenter("ecran.afficher_fenetre_2")
     def afficher_fenetre_2(self):
         """Écran de configuration de la lessive"""
-        self.page.controls.clear()
         self.emettre_son("beep2")
-        
+        self.prechauffer_sons("fenetre_2")
+        self.afficher_vue("fenetre_2", self.construire_fenetre_2)
+        self.synchroniser_fenetre_2()
+        self.maj.demander()
+    
+    @instrumenter("ecran.construire_fenetre_2")
+    def construire_fenetre_2(self):
+        """Construit l'écran 2 (une seule fois, voir afficher_vue)"""
         header = ft.Container(
             content=ft.Column([
                 ft.Text("SoapMaker", size=30, weight=ft.FontWeight.BOLD, font_family="staround"),
@@ -531,46 +948,36 @@ class SoapMakerApp:
         )
         
         # Surgraissage
-        self.lbl_surgras = ft.Text(f"Surgraissage : {self.recette['surgras']}%", weight=ft.FontWeight.BOLD)
+        self.lbl_surgras = ft.Text("", weight=ft.FontWeight.BOLD)
         self.slider_surgras = ft.Slider(
             min=0,
             max=15,
             divisions=15,
-            value=self.recette["surgras"],
             on_change=lambda e: self.maj_surgras(int(e.control.value))
         )
         self.info_surgras = ft.Text("", size=13, italic=True, color=ft.colors.GREY)
         
         # Eau
-        self.lbl_eau = ft.Text(f"Proportion liquide : {self.recette['proportion_eau']}%", weight=ft.FontWeight.BOLD)
+        self.lbl_eau = ft.Text("", weight=ft.FontWeight.BOLD)
         self.slider_eau = ft.Slider(
             min=25,
             max=40,
             divisions=15,
-            value=self.recette["proportion_eau"],
             on_change=lambda e: self.maj_eau(int(e.control.value))
         )
         self.info_eau = ft.Text("", size=13, italic=True, color=ft.colors.GREY)
         
         # Substitut
-        liquides = ["Aucun"] + [a["Additif"] for a in self.db_additifs if a.get("Cat") == "Liquide"]
-        
         self.combo_sub = ft.Dropdown(
             label="Substitution eau",
-            options=[ft.dropdown.Option(l) for l in liquides],
-            value=self.recette.get("substitut_liquide", "Aucun"),
-            on_change=lambda e: self.maj_lessive()
+            on_change=lambda e: self.maj_substitut(e.control.value)
         )
         
-        self.lbl_pct_sub = ft.Text(
-            f"% de substitution : {self.recette['pourcentage_substitut']}%",
-            weight=ft.FontWeight.BOLD
-        )
+        self.lbl_pct_sub = ft.Text("", weight=ft.FontWeight.BOLD)
         self.slider_pct_sub = ft.Slider(
             min=0,
             max=100,
             divisions=20,
-            value=self.recette.get("pourcentage_substitut", 0),
             on_change=lambda e: self.maj_slider_pct(int(e.control.value))
         )
         self.info_sub = ft.Text("", size=11, italic=True, color=ft.colors.CYAN)
@@ -579,6 +986,7 @@ class SoapMakerApp:
         self.res_soude = ft.Text("Soude (NaOH) : ...", weight=ft.FontWeight.BOLD)
         self.res_eau = ft.Text("Eau Distillée : ...", weight=ft.FontWeight.BOLD)
         self.res_sub = ft.Text("Additif-substitut : ...", color=ft.colors.ORANGE, weight=ft.FontWeight.BOLD)
+        self.etat.abonner(["poids_soude", "phase_liquide", "substitut_liquide"], self.maj_lessive)
         
         result_box = ft.Container(
             content=ft.Column([
@@ -600,40 +1008,53 @@ class SoapMakerApp:
             style=ft.ButtonStyle(bgcolor=ft.colors.ORANGE)
         )
         
-        self.page.add(
-            ft.Column([
-                header,
-                ft.Container(
-                    content=ft.Column([
-                        self.lbl_surgras, self.slider_surgras, self.info_surgras,
-                        ft.Divider(height=20),
-                        self.lbl_eau, self.slider_eau, self.info_eau,
-                        ft.Divider(height=20),
-                        self.combo_sub,
-                        self.lbl_pct_sub,
-                        self.slider_pct_sub,
-                        self.info_sub,
-                        ft.Divider(height=20),
-                        result_box
-                    ], scroll=ft.ScrollMode.AUTO, spacing=10),
-                    padding=15,
-                    expand=True
-                ),
-                ft.Container(
-                    content=ft.Row([btn_retour, btn_suivant], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                    padding=15
-                )
-            ], spacing=0, expand=True)
-        )
-        
-        self.maj_surgras(self.recette["surgras"])
-        self.maj_eau(self.recette["proportion_eau"])
+        return ft.Column([
+            header,
+            ft.Container(
+                content=ft.Column([
+                    self.lbl_surgras, self.slider_surgras, self.info_surgras,
+                    ft.Divider(height=20),
+                    self.lbl_eau, self.slider_eau, self.info_eau,
+                    ft.Divider(height=20),
+                    self.combo_sub,
+                    self.lbl_pct_sub,
+                    self.slider_pct_sub,
+                    self.info_sub,
+                    ft.Divider(height=20),
+                    result_box
+                ], scroll=ft.ScrollMode.AUTO, spacing=10),
+                padding=15,
+                expand=True
+            ),
+            ft.Container(
+                content=ft.Row([btn_retour, btn_suivant], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                padding=15
+            )
+        ], spacing=0, expand=True)
+    
+    def synchroniser_fenetre_2(self):
+        """Recopie la recette dans l'écran 2"""
+        if self.bases_changees("combo_sub"):
+            liquides = ["Aucun"] + [a["Additif"] for a in self.db_additifs if a.get("Cat") == "Liquide"]
+            self.combo_sub.options = [ft.dropdown.Option(l) for l in liquides]
+        
+        self.combo_sub.value = self.recette.get("substitut_liquide", "Aucun")
+        self.slider_surgras.value = self.recette["surgras"]
+        self.slider_eau.value = self.recette["proportion_eau"]
+        self.slider_pct_sub.value = self.recette.get("pourcentage_substitut", 0)
+        self.lbl_pct_sub.value = f"% de substitution : {self.recette['pourcentage_substitut']}%"
+        
+        self.afficher_surgras(self.recette["surgras"])
+        self.afficher_eau(self.recette["proportion_eau"])
         self.maj_lessive()
-        self.page.update()
     
     def maj_surgras(self, v):
-        """Met à jour le surgraissage"""
-        self.recette["surgras"] = v
+        """Met à jour le surgraissage (la soude suit via l'état)"""
+        self.etat.definir("surgras", v)
+        self.afficher_surgras(v)
+    
+    def afficher_surgras(self, v):
+        """Libellé et conseil du surgraissage"""
         self.lbl_surgras.value = f"Surgraissage : {v}%"
         
         if v <= 2:
@@ -648,12 +1069,15 @@ class SoapMakerApp:
             msg = "Très élevé, vérifier la recette !"
         
         self.info_surgras.value = msg
-        self.maj_lessive()
-        self.page.update()
+        self.maj.demander(self.lbl_surgras, self.info_surgras)
     
     def maj_eau(self, v):
-        """Met à jour la proportion d'eau"""
-        self.recette["proportion_eau"] = v
+        """Met à jour la proportion d'eau (les liquides suivent via l'état)"""
+        self.etat.definir("proportion_eau", v)
+        self.afficher_eau(v)
+    
+    def afficher_eau(self, v):
+        """Libellé et conseil de la proportion d'eau"""
         self.lbl_eau.value = f"Proportion liquide : {v}%"
         
         if v <= 28:
@@ -666,50 +1090,40 @@ class SoapMakerApp:
             msg = "Très élevé (SAC ou lait)."
         
         self.info_eau.value = msg
-        self.maj_lessive()
-        self.page.update()
+        self.maj.demander(self.lbl_eau, self.info_eau)
     
     def maj_slider_pct(self, v):
         """Met à jour le pourcentage de substitution"""
-        self.recette["pourcentage_substitut"] = v
+        self.etat.definir("pourcentage_substitut", v)
         self.lbl_pct_sub.value = f"% de substitution : {v}%"
-        self.maj_lessive()
-        self.page.update()
+        self.maj.demander(self.lbl_pct_sub)
+    
+    def maj_substitut(self, sub):
+        """Change le liquide de substitution"""
+        sub = sub or "Aucun"
+        with self.etat.lot():
+            self.etat.definir("substitut_liquide", sub)
+            if sub == "Aucun":
+                self.etat.definir("pourcentage_substitut", 0)
+                self.slider_pct_sub.value = 0
+                self.lbl_pct_sub.value = "% de substitution : 0%"
+        self.maj.demander(self.slider_pct_sub, self.lbl_pct_sub)
     
     def maj_lessive(self):
-        """Calcule la composition de la lessive"""
-        sub = self.combo_sub.value if self.combo_sub.value else "Aucun"
-        pct = self.recette["pourcentage_substitut"]
-        self.recette["substitut_liquide"] = sub
-        
-        if sub == "Aucun":
-            self.recette["pourcentage_substitut"] = 0
-            self.slider_pct_sub.value = 0
-            self.lbl_pct_sub.value = "% de substitution : 0%"
-        
-        ph = self.obtenir_poids_huiles()
-        
-        naoh = 0
-        for nom, val in self.recette["corps_gras"].items():
-            poids_h = val if self.recette["mode"] == "Poids" else (val/100) * ph
-            sap = next((h["sap_naoh"] for h in self.db_huiles if h["nom"] == nom), 0.135)
-            naoh += poids_h * sap
-        
-        naoh *= (1 - self.recette["surgras"]/100)
-        
-        liq_total = ph * (self.recette["proportion_eau"]/100)
-        liq_sub = liq_total * (pct/100)
-        liq_eau = liq_total - liq_sub
+        """Affiche la composition de la lessive (abonné à la soude et aux liquides)"""
+        sub = self.recette.get("substitut_liquide", "Aucun")
+        naoh = self.etat.lire("poids_soude")
+        liquides = self.etat.lire("phase_liquide")
         
         self.res_soude.value = f"Soude (NaOH) : {round(naoh, 1)} g"
-        self.res_eau.value = f"Eau : {round(liq_eau, 1)} g"
-        self.res_sub.value = f"{sub} : {round(liq_sub, 1)} g" if sub != "Aucun" and pct > 0 else ""
-        self.res_sub.visible = True if (sub != "Aucun" and pct > 0) else False
+        self.res_eau.value = f"Eau : {round(liquides['poids_eau'], 1)} g"
+        self.res_sub.visible = liquides["poids_substitut"] > 0
+        self.res_sub.value = f"{sub} : {round(liquides['poids_substitut'], 1)} g" if self.res_sub.visible else ""
         
-        item = next((a for a in self.db_additifs if a["Additif"] == sub), None)
+        item = self.catalogues.fiche("additifs.json", sub)
         self.info_sub.value = f"{item.get('Propriété', '')} (Reco: {item.get('% conseillé', '')})" if item else ""
         
-        self.page.update()
+        self.maj.demander(self.res_soude, self.res_eau, self.res_sub, self.info_sub)
     
     def valider_fenetre_2(self):
         """Valide la fenêtre 2"""
@@ -730,11 +1144,18 @@ class SoapMakerApp:
     
     # ============ FENÊTRE 3 : ADDITIFS ============
     
+    @instrumenter("ecran.afficher_fenetre_3")
     def afficher_fenetre_3(self):
         """Écran des additifs et huiles essentielles"""
-        self.page.controls.clear()
         self.emettre_son("dial2")
-        
+        self.prechauffer_sons("fenetre_3")
+        self.afficher_vue("fenetre_3", self.construire_fenetre_3)
+        self.synchroniser_fenetre_3()
+        self.maj.demander()
+    
+    @instrumenter("ecran.construire_fenetre_3")
+    def construire_fenetre_3(self):
+        """Construit l'écran 3 (une seule fois, voir afficher_vue)"""
         header = ft.Container(
             content=ft.Column([
                 ft.Text("SoapMaker", size=30, weight=ft.FontWeight.BOLD, font_family="staround"),
@@ -745,25 +1166,19 @@ class SoapMakerApp:
             alignment=ft.alignment.center
         )
         
-        self.poids_ref = self.obtenir_poids_huiles()
-        
         # Cartouches
-        additifs_list = [a["Additif"] for a in self.db_additifs if "Cosmétiques" not in a.get("Additif", "")]
         cart_additifs = self.creer_cartouche(
             titre="Additifs (Argiles, Poudres)",
-            items=additifs_list,
             dico="additifs",
-            limite=10,
+            limite=LIMITES_AJOUTS["additifs"],
             bg=ft.colors.BROWN_100,
             est_he=False
         )
         
-        he_list = [h["Nom"] for h in self.db_he]
         cart_he = self.creer_cartouche(
             titre="Huiles Essentielles",
-            items=he_list,
             dico="he",
-            limite=3,
+            limite=LIMITES_AJOUTS["he"],
             bg=ft.colors.PINK_100,
             est_he=True
         )
@@ -775,41 +1190,46 @@ class SoapMakerApp:
             style=ft.ButtonStyle(bgcolor=ft.colors.GREEN)
         )
         
-        self.page.add(
-            ft.Column([
-                header,
-                ft.Container(
-                    content=ft.Column([cart_additifs, cart_he], scroll=ft.ScrollMode.AUTO, spacing=15),
-                    padding=15,
-                    expand=True
-                ),
-                ft.Container(
-                    content=ft.Row([btn_retour, btn_calc], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
-                    padding=15
-                )
-            ], spacing=0, expand=True)
-        )
-        
-        self.page.update()
+        return ft.Column([
+            header,
+            ft.Container(
+                content=ft.Column([cart_additifs, cart_he], scroll=ft.ScrollMode.AUTO, spacing=15),
+                padding=15,
+                expand=True
+            ),
+            ft.Container(
+                content=ft.Row([btn_retour, btn_calc], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                padding=15
+            )
+        ], spacing=0, expand=True)
     
-    def creer_cartouche(self, titre, items, dico, limite, bg, est_he):
+    def synchroniser_fenetre_3(self):
+        """Recopie la recette dans l'écran 3"""
+        for dico, (selecteur, liste, total_lbl, limite, est_he) in self.cartouches.items():
+            self.maj_total_items(dico, total_lbl, limite)
+            self.rafraichir_items(dico, liste, total_lbl, limite, est_he)
+    
+    def creer_cartouche(self, titre, dico, limite, bg, est_he):
         """Crée un bloc Additif ou HE"""
-        combo = ft.Dropdown(
-            label="Choisir",
-            label_style=ft.TextStyle(color=ft.colors.BLACK),
-            text_style=ft.TextStyle(color=ft.colors.BLACK),
-            bgcolor=ft.colors.WHITE,  # ✅ Ajoute un fond blanc au dropdown
-            options=[ft.dropdown.Option(i) for i in sorted(items)],
-            expand=True
+        selecteur = SelecteurRecherche(
+            lambda texte: self.index_catalogue(dico).chercher(texte),
+            self.maj,
+            label="Chercher",
+            couleur=ft.colors.BLACK,
+            bgcolor=ft.colors.WHITE
         )
         
         liste = ft.Column(spacing=5)
         total_lbl = ft.Text("", size=14, weight=ft.FontWeight.BOLD)
+        self.etat.abonner(
+            [f"total_{dico}", f"max_{dico}"],
+            lambda: self.maj_total_items(dico, total_lbl, limite)
+        )
         
         btn_add = ft.IconButton(
             icon=ft.icons.ADD_CIRCLE,
             icon_color=ft.colors.GREEN,
-            on_click=lambda e: self.ajouter_item(dico, combo.value, liste, total_lbl, limite, est_he)
+            on_click=lambda e: self.ajouter_item(dico, selecteur.value, liste, total_lbl, limite, est_he)
         )
         
         if est_he:
@@ -822,12 +1242,11 @@ class SoapMakerApp:
         else:
             legende = None
         
-        self.maj_total_items(dico, total_lbl, limite)
-        self.rafraichir_items(dico, liste, total_lbl, limite, est_he)
+        self.cartouches[dico] = (selecteur, liste, total_lbl, limite, est_he)
         
         controls = [
             ft.Text(titre, size=15, weight=ft.FontWeight.BOLD, color=ft.colors.BLACK),
-            ft.Row([combo, btn_add]),
+            ft.Row([selecteur.controle, btn_add], vertical_alignment=ft.CrossAxisAlignment.START),
             liste,
             total_lbl
         ]
@@ -848,83 +1267,87 @@ class SoapMakerApp:
             return
         
         if nom not in self.recette[dico]:
-            self.recette[dico][nom] = 0.0
+            self.etat.quantite(dico, nom, 0.0)
+            self.cartouches[dico][0].vider()
             self.rafraichir_items(dico, liste_widget, total_lbl, limite, est_he)
     
     def rafraichir_items(self, dico, liste_widget, total_lbl, limite, est_he):
-        """Rafraîchit liste additifs/HE"""
-        liste_widget.controls.clear()
-        
-        for nom, poids in self.recette[dico].items():
-            if est_he:
-                data = next((h for h in self.db_he if h["Nom"] == nom), {})
-                prop = data.get("Propriétés", "-")
-                tox = data.get("Toxicité", "0")
-                info_txt = f"{prop} (Tox: {tox})"
-                
-                if "++" in tox:
-                    txt_color = ft.colors.RED_700
-                elif "+" in tox:
-                    txt_color = ft.colors.ORANGE_700
-                else:
-                    txt_color = ft.colors.GREY_700
-            else:
-                data = next((a for a in self.db_additifs if a["Additif"] == nom), {})
-                info_txt = data.get("Propriété", "-")
-                txt_color = ft.colors.BLACK
-            
-            ligne = ft.Container(
-                content=ft.Row([
-                    ft.Column([
-                        ft.Text(nom, color=ft.colors.BLACK, weight=ft.FontWeight.BOLD, size=13),
-                        ft.Text(info_txt, size=12, color=txt_color)
-                    ], spacing=2, expand=True),
-                    ft.TextField(
-                        value=str(poids),
-                        width=60,
-                        keyboard_type=ft.KeyboardType.NUMBER,
-                        text_style=ft.TextStyle(color=ft.colors.BLACK),
-                        text_align=ft.TextAlign.CENTER,
-                        on_change=lambda e, n=nom, d=dico, t=total_lbl, l=limite:
-                            self.maj_item(n, e.control.value, d, t, l)
-                    ),
-                    ft.Text("g", color=ft.colors.BLACK, width=20),
-                    ft.IconButton(
-                        icon=ft.icons.DELETE,
-                        icon_color=ft.colors.RED,
-                        icon_size=18,
-                        on_click=lambda e, n=nom, d=dico, lw=liste_widget, t=total_lbl, l=limite, h=est_he:
-                            self.supprimer_item(n, d, lw, t, l, h)
-                    )
-                ]),
-                padding=6,
-                border=ft.border.all(1, ft.colors.GREY_600),
-                border_radius=5
-            )
+        """Aligne la liste additifs/HE sur la recette (seules les lignes changées partent)"""
+        self.reconcilier_lignes(
+            dico,
+            liste_widget,
+            lambda nom, poids: self.creer_ligne_item(nom, poids, dico, liste_widget, total_lbl, limite, est_he)
+        )
+        self.maj.demander(liste_widget)
+    
+    def creer_ligne_item(self, nom, poids, dico, liste_widget, total_lbl, limite, est_he):
+        """Ligne d'un additif/HE (créée une seule fois, voir reconcilier_lignes)"""
+        if est_he:
+            data = self.catalogues.fiche("addons_he.json", nom) or {}
+            prop = data.get("Propriétés", "-")
+            tox = data.get("Toxicité", "0")
+            info_txt = f"{prop} (Tox: {tox})"
             
-            liste_widget.controls.append(ligne)
+            if "++" in tox:
+                txt_color = ft.colors.RED_700
+            elif "+" in tox:
+                txt_color = ft.colors.ORANGE_700
+            else:
+                txt_color = ft.colors.GREY_700
+        else:
+            data = self.catalogues.fiche("additifs.json", nom) or {}
+            info_txt = data.get("Propriété", "-")
+            txt_color = ft.colors.BLACK
         
-        self.page.update()
+        champ = ft.TextField(
+            value=str(poids),
+            width=60,
+            keyboard_type=ft.KeyboardType.NUMBER,
+            text_style=ft.TextStyle(color=ft.colors.BLACK),
+            text_align=ft.TextAlign.CENTER,
+            on_change=lambda e, n=nom, d=dico: self.maj_item(n, e.control.value, d)
+        )
+        
+        ligne = ft.Container(
+            content=ft.Row([
+                ft.Column([
+                    ft.Text(nom, color=ft.colors.BLACK, weight=ft.FontWeight.BOLD, size=13),
+                    ft.Text(info_txt, size=12, color=txt_color)
+                ], spacing=2, expand=True),
+                champ,
+                ft.Text("g", color=ft.colors.BLACK, width=20),
+                ft.IconButton(
+                    icon=ft.icons.DELETE,
+                    icon_color=ft.colors.RED,
+                    icon_size=18,
+                    on_click=lambda e, n=nom, d=dico, lw=liste_widget, t=total_lbl, l=limite, h=est_he:
+                        self.supprimer_item(n, d, lw, t, l, h)
+                )
+            ]),
+            padding=6,
+            border=ft.border.all(1, ft.colors.GREY_600),
+            border_radius=5
+        )
+        return {"ligne": ligne, "champ": champ}
     
-    def maj_item(self, nom, val_str, dico, total_lbl, limite):
-        """Met à jour un item"""
+    def maj_item(self, nom, val_str, dico):
+        """Met à jour un item (le total suit via l'état)"""
         try:
-            val = 0.0 if val_str in ["", "-", "."] else float(val_str.replace(",", "."))
-            self.recette[dico][nom] = val
-            self.maj_total_items(dico, total_lbl, limite)
+            self.etat.quantite(dico, nom, lire_quantite(val_str))
         except (ValueError, AttributeError):
             pass
     
     def supprimer_item(self, nom, dico, liste_widget, total_lbl, limite, est_he):
         """Supprime un item"""
-        del self.recette[dico][nom]
+        self.etat.retirer(dico, nom)
         self.rafraichir_items(dico, liste_widget, total_lbl, limite, est_he)
     
     def maj_total_items(self, dico, total_lbl, limite):
-        """Met à jour le total des additifs/HE"""
-        total = sum(self.recette[dico].values())
-        pct = (total / self.poids_ref * 100) if self.poids_ref > 0 else 0
-        max_g = self.poids_ref * (limite / 100)
+        """Met à jour le total des additifs/HE (abonné à total_<dico> et max_<dico>)"""
+        total = self.etat.lire(f"total_{dico}")
+        max_g = self.etat.lire(f"max_{dico}")
+        poids_huiles = self.etat.lire("poids_huiles")
+        pct = (total / poids_huiles * 100) if poids_huiles > 0 else 0
         
         texte = f"Total : {round(total, 1)} g ({round(pct, 1)}%)\nMax conseillé : {round(max_g, 1)} g ({limite}%)"
         
@@ -935,7 +1358,7 @@ class SoapMakerApp:
             total_lbl.value = texte
             total_lbl.color = ft.colors.GREEN
         
-        self.page.update()
+        self.maj.demander(total_lbl)
     
     def valider_fenetre_3(self):
         """Valide la fenêtre 3"""
@@ -959,32 +1382,40 @@ class SoapMakerApp:
     
     # ============ FENÊTRE 4 : RÉSULTATS ============
     
+    @instrumenter("ecran.afficher_fenetre_4")
     def afficher_fenetre_4(self):
         """Écran des résultats"""
-        self.page.controls.clear()
         self.emettre_son("save")
+        self.prechauffer_sons("fenetre_4")
+        
+        res = self.etat.lire("chimie")
+        
+        if not res:
+            self.afficher_erreur("Erreur", "Impossible de calculer la recette.")
+            return
         
+        self.afficher_vue("fenetre_4", self.construire_fenetre_4)
         date = datetime.now().strftime("%d/%m/%Y")
+        self.txt_episode_4.value = f"Episode 4 - L'Etoile du {date}"
+        self.txt_resume.value = self.generer_resume_texte(res)
+        self.maj.demander()
+    
+    @instrumenter("ecran.construire_fenetre_4")
+    def construire_fenetre_4(self):
+        """Construit l'écran 4 (une seule fois, voir afficher_vue)"""
+        self.txt_episode_4 = ft.Text("", size=16, font_family="staround")
         header = ft.Container(
             content=ft.Column([
                 ft.Text("SoapMaker", size=28, weight=ft.FontWeight.BOLD, font_family="staround"),
-                ft.Text(f"Episode 4 - L'Etoile du {date}", size=16, font_family="staround"),
+                self.txt_episode_4,
             ], horizontal_alignment=ft.CrossAxisAlignment.CENTER, spacing=5),
             padding=15,
             bgcolor=ft.colors.BLUE_GREY_900,
             alignment=ft.alignment.center
         )
         
-        res = self.calculer_chimie_recette(self.recette)
-        
-        if not res:
-            self.afficher_erreur("Erreur", "Impossible de calculer la recette.")
-            return
-        
-        resume = self.generer_resume_texte(res)
-        
-        txt_resume = ft.Text(
-            value=resume,
+        self.txt_resume = ft.Text(
+            value="",
             size=18,
             font_family="droidgift",
             text_align=ft.TextAlign.CENTER,
@@ -993,7 +1424,7 @@ class SoapMakerApp:
         )
         
         zone_centrale = ft.Container(
-            content=txt_resume,
+            content=self.txt_resume,
             alignment=ft.alignment.center,
             expand=True,
             padding=20,
@@ -1041,68 +1472,12 @@ class SoapMakerApp:
             btn_droid
         ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
         
-        self.page.add(
-            ft.Column([
-                header,
-                ft.Container(content=zone_centrale, padding=10, expand=True),
-                ft.Container(content=actions_row, padding=15),
-                ft.Container(content=actions_row_2, padding=15)
-            ], expand=True)
-        )
-        self.page.update()
-    
-    def calculer_chimie_recette(self, data):
-        """Moteur de calcul chimique"""
-        cg = data.get("corps_gras", {})
-        ph = self.obtenir_poids_huiles()
-        
-        if ph == 0:
-            return None
-        
-        # Détermination poids par huile
-        if data.get("mode") == "Poids":
-            detail_g = cg.copy()
-        else:
-            detail_g = {nom: (pct/100) * ph for nom, pct in cg.items()}
-        
-        # Calcul soude
-        naoh = 0
-        for nom, poids in detail_g.items():
-            sap = self.sap_values.get(nom, 0.135)
-            naoh += poids * sap
-        
-        surgras = float(data.get("surgras", 5))
-        naoh_final = naoh * (1 - surgras/100)
-        
-        # Liquides
-        conc_eau = float(data.get("proportion_eau", 30))
-        liq_total = ph * (conc_eau / 100)
-        
-        sub_nom = data.get("substitut_liquide", "Aucun")
-        pct_sub = float(data.get("pourcentage_substitut", 0))
-        liq_sub = liq_total * (pct_sub / 100) if sub_nom != "Aucun" else 0
-        liq_eau = liq_total - liq_sub
-        
-        # Ajouts
-        total_add = sum(data.get("additifs", {}).values())
-        total_he = sum(data.get("he", {}).values())
-        
-        # Totaux
-        pate_fraiche = ph + naoh_final + liq_total + total_add + total_he
-        apres_cure = pate_fraiche - (liq_total * 0.4)
-        volume = pate_fraiche * 0.95
-        
-        return {
-            "poids_huiles": ph,
-            "detail_huiles_g": detail_g,
-            "poids_soude": naoh_final,
-            "poids_liquide_total": liq_total,
-            "poids_eau": liq_eau,
-            "poids_substitut": liq_sub,
-            "total_frais": pate_fraiche,
-            "total_cure": apres_cure,
-            "volume": volume
-        }
+        return ft.Column([
+            header,
+            ft.Container(content=zone_centrale, padding=10, expand=True),
+            ft.Container(content=actions_row, padding=15),
+            ft.Container(content=actions_row_2, padding=15)
+        ], expand=True)
     
     def generer_resume_texte(self, res):
         """Génère le texte du résumé"""
@@ -1158,147 +1533,299 @@ class SoapMakerApp:
         """Réinitialise l'application"""
         def confirmer(e):
             self.emettre_son("ordre66")
-            dlg.open = False
-            self.page.update()
+            self.overlays.fermer_dialogue(dlg)
             
             self.reset_recette_courante()
             self.afficher_fenetre_1()
         
-        dlg = ft.AlertDialog(
-            title=ft.Text("☠️ Ordre 66"),
-            content=ft.Text("Tout effacer et recommencer ?"),
-            actions=[
+        dlg = self.overlays.ouvrir_dialogue(
+            "☠️ Ordre 66",
+            ft.Text("Tout effacer et recommencer ?"),
+            [
                 ft.TextButton("Annuler", on_click=lambda e: self.fermer_dialog(dlg)),
                 ft.TextButton("OUI, TOUT EFFACER", on_click=confirmer, style=ft.ButtonStyle(color=ft.colors.RED))
             ]
         )
-        
-        self.page.overlay.append(dlg)
-        dlg.open = True
-        self.page.update()
     
     # ============ FENÊTRE 5 : DROID ASSISTANT ============
     
+    @instrumenter("ecran.afficher_assistant")
     def afficher_droid_assistant(self):
         """Écran de gestion des recettes"""
-
-        self.page.controls.clear()
         self.emettre_son("dial2")
-        
-        fichiers = self.memory.lister_recettes()
+        self.prechauffer_sons("assistant")
+        self.afficher_vue("assistant", self.construire_droid_assistant)
+        self.rafraichir_memoire()
+        self.panneau_diagnostics.rafraichir(envoyer=False)
+        self.maj.demander()
+    
+    def rafraichir_memoire(self):
+        """Relit la liste des recettes sauvegardées"""
+        self.afficher_memoire(self.memory.lister_recettes())
+    
+    def afficher_memoire(self, fichiers):
+        """Liste des recettes sauvegardées (reconstruite seulement si elle a changé)"""
+        if fichiers == self.fichiers_memoire:
+            return
+        self.fichiers_memoire = fichiers
         
         if not fichiers:
-            content_memoire = ft.Text("Mémoire vide...", italic=True, color=ft.colors.GREY)
+            self.content_memoire = ft.Text("Mémoire vide...", italic=True, color=ft.colors.GREY)
         else:
-            content_memoire = ft.RadioGroup(
+            self.content_memoire = ft.RadioGroup(
                 content=ft.Column(
                     [ft.Radio(value=f, label=f) for f in fichiers],
                     scroll=ft.ScrollMode.AUTO
                 ),
                 value=None
             )
-
-        def verifier_selection():
-            if not isinstance(content_memoire, ft.RadioGroup) or not content_memoire.value:
-                self.afficher_erreur("Oups", "Sélectionne une recette d'abord !")
+        self.zone_memoire.content = self.content_memoire
+        self.maj.demander(self.zone_memoire)
+    
+    def selection_memoire(self):
+        """Fichier coché dans la mémoire (message d'erreur sinon)"""
+        memoire = self.content_memoire
+        if not isinstance(memoire, ft.RadioGroup) or not memoire.value:
+            self.afficher_erreur("Oups", "Sélectionne une recette d'abord !")
+            self.emettre_son("error")
+            return None
+        return memoire.value
+    
+    def action_charger(self, e):
+        """Recharge la recette cochée"""
+        fichier = self.selection_memoire()
+        if fichier:
+            self.recette = self.memory.charger_json(fichier)
+            self.afficher_info("Droid", "Mémoire restaurée avec succès !")
+            self.afficher_fenetre_4()
+    
+    def action_supprimer(self, e):
+        """Supprime la recette cochée"""
+        fichier = self.selection_memoire()
+        if fichier:
+            self.memory.supprimer_recette(fichier)
+            self.rafraichir_memoire()
+            self.afficher_info("Nettoyage", "Fichier supprimé.")
+    
+    def action_renommer(self, e):
+        """Demande le nouveau nom de la recette cochée"""
+        fichier = self.selection_memoire()
+        if not fichier:
+            return
+        
+        tf_rename = ft.TextField(label="Nouveau nom", value=fichier.replace(".json", ""))
+        dlg_rename = self.overlays.ouvrir_dialogue(
+            "Renommer",
+            tf_rename,
+            [
+                ft.TextButton("Annuler", on_click=lambda ev: self.fermer_dialog(dlg_rename)),
+                ft.TextButton("Valider", on_click=partial(self.valider_renommage, fichier, tf_rename))
+            ]
+        )
+    
+    def valider_renommage(self, fichier, champ, e):
+        """Renomme puis ferme la boîte"""
+        if champ.value:
+            self.memory.renommer_recette(fichier, champ.value)
+            self.rafraichir_memoire()
+            self.overlays.fermer_dialogue(self.overlays.dialogue_de(champ))
+    
+    def action_exporter(self, e):
+        """Propose les formats d'export de la recette cochée"""
+        fichier = self.selection_memoire()
+        if fichier:
+            self.ouvrir_export(fichier, self.memory.charger_json(fichier))
+    
+    def exporter_pdf(self, recette, e):
+        """Génère la fiche PDF (bouton de la boîte d'export)"""
+        self.overlays.fermer_dialogue(self.overlays.dialogue_de(e.control))
+        try:
+            chemin = self.memory.generer_pdf_recette(recette)
+            self.afficher_info("PDF Généré", f"Fichier sauvegardé :\n{chemin}")
+            self.emettre_son("old")
+        except Exception as ex:
+            self.afficher_erreur("Erreur PDF", str(ex))
+            self.emettre_son("error")
+    
+    def ouvrir_export(self, fichier, recette_a_exporter):
+        """Boîte des formats d'export d'une recette sauvegardée"""
+        def export_mail(ev):
+            try:
+                texte = self.memory.generer_texte_mail(recette_a_exporter)
+                nom = recette_a_exporter.get("nom_recette", "Recette")
+                code = encoder_code_partage(recette_a_exporter, self.db_huiles, self.db_additifs, self.db_he)
+                
+                sujet = quote(f"Recette Savon : {nom}")
+                pied = f"\n\nCode SoapMaker (Droid Assistant > IMPORTER CODE) :\n{code}"
+                corps = quote(texte + pied)
+                if len(corps) > LIMITE_MAILTO:
+                    # Recette trop longue pour un mailto : seul le code voyage
+                    corps = quote(f"RECETTE : {nom}" + pied)
+                
+                import webbrowser
+                webbrowser.open(f"mailto:?subject={sujet}&body={corps}")
+                
+                self.overlays.fermer_dialogue(dlg_export)
+                self.afficher_info("Mail", "Client mail ouvert !")
+                self.emettre_son("send")
+            except Exception as ex:
+                self.overlays.fermer_dialogue(dlg_export)
+                self.afficher_erreur("Erreur Mail", str(ex))
                 self.emettre_son("error")
-                return None
-            return content_memoire.value
-        
-        def action_charger(e):
-            fichier = verifier_selection()
-            if fichier:
-                self.recette = self.memory.charger_json(fichier)
-                self.afficher_info("Droid", "Mémoire restaurée avec succès !")
-                self.afficher_fenetre_4()
         
-        def action_supprimer(e):
-            fichier = verifier_selection()
-            if fichier:
-                self.memory.supprimer_recette(fichier)
-                self.afficher_info("Nettoyage", "Fichier supprimé.")
-                self.afficher_droid_assistant()
+        def export_code(ev):
+            try:
+                code = encoder_code_partage(recette_a_exporter, self.db_huiles, self.db_additifs, self.db_he)
+                self.page.set_clipboard(code)
+                dlg_export.content = ft.Column([
+                    ft.Text(f"Code copié ({len(code)} caractères) :"),
+                    ft.TextField(value=code, read_only=True, multiline=True, text_size=12)
+                ], tight=True)
+                with instruments.mesure("page.update_partiel"):
+                    self.page.update(dlg_export)
+                self.emettre_son("send")
+            except Exception as ex:
+                self.afficher_erreur("Erreur Code", str(ex))
+                self.emettre_son("error")
         
-        def action_renommer(e):
-            fichier = verifier_selection()
-            if not fichier:
-                return
-            
-            tf_rename = ft.TextField(label="Nouveau nom", value=fichier.replace(".json", ""))
+        dlg_export = self.overlays.ouvrir_dialogue(
+            "📤 Options d'Exportation",
+            ft.Text(f"Choisir le format pour {fichier}"),
+            [
+                ft.FilledButton("PDF", icon=ft.icons.PICTURE_AS_PDF, on_click=partial(self.exporter_pdf, recette_a_exporter)),
+                ft.FilledButton("Mail", icon=ft.icons.EMAIL, on_click=export_mail),
+                ft.FilledButton("Code", icon=ft.icons.QR_CODE, on_click=export_code),
+                ft.TextButton("Annuler", on_click=lambda ev: self.fermer_dialog(dlg_export))
+            ],
+            actions_alignment=ft.MainAxisAlignment.CENTER
+        )
+    
+    @instrumenter("ecran.construire_assistant")
+    def construire_droid_assistant(self):
+        """Construit l'assistant (une seule fois, voir afficher_vue)"""
+        def action_importer_code(e):
+            tf_code = ft.TextField(label="Code SoapMaker (SM1:...)", multiline=True, min_lines=2)
             
-            def valider_rename(ev):
-                if tf_rename.value:
-                    self.memory.renommer_recette(fichier, tf_rename.value)
-                    dlg_rename.open = False
-                    self.page.update()
-                    self.afficher_droid_assistant()
+            def valider_code(ev):
+                try:
+                    self.recette = decoder_code_partage(
+                        tf_code.value or "", self.db_huiles, self.db_additifs, self.db_he
+                    )
+                except CodePartageInvalide as ex:
+                    self.afficher_erreur("Code refusé", str(ex))
+                    self.emettre_son("error")
+                    return
+                self.overlays.fermer_dialogue(dlg_code)
+                self.afficher_info("Droid", "Recette décodée avec succès !")
+                self.afficher_fenetre_4()
             
-            dlg_rename = ft.AlertDialog(
-                title=ft.Text("Renommer"),
-                content=tf_rename,
-                actions=[
-                    ft.TextButton("Annuler", on_click=lambda ev: self.fermer_dialog(dlg_rename)),
-                    ft.TextButton("Valider", on_click=valider_rename)
+            dlg_code = self.overlays.ouvrir_dialogue(
+                "📥 Importer un code",
+                tf_code,
+                [
+                    ft.TextButton("Annuler", on_click=lambda ev: self.fermer_dialog(dlg_code)),
+                    ft.TextButton("Importer", on_click=valider_code)
                 ]
             )
-            self.page.overlay.append(dlg_rename)
-            dlg_rename.open = True
-            self.page.update()
         
-        def action_exporter(e):
-            fichier = verifier_selection()
-            if not fichier:
+        def action_exporter_archive(e):
+            try:
+                chemin, compteurs = exporter_archive(self.memory, fmt="zip")
+                self.afficher_info(
+                    "Archive", f"{compteurs['recettes']} recettes + catalogues :\n{chemin}"
+                )
+                self.emettre_son("save")
+            except Exception as ex:
+                self.afficher_erreur("Erreur Archive", str(ex))
+                self.emettre_son("error")
+        
+        def action_exporter_csv(e):
+            try:
+                _, _, compteurs = exporter_csv_analyse(self.memory, sap_values=self.sap_values)
+                self.afficher_info(
+                    "Analyse CSV",
+                    f"{compteurs['recettes']} recettes, {compteurs['lignes_ingredients']} lignes "
+                    f"ingrédients\n{self.memory.exports_dir}"
+                )
+                self.emettre_son("save")
+            except Exception as ex:
+                self.afficher_erreur("Erreur CSV", str(ex))
+                self.emettre_son("error")
+        
+        d_politique = ft.Dropdown(
+            label="Si conflit",
+            options=[ft.dropdown.Option(p) for p in POLITIQUES],
+            value=POLITIQUE_RENOMMER,
+            width=160
+        )
+        
+        def resultat_import(ev: ft.FilePickerResultEvent):
+            if not ev.files:
+                return
+            try:
+                rapport = importer_archive(self.memory, ev.files[0].path, d_politique.value)
+                self.charger_toutes_les_bases()
+                self.rafraichir_memoire()
+                self.afficher_info(
+                    "Import",
+                    f"{rapport['importees']} nouvelles, {rapport['doublons']} doublons, "
+                    f"{rapport['renommees'] + rapport['ecrasees']} conflits traités, "
+                    f"{rapport['ressources']} ressources"
+                )
+                self.emettre_son("save")
+            except Exception as ex:
+                self.afficher_erreur("Erreur Import", str(ex))
+                self.emettre_son("error")
+        
+        picker_archive = ft.FilePicker(on_result=resultat_import)
+        self.overlays.installer(picker_archive)
+        
+        t_pair = ft.TextField(
+            label="Pair de synchro (dossier SaveData ou http://code@ip:8765)",
+            text_size=12,
+            expand=True
+        )
+        
+        def action_synchroniser(e):
+            if not t_pair.value or not t_pair.value.strip():
+                return self.afficher_erreur("Synchro", "Indique un dossier ou une adresse.")
+            try:
+                rapport = droidsync.synchroniser(self.memory, t_pair.value.strip())
+            except (droidsync.ErreurSync, OSError) as ex:
+                self.afficher_erreur("Synchro", str(ex))
+                self.emettre_son("error")
                 return
             
-            recette_a_exporter = self.memory.charger_json(fichier)
-            
-            def export_pdf(ev):
-                try:
-                    chemin = self.memory.generer_pdf_recette(recette_a_exporter)
-                    dlg_export.open = False
-                    self.page.update()
-                    self.afficher_info("PDF Généré", f"Fichier sauvegardé :\n{chemin}")
-                    self.emettre_son("old")
-                except Exception as ex:
-                    dlg_export.open = False
-                    self.page.update()
-                    self.afficher_erreur("Erreur PDF", str(ex))
-                    self.emettre_son("error")
-            
-            def export_mail(ev):
-                try:
-                    texte = self.memory.generer_texte_mail(recette_a_exporter)
-                    nom = recette_a_exporter.get("nom_recette", "Recette")
-                    
-                    sujet = quote(f"Recette Savon : {nom}")
-                    corps = quote(texte)
-                    
-                    webbrowser.open(f"mailto:?subject={sujet}&body={corps}")
-                    
-                    dlg_export.open = False
-                    self.page.update()
-                    self.afficher_info("Mail", "Client mail ouvert !")
-                    self.emettre_son("send")
-                except Exception as ex:
-                    dlg_export.open = False
-                    self.page.update()
-                    self.afficher_erreur("Erreur Mail", str(ex))
-                    self.emettre_son("error")
-            
-            dlg_export = ft.AlertDialog(
-                title=ft.Text("📤 Options d'Exportation"),
-                content=ft.Text(f"Choisir le format pour {fichier}"),
-                actions=[
-                    ft.FilledButton("PDF", icon=ft.icons.PICTURE_AS_PDF, on_click=export_pdf),
-                    ft.FilledButton("Mail", icon=ft.icons.EMAIL, on_click=export_mail),
-                    ft.TextButton("Annuler", on_click=lambda ev: self.fermer_dialog(dlg_export))
-                ],
-                actions_alignment=ft.MainAxisAlignment.CENTER,
-            )
-            
-            self.page.overlay.append(dlg_export)
-            dlg_export.open = True
-            self.page.update()
+            if rapport["inchange"]:
+                self.afficher_info("Synchro", "Déjà à jour.")
+            else:
+                self.charger_toutes_les_bases()
+                self.afficher_info(
+                    "Synchro",
+                    f"↑ {rapport['envoyes']}  ↓ {rapport['recus']}  "
+                    f"✕ {rapport['supprimes_local'] + rapport['supprimes_distant']}  "
+                    f"⇄ {rapport['fusions']} catalogue(s) fusionné(s)  "
+                    f"⚠ {rapport['conflits']} conflit(s)"
+                )
+            self.emettre_son("send")
+        
+        def action_servir(e):
+            try:
+                if self.serveur_sync:
+                    self.serveur_sync.arreter()
+                    self.serveur_sync = None
+                    self.afficher_info("Synchro", "Partage arrêté.")
+                else:
+                    # Réseau local, protégé par le code d'appairage à saisir sur le pair
+                    self.serveur_sync = droidsync.ServeurSync(self.memory.base_dir, hote="0.0.0.0").demarrer()
+                    port = self.serveur_sync.adresse.rsplit(':', 1)[-1]
+                    self.afficher_info(
+                        "Synchro",
+                        f"Ce droid est joignable sur le port {port}, code d'appairage {self.serveur_sync.jeton} "
+                        f"(sur le pair : http://{self.serveur_sync.jeton}@<ip de ce droid>:{port})"
+                    )
+            except OSError as ex:
+                self.afficher_erreur("Synchro", str(ex))
         
         # Champs ajout ressource
         t_nom = ft.TextField(label="Nom", border_color=ft.colors.ORANGE, expand=True)
@@ -1344,7 +1871,8 @@ class SoapMakerApp:
                 d_tox_he.visible = True
                 t_reco.visible = False
             
-            self.page.update()
+            with instruments.mesure("page.update"):
+                self.page.update()
         
         radio_type = ft.RadioGroup(
             content=ft.Row([
@@ -1378,9 +1906,7 @@ class SoapMakerApp:
                         "mousse": t_mousse.value,
                         "recommande": t_reco.value
                     }
-                    self.db_huiles.append(new_item)
-                    self.memory.sauvegarder_ressource("huiles.json", {"huiles": self.db_huiles})
-                    self.charger_toutes_les_bases()
+                    self.registre.ajouter("huiles.json", new_item)
                 
                 elif mode_res == "Additif":
                     cat = d_type_additif.value if d_type_additif.value else "Trace"
@@ -1390,9 +1916,7 @@ class SoapMakerApp:
                         "% conseillé": t_reco.value,
                         "Cat": cat
                     }
-                    self.db_additifs.append(new_item)
-                    self.memory.sauvegarder_ressource("additifs.json", {"additifs": self.db_additifs})
-                    self.charger_toutes_les_bases()
+                    self.registre.ajouter("additifs.json", new_item)
                 
                 elif mode_res == "HE":
                     tox = d_tox_he.value if d_tox_he.value else "0"
@@ -1401,154 +1925,349 @@ class SoapMakerApp:
                         "Propriétés": t_prop.value,
                         "Toxicité": tox
                     }
-                    self.db_he.append(new_item)
-                    self.memory.sauvegarder_ressource("addons_he.json", {"addons_he": self.db_he})
-                    self.charger_toutes_les_bases()
+                    self.registre.ajouter("addons_he.json", new_item)
                 
                 self.afficher_info("Succès", f"{nom_res} a été intégré à la base !")
                 t_nom.value = ""
                 t_prop.value = ""
-                self.page.update()
+                with instruments.mesure("page.update"):
+                    self.page.update()
             
             except Exception as ex:
                 self.afficher_erreur("Bug Système", str(ex))
         
+        def resultat_import_catalogue(ev: ft.FilePickerResultEvent):
+            if not ev.files:
+                return
+            fichier = TYPES_RESSOURCE.get(radio_type.value, "huiles.json")
+            try:
+                rapport = importer_catalogue(self.memory, fichier, ev.files[0].path)
+            except (ImportCatalogueInvalide, ValueError, OSError) as ex:
+                self.afficher_erreur("Import catalogue", str(ex))
+                self.emettre_son("error")
+                return
+            
+            self.charger_toutes_les_bases()
+            message = (
+                f"{rapport['ajoutees']} ajoutées, {rapport['doublons']} doublons, "
+                f"{rapport['rejetees']} rejetées sur {rapport['lues']} lignes"
+            )
+            if rapport["motifs"]:
+                message += "\n" + rapport["motifs"][0]
+            self.afficher_info(fichier, message)
+            self.emettre_son("save")
+        
+        picker_catalogue = ft.FilePicker(on_result=resultat_import_catalogue)
+        self.overlays.installer(picker_catalogue)
+        
+        self.zone_memoire = ft.Container(
+            height=150,
+            padding=10,
+            border=ft.border.all(1, ft.colors.GREY_800),
+            border_radius=10,
+            bgcolor=ft.colors.BLACK12
+        )
+        
+        self.panneau_diagnostics = PanneauDiagnostics(
+            self.memory, self.maj, self.afficher_info, self.afficher_erreur
+        )
+        
         # Assemblage visuel
-        self.page.add(
-            ft.Container(
-                content=ft.Column([
-                    # HEADER
-                    ft.Container(
-                        content=ft.Column([
-                            ft.Image(
-                            src="Droid_mouss.png",
-                            width=120,
-                            height=120,
-                            fit=ft.ImageFit.CONTAIN,
-                            ),
-                            ft.Text("Droid Assistant", size=22, weight=ft.FontWeight.BOLD, font_family="staround"),
-                            ft.Text("L'Aventure Droid - Episode Bonus", size=16, font_family="staround"),
-                        ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
-                        alignment=ft.alignment.center,
-                        padding=5
+        return ft.Container(
+            content=ft.Column([
+                # HEADER
+                ft.Container(
+                    content=ft.Column([
+                        ft.Image(
+                        src="Droid_mouss.png",
+                        width=120,
+                        height=120,
+                        fit=ft.ImageFit.CONTAIN,
+                        ),
+                        ft.Text("Droid Assistant", size=22, weight=ft.FontWeight.BOLD, font_family="staround"),
+                        ft.Text("L'Aventure Droid - Episode Bonus", size=16, font_family="staround"),
+                    ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+                    alignment=ft.alignment.center,
+                    padding=5
+                ),
+                ft.Divider(),
+                
+                # SECTION MÉMOIRE
+                ft.Text("💾 MÉMOIRE ET ARCHIVES", weight=ft.FontWeight.BOLD, color=ft.colors.CYAN),
+                self.zone_memoire,
+                
+                ft.Row([
+                    ft.FilledButton(
+                        "CHARGER", 
+                        icon=ft.icons.UPLOAD_FILE, 
+                        on_click=self.action_charger, 
+                        style=ft.ButtonStyle(bgcolor=ft.colors.GREEN_900, color=ft.colors.WHITE),
+                        expand=True
                     ),
-                    ft.Divider(),
-                    
-                    # SECTION MÉMOIRE
-                    ft.Text("💾 MÉMOIRE ET ARCHIVES", weight=ft.FontWeight.BOLD, color=ft.colors.CYAN),
-                    ft.Container(
-                        content=content_memoire,
-                        height=150,
-                        padding=10,
-                        border=ft.border.all(1, ft.colors.GREY_800),
-                        border_radius=10,
-                        bgcolor=ft.colors.BLACK12
+                    ft.FilledButton(
+                        "EFFACER", 
+                        icon=ft.icons.DELETE_FOREVER, 
+                        on_click=self.action_supprimer, 
+                        style=ft.ButtonStyle(bgcolor=ft.colors.RED_900, color=ft.colors.WHITE),
+                        expand=True
                     ),
-                    
-                    ft.Row([
-                        ft.FilledButton(
-                            "CHARGER", 
-                            icon=ft.icons.UPLOAD_FILE, 
-                            on_click=action_charger, 
-                            style=ft.ButtonStyle(bgcolor=ft.colors.GREEN_900, color=ft.colors.WHITE),
-                            expand=True
-                        ),
-                        ft.FilledButton(
-                            "EFFACER", 
-                            icon=ft.icons.DELETE_FOREVER, 
-                            on_click=action_supprimer, 
-                            style=ft.ButtonStyle(bgcolor=ft.colors.RED_900, color=ft.colors.WHITE),
-                            expand=True
-                        ),
-                    ]),
-                    ft.Row([
-                        ft.FilledButton(
-                            "RENOMMER", 
-                            icon=ft.icons.DRIVE_FILE_RENAME_OUTLINE, 
-                            on_click=action_renommer, 
-                            style=ft.ButtonStyle(bgcolor=ft.colors.BLUE_900, color=ft.colors.WHITE),
-                            expand=True
-                        ),
-                        ft.FilledButton(
-                            "EXPORTER", 
-                            icon=ft.icons.SEND, 
-                            on_click=action_exporter, 
-                            style=ft.ButtonStyle(bgcolor=ft.colors.PURPLE_900, color=ft.colors.WHITE),
-                            expand=True
-                        ),
-                    ]),
-                    
-                    ft.Divider(),
-                    
-                    # SECTION CIRCUITS
-                    ft.Text("🔌 CIRCUITS DU DROID", weight=ft.FontWeight.BOLD, color=ft.colors.BLUE_GREY),
+                ]),
+                ft.Row([
+                    ft.FilledButton(
+                        "RENOMMER", 
+                        icon=ft.icons.DRIVE_FILE_RENAME_OUTLINE, 
+                        on_click=self.action_renommer, 
+                        style=ft.ButtonStyle(bgcolor=ft.colors.BLUE_900, color=ft.colors.WHITE),
+                        expand=True
+                    ),
+                    ft.FilledButton(
+                        "EXPORTER", 
+                        icon=ft.icons.SEND, 
+                        on_click=self.action_exporter, 
+                        style=ft.ButtonStyle(bgcolor=ft.colors.PURPLE_900, color=ft.colors.WHITE),
+                        expand=True
+                    ),
+                ]),
+                ft.OutlinedButton(
+                    "IMPORTER DEPUIS UN CODE",
+                    icon=ft.icons.QR_CODE_SCANNER,
+                    on_click=action_importer_code,
+                    expand=True
+                ),
+                
+                ft.Divider(),
+                
+                # SECTION CIRCUITS
+                ft.Text("🔌 CIRCUITS DU DROID", weight=ft.FontWeight.BOLD, color=ft.colors.BLUE_GREY),
+                ft.OutlinedButton(
+                    "EXPLORER LE STOCKAGE (SaveData)",
+                    icon=ft.icons.FOLDER_OPEN,
+                    on_click=self.action_ouvrir_dossier,
+                    expand=True
+                ),
+                ft.Row([
                     ft.OutlinedButton(
-                        "EXPLORER LE STOCKAGE (SaveData)",
-                        icon=ft.icons.FOLDER_OPEN,
-                        on_click=self.action_ouvrir_dossier,
+                        "SAUVEGARDE COMPLÈTE",
+                        icon=ft.icons.ARCHIVE,
+                        on_click=action_exporter_archive,
                         expand=True
                     ),
-                    
-                    ft.Divider(),
-                    
-                    # SECTION AJOUT INGRÉDIENTS
-                    ft.Text("🛠️ NOUVELLE RESSOURCE", weight=ft.FontWeight.BOLD, color=ft.colors.ORANGE),
-                    ft.Container(
-                        content=ft.Column([
-                            radio_type,
-                            ft.Row([t_nom, t_reco]),
-                            ft.Row([t_sap, t_mousse]),
-                            d_type_additif,
-                            d_tox_he,
-                            t_prop,
-                            ft.FilledButton(
-                                "ENREGISTRER DANS LA BASE",
-                                icon=ft.icons.SAVE,
-                                on_click=action_sauvegarder_ressource,
-                                style=ft.ButtonStyle(bgcolor=ft.colors.ORANGE_800, color=ft.colors.WHITE),
-                                width=400
-                            )
-                        ], spacing=10),
-                        padding=15,
-                        border=ft.border.all(1, ft.colors.ORANGE_900),
-                        border_radius=10
+                    ft.OutlinedButton(
+                        "RESTAURER",
+                        icon=ft.icons.UNARCHIVE,
+                        on_click=lambda e: picker_archive.pick_files(
+                            allowed_extensions=["zip", "jsonl"]
+                        ),
+                        expand=True
                     ),
-                    
-                    ft.Divider(height=30, color="transparent"),
-                    ft.FilledButton(
-                        "← RETOUR AU LABORATOIRE",
-                        on_click=lambda e: self.afficher_fenetre_1(),
-                        height=50,
-                        width=400,
-                        style=ft.ButtonStyle(bgcolor=ft.colors.BLUE_GREY_800, color=ft.colors.WHITE)
-                    )
-                ], scroll=ft.ScrollMode.ALWAYS),
-                expand=True,
-                padding=10
-            )
+                    d_politique
+                ]),
+                ft.Row([
+                    t_pair,
+                    ft.IconButton(icon=ft.icons.SYNC, on_click=action_synchroniser, tooltip="Synchroniser"),
+                    ft.IconButton(icon=ft.icons.WIFI_TETHERING, on_click=action_servir, tooltip="Partager ce SaveData")
+                ]),
+                ft.OutlinedButton(
+                    "EXPORT ANALYSE (CSV)",
+                    icon=ft.icons.TABLE_CHART,
+                    on_click=action_exporter_csv,
+                    expand=True
+                ),
+                
+                ft.Divider(),
+                
+                # SECTION AJOUT INGRÉDIENTS
+                ft.Text("🛠️ NOUVELLE RESSOURCE", weight=ft.FontWeight.BOLD, color=ft.colors.ORANGE),
+                ft.Container(
+                    content=ft.Column([
+                        radio_type,
+                        ft.Row([t_nom, t_reco]),
+                        ft.Row([t_sap, t_mousse]),
+                        d_type_additif,
+                        d_tox_he,
+                        t_prop,
+                        ft.FilledButton(
+                            "ENREGISTRER DANS LA BASE",
+                            icon=ft.icons.SAVE,
+                            on_click=action_sauvegarder_ressource,
+                            style=ft.ButtonStyle(bgcolor=ft.colors.ORANGE_800, color=ft.colors.WHITE),
+                            width=400
+                        ),
+                        ft.OutlinedButton(
+                            "IMPORT EN MASSE (CSV / JSON)",
+                            icon=ft.icons.PLAYLIST_ADD,
+                            on_click=lambda e: picker_catalogue.pick_files(
+                                allowed_extensions=["csv", "tsv", "txt", "json", "jsonl"]
+                            ),
+                            width=400
+                        )
+                    ], spacing=10),
+                    padding=15,
+                    border=ft.border.all(1, ft.colors.ORANGE_900),
+                    border_radius=10
+                ),
+                
+                ft.Divider(),
+                
+                # SECTION DIAGNOSTICS
+                self.panneau_diagnostics.controle,
+                
+                ft.Divider(height=30, color="transparent"),
+                ft.FilledButton(
+                    "← RETOUR AU LABORATOIRE",
+                    on_click=lambda e: self.afficher_fenetre_1(),
+                    height=50,
+                    width=400,
+                    style=ft.ButtonStyle(bgcolor=ft.colors.BLUE_GREY_800, color=ft.colors.WHITE)
+                )
+            ], scroll=ft.ScrollMode.ALWAYS),
+            expand=True,
+            padding=10
         )
-        self.page.update()
-        
+    
+    def recette_a_archiver(self):
+        """(nom, recette) : instantané complété des résultats et de la date"""
+        with self.etat.verrou:
+            recette = self.etat.instantane()
+            resultats = self.etat.lire("chimie")
+        archive = dict(recette, resultats=resultats, date_creation=datetime.now().strftime("%Y-%m-%d %H:%M"))
+        return recette.get("nom_recette", "Recette_Sans_Nom"), archive
+    
     def action_sauvegarder_finale(self, e):
         """Sauvegarde la recette actuelle"""
         self.emettre_son("old")
         try:
-            resultats_chimiques = self.calculer_chimie_recette(self.recette)
-            
-            self.recette["resultats"] = resultats_chimiques
-            self.recette["date_creation"] = datetime.now().strftime("%Y-%m-%d %H:%M")
-            
-            nom_recette = self.recette.get("nom_recette", "Recette_Sans_Nom")
-            nom_sauvegarde = self.memory.sauvegarder_recette(nom_recette, self.recette)
-            
+            nom_sauvegarde = self.memory.sauvegarder_recette(*self.recette_a_archiver())
             self.afficher_info("Système", f"Recette archivée : {nom_sauvegarde}")
         
         except Exception as ex:
             self.afficher_erreur("Echec Archivage", f"Erreur : {str(ex)}")
 
 
+class SoapMakerAppAsync(SoapMakerApp):
+    """
+    Variante asyncio : démarrage, minuteurs et accès disque des actions
+    fichiers (archiver, charger, effacer, renommer, PDF) sont attendus
+    sans bloquer la boucle, qui peut servir de nombreuses sessions.
+    Les gestionnaires restés synchrones tournent dans le pool de Flet
+    """
+    
+    def __init__(self, page: ft.Page, dossier=None):
+        # Mode async seulement : asyncio n'est pas importé au lancement
+        import asyncio
+
+        self.taches = set()
+        self.boucle = asyncio.get_running_loop()
+        super().__init__(page, boucle=self.boucle, dossier=dossier)
+    
+    def demarrer(self):
+        """Rien ici : main_async attend demarrer_async()"""
+    
+    def catalogues_changes(self, catalogues):
+        """Resynchronisation jouée sur la boucle, comme les gestionnaires async"""
+        self.boucle.call_soon_threadsafe(self.resynchroniser_catalogues, catalogues)
+    
+    def en_fond(self, coro):
+        """Tâche de fond gardée en référence jusqu'à sa fin"""
+        tache = self.boucle.create_task(coro)
+        self.taches.add(tache)
+        tache.add_done_callback(self.taches.discard)
+        return tache
+    
+    async def demarrer_async(self):
+        """Splash, puis dossiers et catalogues chargés en parallèle hors de la boucle"""
+        import asyncio
+
+        self.afficher_splashscreen()
+        
+        async def etape(nom, coro):
+            resultat = await coro
+            self.chronologie.marquer(nom)
+            return resultat
+        
+        # Non critique : l'interface fonctionne en silence en attendant
+        self.en_fond(etape("Moteur audio prêt (arrière-plan)", asyncio.to_thread(self.sound_manager.demarrer)))
+        
+        resultats = await asyncio.gather(
+            etape("Dossiers SaveData prêts", self.memory.preparer_dossiers_async()),
+            etape("Catalogue huiles chargé", asyncio.to_thread(self.registre.lire, "huiles.json")),
+            etape("Catalogue additifs chargé", asyncio.to_thread(self.registre.lire, "additifs.json")),
+            etape("Catalogue HE chargé", asyncio.to_thread(self.registre.lire, "addons_he.json")),
+            return_exceptions=True
+        )
+        try:
+            for resultat in resultats:
+                if isinstance(resultat, BaseException):
+                    raise resultat
+            self.appliquer_catalogues(self.registre.courant())
+        except Exception as e:
+            print(f"⚠️ Démarrage dégradé : {e}")
+            await asyncio.to_thread(self.charger_toutes_les_bases)
+        
+        self.afficher_fenetre_1()
+        self.maj.vider()
+        self.chronologie.marquer("Fenêtre 1 interactive")
+        
+        self.en_fond(asyncio.to_thread(self.preparer_index))
+        if PRECHAUFFER_MODULES:
+            prechauffer(fpdf)
+    
+    async def rafraichir_memoire_async(self):
+        self.afficher_memoire(await self.memory.lister_recettes_async())
+    
+    async def action_charger(self, e):
+        fichier = self.selection_memoire()
+        if fichier:
+            self.recette = await self.memory.charger_json_async(fichier)
+            self.afficher_info("Droid", "Mémoire restaurée avec succès !")
+            self.afficher_fenetre_4()
+    
+    async def action_supprimer(self, e):
+        fichier = self.selection_memoire()
+        if fichier:
+            await self.memory.supprimer_recette_async(fichier)
+            await self.rafraichir_memoire_async()
+            self.afficher_info("Nettoyage", "Fichier supprimé.")
+    
+    async def valider_renommage(self, fichier, champ, e):
+        if champ.value:
+            await self.memory.renommer_recette_async(fichier, champ.value)
+            await self.rafraichir_memoire_async()
+            self.overlays.fermer_dialogue(self.overlays.dialogue_de(champ))
+    
+    async def action_exporter(self, e):
+        fichier = self.selection_memoire()
+        if fichier:
+            self.ouvrir_export(fichier, await self.memory.charger_json_async(fichier))
+    
+    async def exporter_pdf(self, recette, e):
+        self.overlays.fermer_dialogue(self.overlays.dialogue_de(e.control))
+        try:
+            chemin = await self.memory.generer_pdf_recette_async(recette)
+            self.afficher_info("PDF Généré", f"Fichier sauvegardé :\n{chemin}")
+            self.emettre_son("old")
+        except Exception as ex:
+            self.afficher_erreur("Erreur PDF", str(ex))
+            self.emettre_son("error")
+    
+    async def action_sauvegarder_finale(self, e):
+        self.emettre_son("old")
+        try:
+            nom_sauvegarde = await self.memory.sauvegarder_recette_async(*self.recette_a_archiver())
+            self.afficher_info("Système", f"Recette archivée : {nom_sauvegarde}")
+        except Exception as ex:
+            self.afficher_erreur("Echec Archivage", f"Erreur : {str(ex)}")
+
+
 def main(page: ft.Page):
     SoapMakerApp(page)
 
 
-ft.app(target=main, assets_dir="assets")
\ No newline at end of file
+async def main_async(page: ft.Page):
+    app = SoapMakerAppAsync(page)
+    await app.demarrer_async()
+
+
+if __name__ == "__main__":
+    # python main.py --async : une seule boucle asyncio pour toutes les sessions
+    ft.app(target=main_async if "--async" in sys.argv else main, assets_dir="assets")
\ No newline at end of file